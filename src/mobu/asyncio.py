@@ -2,16 +2,214 @@
 
 import asyncio
 import contextlib
-from asyncio import Task
-from collections.abc import Awaitable, Callable, Coroutine
+import heapq
+from asyncio import AbstractEventLoop, Future, Task, TimerHandle
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable, Coroutine
 from datetime import timedelta
+from itertools import count
 
 __all__ = [
+    "AdaptiveLimiter",
+    "PauseTimer",
+    "pause_timer",
     "schedule_periodic",
     "wait_first",
 ]
 
 
+class AdaptiveLimiter:
+    """Limit on concurrent requests to a service that adapts to its health.
+
+    The limit is adjusted with additive increase and multiplicative decrease
+    (AIMD), like TCP congestion control. Each request that succeeds without
+    slowing down raises the limit by ``1 / limit``, so the limit grows by
+    about one for each limit's worth of requests. A request that fails, or
+    that takes more than ``tolerance`` times as long as the fastest request
+    seen, multiplies the limit by ``backoff``. Only one decrease is made for
+    the requests that were already running when it happened, so that a burst
+    of slow responses caused by one overload doesn't collapse the limit.
+
+    Parameters
+    ----------
+    initial
+        Initial limit.
+    minimum
+        Lowest the limit can go.
+    maximum
+        Highest the limit can go.
+    tolerance
+        How many times the fastest latency seen a request can take before
+        it counts as a sign of overload.
+    backoff
+        Factor by which to cut the limit on overload.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        *,
+        minimum: int = 1,
+        maximum: int,
+        tolerance: float = 2.0,
+        backoff: float = 0.5,
+    ) -> None:
+        self._limit = float(initial)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._tolerance = tolerance
+        self._backoff = backoff
+        self._active = 0
+        self._waiters: deque[Future[None]] = deque()
+        self._fastest: float | None = None
+        self._decreased_at = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed to run at once."""
+        return int(self._limit)
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncGenerator[None]:
+        """Wait for a free slot and hold it while making a request.
+
+        The time spent inside the context manager is taken as the latency
+        of the request, and an exception raised inside it as a failure.
+        """
+        await self._acquire()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            yield
+        except Exception:
+            self._decrease(start)
+            raise
+        else:
+            latency = loop.time() - start
+            if self._fastest is None or latency < self._fastest:
+                self._fastest = latency
+            if latency > self._fastest * self._tolerance:
+                self._decrease(start)
+            else:
+                self._increase()
+        finally:
+            self._active -= 1
+            self._wake()
+
+    async def _acquire(self) -> None:
+        """Wait until a slot is free and take it."""
+        if not self._waiters and self._active < self.limit:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait was cancelled.
+                self._active -= 1
+                self._wake()
+            else:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(future)
+            raise
+
+    def _decrease(self, start: float) -> None:
+        """Cut the limit unless it was already cut after start."""
+        if start < self._decreased_at:
+            return
+        self._limit = max(self._limit * self._backoff, self._minimum)
+        self._decreased_at = asyncio.get_running_loop().time()
+
+    def _increase(self) -> None:
+        """Raise the limit and start any requests it now allows."""
+        self._limit = min(self._limit + 1 / self._limit, self._maximum)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiting requests in the order they arrived."""
+        while self._waiters and self._active < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+
+class PauseTimer:
+    """Shared timer for the pauses of every monkey.
+
+    Pending pauses are kept in a heap keyed by wake time, and only the
+    earliest of them has a timer on the event loop. When it fires, every
+    pause that is due is woken at once. Each pause is a bare future rather
+    than a task with its own timeout, so thousands of idle monkeys cost the
+    event loop one timer instead of a task and a timer each.
+
+    A pause can be ended early by setting the result of its future. Pauses
+    ended early are discarded when they reach the top of the heap.
+    """
+
+    def __init__(self) -> None:
+        self._loop: AbstractEventLoop | None = None
+        self._heap: list[tuple[float, int, Future[bool]]] = []
+        self._counter = count()
+        self._handle: TimerHandle | None = None
+
+    def pause(self, seconds: float) -> Future[bool]:
+        """Start a pause.
+
+        Parameters
+        ----------
+        seconds
+            How long to pause.
+
+        Returns
+        -------
+        asyncio.Future
+            Future that will be resolved with `True` once the pause is over,
+            unless its result is set earlier.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pauses from an event loop that is no longer running will never
+            # be awaited, so start over.
+            self._loop = loop
+            self._heap = []
+            self._handle = None
+        future = loop.create_future()
+        when = loop.time() + seconds
+        heapq.heappush(self._heap, (when, next(self._counter), future))
+        if not self._handle or when < self._handle.when():
+            self._schedule(when)
+        return future
+
+    def _schedule(self, when: float) -> None:
+        """Set the event loop timer to wake pauses at the given time."""
+        if not self._loop:
+            return
+        if self._handle:
+            self._handle.cancel()
+        self._handle = self._loop.call_at(when, self._wake, when)
+
+    def _wake(self, when: float) -> None:
+        """Wake every pause that is due and reschedule for the next one."""
+        self._handle = None
+        if self._loop:
+            when = max(when, self._loop.time())
+        while self._heap and self._heap[0][0] <= when:
+            _, _, future = heapq.heappop(self._heap)
+            if not future.done():
+                future.set_result(True)
+        while self._heap and self._heap[0][2].done():
+            heapq.heappop(self._heap)
+        if self._heap:
+            self._schedule(self._heap[0][0])
+
+
+pause_timer = PauseTimer()
+"""Shared timer used for the pauses of every monkey."""
+
+
 def schedule_periodic(
     func: Callable[[], Awaitable[None]], interval: timedelta
 ) -> Task:
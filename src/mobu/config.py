@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
 from pathlib import Path
 from textwrap import dedent
 from typing import Literal, Self
 
 import yaml
-from pydantic import AliasChoices, Field, SecretStr
+from pydantic import AliasChoices, ByteSize, Field, SecretStr, model_validator
 from pydantic.alias_generators import to_camel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from safir.logging import LogLevel, Profile
@@ -215,6 +216,51 @@ class Config(BaseSettings):
         ),
     )
 
+    monkey_log_segment_size: ByteSize = Field(
+        ByteSize(10 * 1024 * 1024),
+        title="Monkey log segment size",
+        description=(
+            "Size at which the part of a monkey log being written is"
+            " compressed and a new part started. Smaller parts are used if"
+            " the parts being written by all monkeys would otherwise use more"
+            " than half of the monkey log disk budget."
+        ),
+        gt=0,
+        examples=["10MiB"],
+        validation_alias=AliasChoices(
+            "MOBU_MONKEY_LOG_SEGMENT_SIZE", "monkeyLogSegmentSize"
+        ),
+    )
+
+    monkey_log_max_size: ByteSize = Field(
+        ByteSize(100 * 1024 * 1024),
+        title="Maximum monkey log size",
+        description=(
+            "Maximum disk space used by the log of one monkey. Once a log"
+            " uses more, its oldest compressed parts are deleted."
+        ),
+        gt=0,
+        examples=["100MiB"],
+        validation_alias=AliasChoices(
+            "MOBU_MONKEY_LOG_MAX_SIZE", "monkeyLogMaxSize"
+        ),
+    )
+
+    monkey_log_budget: ByteSize = Field(
+        ByteSize(1024 * 1024 * 1024),
+        title="Monkey log disk budget",
+        description=(
+            "Maximum disk space used by the logs of all monkeys run by this"
+            " instance. Once the logs use more, the oldest compressed parts"
+            " of any log are deleted."
+        ),
+        gt=0,
+        examples=["1GiB"],
+        validation_alias=AliasChoices(
+            "MOBU_MONKEY_LOG_BUDGET", "monkeyLogBudget"
+        ),
+    )
+
     log_profile: Profile = Field(
         Profile.development,
         title="Application logging profile",
@@ -258,6 +304,116 @@ class Config(BaseSettings):
         validation_alias=AliasChoices("MOBU_REPLICA_INDEX", "replicaIndex"),
     )
 
+    worker_processes: int = Field(
+        0,
+        title="Worker processes",
+        description=(
+            "The number of worker processes this instance uses to parse"
+            " notebooks, so that parsing large notebooks can use other cores"
+            " and doesn't delay other monkeys. The monkeys themselves still"
+            " all run on one event loop; use more replicas to spread them"
+            " over more cores. If this is 0, notebooks are parsed on the same"
+            " event loop as the monkeys."
+        ),
+        ge=0,
+        examples=[4],
+        validation_alias=AliasChoices(
+            "MOBU_WORKER_PROCESSES", "workerProcesses"
+        ),
+    )
+
+    solitary_concurrency: int = Field(
+        10,
+        title="Concurrent solitary jobs",
+        description=(
+            "The maximum number of solitary jobs submitted through the job"
+            " API that this instance runs at the same time. Further jobs are"
+            " queued until one finishes."
+        ),
+        ge=1,
+        validation_alias=AliasChoices(
+            "MOBU_SOLITARY_CONCURRENCY", "solitaryConcurrency"
+        ),
+    )
+
+    solitary_queue_size: int = Field(
+        100,
+        title="Queued solitary jobs",
+        description=(
+            "The maximum number of solitary jobs waiting to run. Submitting"
+            " a job while this many are waiting fails."
+        ),
+        ge=0,
+        validation_alias=AliasChoices(
+            "MOBU_SOLITARY_QUEUE_SIZE", "solitaryQueueSize"
+        ),
+    )
+
+    solitary_retention: HumanTimedelta = Field(
+        timedelta(hours=1),
+        title="Solitary job retention",
+        description=(
+            "How long to keep the status and log of a finished solitary job"
+            " before forgetting it."
+        ),
+        examples=["1h", 3600],
+        validation_alias=AliasChoices(
+            "MOBU_SOLITARY_RETENTION", "solitaryRetention"
+        ),
+    )
+
+    token_cache_path: Path | None = Field(
+        None,
+        title="Token cache path",
+        description=(
+            "File in which to cache the service tokens created for monkeys"
+            " so that they are reused when flocks are restarted, including"
+            " after mobu restarts. This should be on a persistent volume"
+            " that is not shared with other replicas. The cache is encrypted"
+            " with tokenCacheKey, which must also be set. If not set, a new"
+            " token is created each time a monkey is started."
+        ),
+        examples=["/var/cache/mobu/tokens"],
+        validation_alias=AliasChoices(
+            "MOBU_TOKEN_CACHE_PATH", "tokenCachePath"
+        ),
+    )
+
+    token_cache_key: SecretStr | None = Field(
+        None,
+        title="Token cache key",
+        description=(
+            "Fernet key used to encrypt the token cache, as generated by"
+            " cryptography.fernet.Fernet.generate_key()"
+        ),
+        validation_alias=AliasChoices("MOBU_TOKEN_CACHE_KEY", "tokenCacheKey"),
+    )
+
+    cpu_accounting: bool = Field(
+        False,
+        title="Account for event loop time by flock",
+        description=(
+            "Whether to time every step of every task run by a flock's"
+            " monkeys and report the event loop time used per iteration in"
+            " the flock summary. This adds a small overhead to every task."
+        ),
+        validation_alias=AliasChoices("MOBU_CPU_ACCOUNTING", "cpuAccounting"),
+    )
+
+    slow_callback_tracking: bool = Field(
+        False,
+        title="Count slow event loop callbacks",
+        description=(
+            "Whether to time every step of every task and count the steps"
+            " that run long enough to delay the other monkeys. This adds a"
+            " small overhead to every task, including the ones whose"
+            " latency is being measured."
+        ),
+        validation_alias=AliasChoices(
+            "MOBU_SLOW_CALLBACK_TRACKING", "slowCallbackTracking"
+        ),
+    )
+
     sentry_dsn: str | None = Field(
         None,
         title="Sentry DSN",
@@ -303,6 +459,12 @@ class Config(BaseSettings):
         ),
     )
 
+    @model_validator(mode="after")
+    def _validate_token_cache(self) -> Self:
+        if self.token_cache_path and not self.token_cache_key:
+            raise ValueError("tokenCacheKey must be set if tokenCachePath is")
+        return self
+
     @classmethod
     def from_file(cls, path: Path) -> Self:
         """Construct a Configuration object from a configuration file.
@@ -7,38 +7,153 @@ from pathlib import Path
 
 __all__ = [
     "CONFIGURATION_PATH",
+    "EVENT_BATCH_SIZE",
+    "EVENT_BUFFER_SIZE",
+    "EVENT_LOOP_HEALTH_INTERVAL",
+    "EVENT_LOOP_LAG_INTERVAL",
+    "FEED_BUFFER_SIZE",
+    "FEED_KEEPALIVE_INTERVAL",
     "GITHUB_REPO_CONFIG_PATH",
     "GITHUB_WEBHOOK_WAIT_SECONDS",
+    "GZIP_MINIMUM_SIZE",
+    "ITERATION_HISTORY_SIZE",
+    "LOG_FOLLOW_MAX_INTERVAL",
+    "LOG_FOLLOW_MIN_INTERVAL",
+    "LOG_WRITER_BUFFER_SIZE",
     "NOTEBOOK_REPO_BRANCH",
     "NOTEBOOK_REPO_URL",
+    "RECORDS_MAX_SIZE",
+    "RECORD_BATCH_SIZE",
+    "SLOW_CALLBACK_THRESHOLD",
+    "TOKEN_CONCURRENCY_INITIAL",
+    "TOKEN_CONCURRENCY_MAX",
     "TOKEN_LIFETIME",
+    "TOKEN_RENEWAL_INTERVAL",
+    "TOKEN_RENEWAL_THRESHOLD",
     "WEBSOCKET_OPEN_TIMEOUT",
 ]
 
 CONFIGURATION_PATH = Path("/etc/mobu/config.yaml")
 """Default path to configuration."""
 
+EVENT_BATCH_SIZE = 100
+"""Maximum number of metrics events published concurrently as a batch."""
+
+EVENT_BUFFER_SIZE = 10000
+"""Maximum number of metrics events waiting to be published.
+
+Once this many events are waiting, further events are dropped until the
+background publisher catches up.
+"""
+
+EVENT_LOOP_HEALTH_INTERVAL = timedelta(minutes=1)
+"""How often to publish metrics events about event loop health."""
+
+EVENT_LOOP_LAG_INTERVAL = timedelta(milliseconds=100)
+"""How often to sample the lag of the event loop."""
+
+FEED_BUFFER_SIZE = 1000
+"""Number of events buffered for each subscriber to the feed of a flock.
+
+Once this many events are waiting to be sent to a subscriber, further events
+are dropped for that subscriber until it catches up.
+"""
+
+FEED_KEEPALIVE_INTERVAL = timedelta(seconds=30)
+"""How often to send a comment to an idle subscriber to the feed of a flock.
+
+This keeps ingresses and proxies from closing the connection as idle.
+"""
+
 GITHUB_REPO_CONFIG_PATH = Path("mobu.yaml")
 """The path to a config file with repo-specific configuration."""
 
 GITHUB_WEBHOOK_WAIT_SECONDS = 1
 """GithHub needs some time to actually be in the state in a webhook payload."""
 
+GZIP_MINIMUM_SIZE = 1024
+"""Smallest response body in bytes to compress for clients that accept it.
+
+Smaller bodies fit in a single packet anyway, so compressing them only costs
+CPU time.
+"""
+
+ITERATION_HISTORY_SIZE = 10
+"""Number of recent iterations whose phase timings each business keeps."""
+
+LOG_FOLLOW_MAX_INTERVAL = timedelta(seconds=2)
+"""Longest interval between checks for new data when following a log."""
+
+LOG_FOLLOW_MIN_INTERVAL = timedelta(milliseconds=100)
+"""Shortest interval between checks for new data when following a log.
+
+The interval doubles each time no new data is found, up to
+`LOG_FOLLOW_MAX_INTERVAL`, and drops back to this when data is found.
+"""
+
+LOG_WRITER_BUFFER_SIZE = 16 * 1024 * 1024
+"""Maximum total length of monkey log messages waiting to be written.
+
+If the log writer falls this far behind, further messages are dropped until
+it catches up.
+"""
+
 NOTEBOOK_REPO_URL = "https://github.com/lsst-sqre/notebook-demo.git"
 """Default notebook repository for NotebookRunner."""
 
 NOTEBOOK_REPO_BRANCH = "prod"
 """Default repository branch for NotebookRunner."""
 
+RECORDS_MAX_SIZE = 64 * 1024 * 1024
+"""Maximum compressed size of the run records kept for a flock.
+
+Once the records of a flock are larger than this, its oldest batches of
+records are discarded.
+"""
+
+RECORD_BATCH_SIZE = 1000
+"""Number of run records of a flock compressed together as one batch."""
+
+SLOW_CALLBACK_THRESHOLD = timedelta(milliseconds=100)
+"""Event loop callbacks that run at least this long are counted as slow.
+
+This is the same as the default threshold of asyncio debug mode.
+"""
+
+TOKEN_CONCURRENCY_INITIAL = 10
+"""Number of service tokens to start creating at once.
+
+Gafaelfawr has to add database rows for each token to the same table, so the
+number of tokens created concurrently is adjusted from here based on how
+quickly and reliably Gafaelfawr responds.
+"""
+
+TOKEN_CONCURRENCY_MAX = 100
+"""Maximum number of service tokens to create at once."""
+
 TOKEN_LIFETIME = timedelta(days=365)
 """Token lifetime for mobu's service tokens.
 
-mobu currently has no mechanism for refreshing tokens while running, so this
-should be long enough that mobu will be restarted before the tokens expire.
-An expiration exists primarily to ensure that the tokens don't accumulate
+Running monkeys keep using the token they were started with, so this should
+be long enough that mobu will be restarted before the tokens expire. An
+expiration exists primarily to ensure that the tokens don't accumulate
 forever.
 """
 
+TOKEN_RENEWAL_INTERVAL = timedelta(hours=1)
+"""How often to look for cached service tokens that are close to expiring."""
+
+TOKEN_RENEWAL_THRESHOLD = TOKEN_LIFETIME - timedelta(days=30)
+"""Remaining lifetime below which a cached service token is replaced.
+
+Cached tokens with less lifetime than this left are not reused, and are
+replaced with new tokens by a background task, so a cached token is only
+handed out for the first 30 days of its lifetime. Every monkey therefore
+starts with nearly as much token lifetime as a newly created token would
+have. The replaced tokens are not revoked, since monkeys that were started
+with them may still be running, and instead expire on their own.
+"""
+
 WEBSOCKET_OPEN_TIMEOUT = 60
 """How long to wait for a WebSocket connection to open (in seconds)."""
 
@@ -6,6 +6,7 @@ convenience of writing request handlers.  It also provides a place to store a
 including from dependencies.
 """
 
+import asyncio
 from dataclasses import dataclass
 from typing import Annotated, Any
 
@@ -18,8 +19,13 @@ from structlog.stdlib import BoundLogger
 
 from ..events import Events
 from ..factory import Factory, ProcessContext
+from ..services.cpu import cpu_task_factory
+from ..services.event_loop import EventLoopMonitor
+from ..services.jobs import SolitaryJobManager
+from ..services.logwriter import LogWriter
 from ..services.manager import FlockManager
 from ..services.repo import RepoManager
+from .config import config_dependency
 
 __all__ = [
     "ContextDependency",
@@ -42,9 +48,21 @@ class RequestContext:
     manager: FlockManager
     """Global singleton flock manager."""
 
+    solitary_jobs: SolitaryJobManager
+    """Global singleton manager of solitary jobs."""
+
     repo_manager: RepoManager
     """Global singleton git repo manager."""
 
+    event_loop_monitor: EventLoopMonitor
+    """Global singleton monitor of the health of the event loop."""
+
+    log_writer: LogWriter
+    """Global singleton writer of monkey logs."""
+
+    events: Events
+    """Global singleton metrics event publishers."""
+
     factory: Factory
     """Component factory."""
 
@@ -84,7 +102,11 @@ class ContextDependency:
             request=request,
             logger=logger,
             manager=self._process_context.manager,
+            solitary_jobs=self._process_context.solitary_jobs,
             repo_manager=self._process_context.repo_manager,
+            event_loop_monitor=self._process_context.event_loop_monitor,
+            log_writer=self._process_context.log_writer,
+            events=self._process_context.events,
             factory=Factory(self._process_context, logger),
         )
 
@@ -104,11 +126,23 @@ class ContextDependency:
         event_manager.logger = self.process_context.logger
         await events.initialize(event_manager)
 
+        # The event loop monitor wraps whatever task factory is installed, so
+        # install the CPU accounting task factory first.
+        if config_dependency.config.cpu_accounting:
+            loop = asyncio.get_running_loop()
+            loop.set_task_factory(cpu_task_factory)
+        self._process_context.event_loop_monitor.start()
+        manager = self._process_context.manager
+        self._process_context.gafaelfawr_storage.start(manager.list_usernames)
+
     async def aclose(self) -> None:
         """Clean up the per-process configuration."""
         if self._process_context:
             await self._process_context.aclose()
         self._process_context = None
+        loop = asyncio.get_running_loop()
+        if loop.get_task_factory() is cpu_task_factory:
+            loop.set_task_factory(None)
 
 
 context_dependency = ContextDependency()
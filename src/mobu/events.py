@@ -4,13 +4,18 @@ from datetime import timedelta
 from typing import override
 
 from safir.dependencies.metrics import EventMaker
-from safir.metrics import EventManager, EventPayload
+from safir.metrics import EventManager, EventPayload, EventPublisher
+
+from .services.eventbuffer import BufferedPublisher, EventBuffer
 
 __all__ = [
+    "CapacityProbeResult",
     "EmptyLoopExecution",
     "EventBase",
+    "EventLoopLag",
     "Events",
     "GitLfsCheck",
+    "LoadStageChange",
     "MusterExecution",
     "NotebookBase",
     "NotebookCellExecution",
@@ -19,6 +24,7 @@ __all__ = [
     "NubladoPythonExecution",
     "NubladoSpawnLab",
     "SIAQuery",
+    "SlowCallbacks",
     "TapQuery",
 ]
 
@@ -31,12 +37,37 @@ class EventBase(EventPayload):
     username: str
 
 
+class CapacityProbeResult(EventPayload):
+    """Reported when a flock finishes searching for capacity.
+
+    The count and rate are `None` if no step met the objectives.
+    """
+
+    flock: str
+    business: str
+    count: int | None
+    rate: float | None
+    steps: int
+
+
 class EmptyLoopExecution(EventBase):
     """Reported when an empty loop... loops."""
 
     success: bool
 
 
+class LoadStageChange(EventPayload):
+    """Reported when a flock starts a new stage of its load profile."""
+
+    flock: str
+    business: str
+    stage: int
+    type: str
+    duration: timedelta
+    count: int | None
+    rate: float | None
+
+
 class MusterExecution(EventBase):
     """Repoerted when a Muster business loops."""
 
@@ -90,6 +121,32 @@ class NubladoDeleteLab(EventBase):
     success: bool
 
 
+class EventLoopLag(EventPayload):
+    """Reported periodically with the lag of mobu's own event loop.
+
+    Lag is how much later than scheduled a periodic timer woke up during the
+    reporting interval.
+    """
+
+    lag_p50: timedelta
+    lag_p99: timedelta
+    lag_max: timedelta
+    slow_callback_count: int
+
+
+class SlowCallbacks(EventPayload):
+    """Reported periodically for each business that ran slow callbacks.
+
+    Slow callbacks block mobu's event loop, delaying every other monkey.
+    """
+
+    flock: str | None
+    business: str | None
+    count: int
+    duration: timedelta
+    max_duration: timedelta
+
+
 class GitLfsCheck(EventBase):
     """Reported from Git LFS businesses."""
 
@@ -113,31 +170,74 @@ class SIAQuery(EventBase):
 
 
 class Events(EventMaker):
-    """Container for app metrics event publishers."""
+    """Container for app metrics event publishers.
+
+    Publishing an event only queues it in a shared `EventBuffer`, which
+    publishes it from a background task, so publishing never delays the
+    caller.
+
+    Parameters
+    ----------
+    buffer
+        Buffer for events waiting to be published. A new buffer is created
+        if this is not given.
+    """
+
+    def __init__(self, buffer: EventBuffer | None = None) -> None:
+        self.buffer = buffer or EventBuffer()
+
+    async def aclose(self) -> None:
+        """Publish all queued events and stop publishing in the background."""
+        await self.buffer.aclose()
+
+    async def flush(self) -> None:
+        """Wait until every event queued so far has been published."""
+        await self.buffer.flush()
 
     @override
     async def initialize(self, manager: EventManager) -> None:
-        self.empty_loop = await manager.create_publisher(
-            "empty_loop", EmptyLoopExecution
+        create = self._create_publisher
+        self.empty_loop = await create(
+            manager, "empty_loop", EmptyLoopExecution
+        )
+        self.muster = await create(manager, "muster", MusterExecution)
+        self.load_stage = await create(manager, "load_stage", LoadStageChange)
+        self.capacity_probe = await create(
+            manager, "capacity_probe", CapacityProbeResult
+        )
+        self.event_loop_lag = await create(
+            manager, "event_loop_lag", EventLoopLag
+        )
+        self.slow_callbacks = await create(
+            manager, "slow_callbacks", SlowCallbacks
+        )
+        self.tap_query = await create(manager, "tap_query", TapQuery)
+        self.sia_query = await create(manager, "sia_query", SIAQuery)
+        self.git_lfs_check = await create(
+            manager, "git_lfs_check", GitLfsCheck
         )
-        self.muster = await manager.create_publisher("muster", MusterExecution)
-        self.tap_query = await manager.create_publisher("tap_query", TapQuery)
-        self.sia_query = await manager.create_publisher("sia_query", SIAQuery)
-        self.git_lfs_check = await manager.create_publisher(
-            "git_lfs_check", GitLfsCheck
+        self.notebook_execution = await create(
+            manager, "notebook_execution", NotebookExecution
         )
-        self.notebook_execution = await manager.create_publisher(
-            "notebook_execution", NotebookExecution
+        self.notebook_cell_execution = await create(
+            manager, "notebook_cell_execution", NotebookCellExecution
         )
-        self.notebook_cell_execution = await manager.create_publisher(
-            "notebook_cell_execution", NotebookCellExecution
+        self.nublado_python_execution = await create(
+            manager, "nublado_python_execution", NubladoPythonExecution
         )
-        self.nublado_python_execution = await manager.create_publisher(
-            "nublado_python_execution", NubladoPythonExecution
+        self.nublado_spawn_lab = await create(
+            manager, "nublado_spawn_lab", NubladoSpawnLab
         )
-        self.nublado_spawn_lab = await manager.create_publisher(
-            "nublado_spawn_lab", NubladoSpawnLab
+        self.nublado_delete_lab = await create(
+            manager, "nublado_delete_", NubladoDeleteLab
         )
-        self.nublado_delete_lab = await manager.create_publisher(
-            "nublado_delete_", NubladoDeleteLab
+        self.buffer.start()
+
+    async def _create_publisher[P: EventPayload](
+        self, manager: EventManager, name: str, payload: type[P]
+    ) -> BufferedPublisher[P]:
+        """Create a publisher that publishes through the buffer."""
+        publisher: EventPublisher[P] = await manager.create_publisher(
+            name, payload
         )
+        return BufferedPublisher(publisher, self.buffer)
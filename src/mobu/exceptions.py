@@ -14,6 +14,7 @@ from safir.slack.sentry import SentryEventInfo
 __all__ = [
     "ComparisonError",
     "FlockNotFoundError",
+    "FlockResizeError",
     "GitHubFileNotFoundError",
     "JupyterDeleteTimeoutError",
     "JupyterSpawnError",
@@ -24,9 +25,12 @@ __all__ = [
     "NotRetainingLogsError",
     "NotebookCellExecutionError",
     "NotebookRepositoryError",
+    "RangeNotSatisfiableError",
     "RepositoryConfigError",
     "SIAClientError",
     "ServiceDiscoveryError",
+    "SolitaryJobNotFoundError",
+    "SolitaryQueueFullError",
     "SubprocessError",
     "TAPClientError",
 ]
@@ -44,6 +48,17 @@ class FlockNotFoundError(ClientRequestError):
         super().__init__(msg, ErrorLocation.path, ["flock"])
 
 
+class FlockResizeError(ClientRequestError):
+    """The named flock has an explicit list of users and can't be resized."""
+
+    error = "flock_not_resizable"
+
+    def __init__(self, flock: str) -> None:
+        self.flock = flock
+        msg = f"Flock {flock} has an explicit list of users"
+        super().__init__(msg, ErrorLocation.body, ["count"])
+
+
 class MonkeyNotFoundError(ClientRequestError):
     """The named monkey was not found."""
 
@@ -67,6 +82,41 @@ class NotRetainingLogsError(ClientRequestError):
         super().__init__(msg)
 
 
+class RangeNotSatisfiableError(ClientRequestError):
+    """The requested range of a monkey log is not in the log."""
+
+    error = "range_not_satisfiable"
+    status_code = status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        msg = f"Requested range is not within the log of {size} bytes"
+        super().__init__(msg, ErrorLocation.header, ["Range"])
+
+
+class SolitaryJobNotFoundError(ClientRequestError):
+    """The solitary job was not found."""
+
+    error = "job_not_found"
+    status_code = status.HTTP_404_NOT_FOUND
+
+    def __init__(self, job: str) -> None:
+        self.job = job
+        msg = f"Solitary job {job} not found"
+        super().__init__(msg, ErrorLocation.path, ["job"])
+
+
+class SolitaryQueueFullError(ClientRequestError):
+    """Too many solitary jobs are already waiting to run."""
+
+    error = "job_queue_full"
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+
+    def __init__(self) -> None:
+        msg = "Too many solitary jobs are waiting to run"
+        super().__init__(msg)
+
+
 class NotebookRepositoryError(Exception):
     """The repository containing notebooks to run is not valid."""
 
@@ -12,10 +12,16 @@ from structlog.stdlib import BoundLogger
 from .dependencies.config import config_dependency
 from .events import Events
 from .models.solitary import SolitaryConfig
+from .services.event_loop import EventLoopMonitor
+from .services.jobs import SolitaryJobManager
+from .services.logstore import LogStore
+from .services.logwriter import LogWriter
 from .services.manager import FlockManager
 from .services.repo import RepoManager
 from .services.solitary import Solitary
+from .services.workers import WorkerPool
 from .storage.gafaelfawr import GafaelfawrStorage
+from .storage.token_cache import TokenCache
 
 __all__ = ["Factory", "ProcessContext"]
 
@@ -41,12 +47,26 @@ class ProcessContext:
         Shared HTTP client.
     gafaelfawr
         Shared Gafaelfawr client.
+    token_cache
+        Persistent cache of service tokens, if configured.
+    gafaelfawr_storage
+        Shared manager of service tokens for flocks and solitary jobs.
     manager
         Manager for all running flocks.
+    solitary_jobs
+        Manager for solitary monkeys running as background jobs.
     events
         Object with attributes for all metrics event publishers.
     repo_manager
         For efficiently cloning git repos.
+    worker_pool
+        Worker processes for CPU-bound work of the monkeys.
+    log_store
+        Local disk storage for the logs of the monkeys.
+    log_writer
+        Background writer for the logs of the monkeys.
+    event_loop_monitor
+        Monitor of the health of the event loop.
     """
 
     def __init__(
@@ -66,17 +86,46 @@ class ProcessContext:
             logger=self.logger,
             timeout=config.gafaelfawr_timeout,
         )
-        gafaelfawr_storage = GafaelfawrStorage(
-            config, self.gafaelfawr, self.logger
+        self.token_cache = None
+        if config.token_cache_path and config.token_cache_key:
+            self.token_cache = TokenCache(
+                config.token_cache_path,
+                config.token_cache_key.get_secret_value(),
+                self.logger,
+            )
+        self.gafaelfawr_storage = GafaelfawrStorage(
+            config, self.gafaelfawr, self.logger, self.token_cache
         )
         self.repo_manager = RepoManager(self.logger)
+        self.worker_pool = WorkerPool(config.worker_processes)
+        self.log_store = LogStore(
+            segment_size=config.monkey_log_segment_size,
+            max_size=config.monkey_log_max_size,
+            budget=config.monkey_log_budget,
+        )
+        self.log_writer = LogWriter(self.log_store)
+        self.event_loop_monitor = EventLoopMonitor(
+            events, self.logger, time_steps=config.slow_callback_tracking
+        )
         self.manager = FlockManager(
-            gafaelfawr_storage=gafaelfawr_storage,
+            gafaelfawr_storage=self.gafaelfawr_storage,
             discovery_client=self.discovery_client,
             http_client=self.http_client,
             logger=self.logger,
             repo_manager=self.repo_manager,
+            worker_pool=self.worker_pool,
+            log_writer=self.log_writer,
+            events=self.events,
+        )
+        self.solitary_jobs = SolitaryJobManager(
+            gafaelfawr_storage=self.gafaelfawr_storage,
+            discovery_client=self.discovery_client,
+            http_client=self.http_client,
             events=self.events,
+            repo_manager=self.repo_manager,
+            worker_pool=self.worker_pool,
+            log_writer=self.log_writer,
+            logger=self.logger,
         )
 
     async def aclose(self) -> None:
@@ -85,7 +134,14 @@ class ProcessContext:
         Called before shutdown to free resources.
         """
         await self.manager.aclose()
+        await self.solitary_jobs.aclose()
+        await self.gafaelfawr_storage.aclose()
+        await self.event_loop_monitor.aclose()
         self.repo_manager.close()
+        self.worker_pool.close()
+        await self.events.aclose()
+        await self.log_writer.aclose()
+        self.log_store.close()
 
 
 class Factory:
@@ -135,17 +191,16 @@ class Factory:
         Solitary
             Newly-created solitary manager.
         """
-        gafaelfawr_storage = GafaelfawrStorage(
-            self._config, self._context.gafaelfawr, self._logger
-        )
         return Solitary(
             solitary_config=solitary_config,
-            gafaelfawr_storage=gafaelfawr_storage,
+            gafaelfawr_storage=self._context.gafaelfawr_storage,
             discovery_client=self._context.discovery_client,
             http_client=self._context.http_client,
             events=self._context.events,
             repo_manager=self._context.repo_manager,
             logger=self._logger,
+            worker_pool=self._context.worker_pool,
+            log_writer=self._context.log_writer,
         )
 
     def set_logger(self, logger: BoundLogger) -> None:
@@ -1,29 +1,33 @@
 """Handlers for the app's external root, ``/mobu/``."""
 
 import json
-from collections.abc import Iterator
 from datetime import UTC, datetime
-from pathlib import Path
 from typing import Annotated, Any, override
 
-from fastapi import APIRouter, Depends, Response
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
 from safir.metadata import get_metadata
 from safir.models import ErrorModel
 from safir.slack.webhook import SlackRouteErrorHandler
 
 from mobu.config import Config
-from mobu.exceptions import NotRetainingLogsError
 
 from ..dependencies.config import config_dependency
 from ..dependencies.context import RequestContext, context_dependency
 from ..dependencies.github import maybe_ci_manager_dependency
-from ..models.flock import FlockConfig, FlockData, FlockSummary
+from ..models.flock import FlockConfig, FlockData, FlockSummary, FlockUpdate
 from ..models.index import Index
-from ..models.monkey import MonkeyData
-from ..models.solitary import SolitaryConfig, SolitaryResult
+from ..models.monkey import MonkeyData, MonkeyField, MonkeyState
+from ..models.solitary import SolitaryConfig, SolitaryJobData, SolitaryResult
 from ..models.summary import CombinedSummary
+from ..services.export import export_flock
 from ..services.github_ci.ci_manager import CiManager
+from ..services.logs import follow_log, parse_range
+from ..services.table import MonkeyPage, MonkeySelection
 
 external_router = APIRouter(route_class=SlackRouteErrorHandler)
 """FastAPI router for all external handlers."""
@@ -46,6 +50,120 @@ class FormattedJSONResponse(JSONResponse):
         ).encode()
 
 
+def _json_response_class(
+    *,
+    pretty: Annotated[
+        bool,
+        Query(
+            title="Format for humans",
+            description=(
+                "Indent the JSON response and sort its keys. This can also be"
+                " requested with an indent parameter in the Accept header,"
+                " such as application/json; indent=4."
+            ),
+        ),
+    ] = False,
+    request: Request,
+) -> type[JSONResponse]:
+    """Choose how to render a JSON response.
+
+    Responses are compact by default, since that uses the C implementation
+    of the JSON encoder and makes the response smaller. Only format the
+    response for humans if the client asks for it.
+    """
+    if pretty:
+        return FormattedJSONResponse
+    for media_range in request.headers.get("Accept", "").split(","):
+        for param in media_range.split(";")[1:]:
+            if param.split("=", 1)[0].strip().lower() == "indent":
+                return FormattedJSONResponse
+    return JSONResponse
+
+
+def _cache_headers(version: str) -> dict[str, str]:
+    """Build the headers for a response with the given version.
+
+    The entity tag is weak, since compact and formatted responses and
+    responses with a different selection of monkeys share the same version.
+    """
+    return {"Cache-Control": "no-cache", "ETag": f'W/"{version}"'}
+
+
+def _not_modified(request: Request, version: str) -> Response | None:
+    """Return a 304 response if the client already has this version.
+
+    Parameters
+    ----------
+    request
+        Incoming request, which may have an ``If-None-Match`` header.
+    version
+        Current version of the requested data.
+
+    Returns
+    -------
+    Response or None
+        A 304 response if the client has the current version, otherwise
+        `None`, in which case the full response should be sent.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return None
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    if "*" in tags or f'"{version}"' in tags:
+        return Response(status_code=304, headers=_cache_headers(version))
+    return None
+
+
+def _select_monkeys(
+    *,
+    state: Annotated[
+        list[MonkeyState] | None,
+        Query(
+            title="Monkey states",
+            description="Only include monkeys in one of these states",
+        ),
+    ] = None,
+    min_failures: Annotated[
+        int | None,
+        Query(
+            title="Minimum failures",
+            description=(
+                "Only include monkeys with at least this many failures"
+            ),
+            ge=1,
+        ),
+    ] = None,
+    cursor: Annotated[
+        int | None,
+        Query(
+            title="Pagination cursor",
+            description=(
+                "Cursor for the next page of monkeys, taken from the Link"
+                " header of the previous page"
+            ),
+            ge=0,
+        ),
+    ] = None,
+    limit: Annotated[
+        int | None,
+        Query(title="Maximum number of monkeys to return", ge=1),
+    ] = None,
+) -> MonkeySelection:
+    """Parse the query parameters that select a page of monkeys."""
+    return MonkeySelection(
+        states=state, min_failures=min_failures, cursor=cursor, limit=limit
+    )
+
+
+def _add_next_link(
+    response: Response, request: Request, page: MonkeyPage
+) -> None:
+    """Add a Link header for the next page of monkeys, if there is one."""
+    if page.next_cursor is not None:
+        url = request.url.include_query_params(cursor=page.next_cursor)
+        response.headers["Link"] = f'<{url!s}>; rel="next"'
+
+
 @external_router.get(
     "/",
     description=("Metadata about the running version of mobu"),
@@ -68,17 +186,15 @@ async def get_flocks(
 
 @external_router.put(
     "/flocks",
-    response_class=FormattedJSONResponse,
-    response_model_exclude_none=True,
-    response_model_exclude_unset=True,
+    response_model=FlockData,
     status_code=201,
     summary="Create a new flock",
 )
 async def put_flock(
     flock_config: FlockConfig,
-    response: Response,
     context: Annotated[RequestContext, Depends(context_dependency)],
-) -> FlockData:
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
     context.logger.info(
         "Creating flock",
         flock=flock_config.name,
@@ -86,23 +202,76 @@ async def put_flock(
     )
     flock = await context.manager.start_flock(flock_config)
     flock_url = context.request.url_for("get_flock", flock=flock.name)
-    response.headers["Location"] = str(flock_url)
-    return flock.dump()
+    return json_class(
+        flock.dump(), status_code=201, headers={"Location": str(flock_url)}
+    )
 
 
 @external_router.get(
     "/flocks/{flock}",
-    response_class=FormattedJSONResponse,
-    response_model_exclude_none=True,
-    response_model_exclude_unset=True,
-    responses={404: {"description": "Flock not found", "model": ErrorModel}},
+    description=(
+        "Monkeys can be filtered by state and failure count and returned a"
+        " page at a time. If there are more monkeys, the response has a Link"
+        " header with the URL of the next page. The fields returned for each"
+        " monkey can be limited with fields, in which case the monkey name is"
+        " always included. The response has an ETag header, and a request"
+        " with an If-None-Match header matching it returns 304 if no monkey"
+        " has changed."
+    ),
+    response_model=FlockData,
+    responses={
+        304: {"description": "Flock not changed"},
+        404: {"description": "Flock not found", "model": ErrorModel},
+    },
     summary="Status of flock",
 )
 async def get_flock(
     flock: str,
+    selection: Annotated[MonkeySelection, Depends(_select_monkeys)],
     context: Annotated[RequestContext, Depends(context_dependency)],
-) -> FlockData:
-    return context.manager.get_flock(flock).dump()
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+    fields: Annotated[
+        list[MonkeyField] | None,
+        Query(
+            title="Monkey fields",
+            description="Only include these fields for each monkey",
+        ),
+    ] = None,
+) -> Response:
+    running = context.manager.get_flock(flock)
+    version = running.version
+    if not_modified := _not_modified(context.request, version):
+        return not_modified
+    page = running.select_monkeys(selection)
+    response = json_class(
+        running.dump(page, fields), headers=_cache_headers(version)
+    )
+    _add_next_link(response, context.request, page)
+    return response
+
+
+@external_router.patch(
+    "/flocks/{flock}",
+    response_model=FlockData,
+    responses={
+        404: {"description": "Flock not found", "model": ErrorModel},
+        422: {"description": "Flock cannot be resized", "model": ErrorModel},
+    },
+    summary="Change a running flock",
+)
+async def patch_flock(
+    flock: str,
+    update: FlockUpdate,
+    context: Annotated[RequestContext, Depends(context_dependency)],
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    context.logger.info(
+        "Updating flock",
+        flock=flock,
+        update=update.model_dump(exclude_unset=True),
+    )
+    updated = await context.manager.update_flock(flock, update)
+    return json_class(updated.dump())
 
 
 @external_router.post(
@@ -135,22 +304,35 @@ async def delete_flock(
 
 @external_router.get(
     "/flocks/{flock}/monkeys",
-    response_class=FormattedJSONResponse,
+    description=(
+        "Without any query parameters, returns the names of all monkeys in"
+        " sorted order. Otherwise, returns the names of the selected monkeys"
+        " in the order they were started, a page at a time. If there are"
+        " more monkeys, the response has a Link header with the URL of the"
+        " next page."
+    ),
+    response_model=list[str],
     responses={404: {"description": "Flock not found", "model": ErrorModel}},
     summary="Monkeys in flock",
 )
 async def get_monkeys(
     flock: str,
+    selection: Annotated[MonkeySelection, Depends(_select_monkeys)],
     context: Annotated[RequestContext, Depends(context_dependency)],
-) -> list[str]:
-    return context.manager.get_flock(flock).list_monkeys()
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    running = context.manager.get_flock(flock)
+    if selection == MonkeySelection():
+        return json_class(running.list_monkeys())
+    page = running.select_monkeys(selection)
+    response = json_class([m.name for m in page.monkeys])
+    _add_next_link(response, context.request, page)
+    return response
 
 
 @external_router.get(
     "/flocks/{flock}/monkeys/{monkey}",
-    response_class=FormattedJSONResponse,
-    response_model_exclude_none=True,
-    response_model_exclude_unset=True,
+    response_model=MonkeyData,
     responses={
         404: {"description": "Monkey or flock not found", "model": ErrorModel}
     },
@@ -160,13 +342,20 @@ async def get_monkey(
     flock: str,
     monkey: str,
     context: Annotated[RequestContext, Depends(context_dependency)],
-) -> MonkeyData:
-    return context.manager.get_flock(flock).get_monkey(monkey).dump()
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    data = context.manager.get_flock(flock).get_monkey(monkey).dump()
+    return json_class(data)
 
 
 @external_router.get(
     "/flocks/{flock}/monkeys/{monkey}/log",
-    description="Returns the monkey log output as a file",
+    description=(
+        "Returns the monkey log output as a file. A single byte range may be"
+        " requested with a Range header, or only the last lines of the log"
+        " with tail. With follow, the log is streamed as it is written until"
+        " the monkey is stopped."
+    ),
     response_class=StreamingResponse,
     responses={
         404: {
@@ -176,58 +365,208 @@ async def get_monkey(
             ),
             "model": ErrorModel,
         },
+        416: {"description": "Range not satisfiable", "model": ErrorModel},
     },
     summary="Log for monkey",
 )
 def get_monkey_log(
     flock: str,
     monkey: str,
-    config: Annotated[Config, Depends(config_dependency)],
     context: Annotated[RequestContext, Depends(context_dependency)],
+    *,
+    tail: Annotated[
+        int | None,
+        Query(
+            title="Number of lines",
+            description="Only return this many lines from the end of the log",
+            ge=0,
+        ),
+    ] = None,
+    follow: Annotated[
+        bool,
+        Query(
+            title="Follow log",
+            description=(
+                "Keep streaming the log as it is written until the monkey is"
+                " stopped"
+            ),
+        ),
+    ] = False,
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
 ) -> StreamingResponse:
-    if not config.log_monkeys_to_file:
-        raise NotRetainingLogsError
-
-    logfile = context.manager.get_flock(flock).get_monkey(monkey).logfile()
+    running = context.manager.get_flock(flock).get_monkey(monkey)
+    log = running.log()
+    now = datetime.now(tz=UTC).isoformat(timespec="seconds")
+    filename = f"{flock}-{monkey}-{now}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
 
-    # We can't use FileResponse because the log file is constantly changing
-    # while it is being streamed back to the client, and Starlette commits to
-    # a length but doesn't stop sending the file at that length, resulting in
-    # an HTTP protocol error because the content is longer than the declared
-    # Content-Length. Instead use a StreamingResponse, but simulate a
-    # FileResponse by setting Content-Disposition.
+    # We can't use FileResponse because the log is constantly changing while
+    # it is being streamed back to the client and is stored in several
+    # files. Instead, only send as much of the log as was there when the
+    # request arrived, unless following it, and simulate a FileResponse by
+    # setting Content-Disposition.
     #
-    # Note that this is not async, so this handler must be sync so that
-    # FastAPI will run it in a thread pool.
-    def iterfile() -> Iterator[bytes]:
-        with Path(logfile).open("rb") as fh:
-            yield from fh
+    # Note that reading the log is not async, so this handler must be sync so
+    # that FastAPI will run it in a thread pool.
+    first, end = log.bounds()
+    start = first if tail is None else log.find_tail(tail, end)
+
+    if follow:
+
+        def is_done() -> bool:
+            return running.finished
+
+        # The gzip middleware doesn't compress followed logs, so ask NGINX not
+        # to buffer the response either.
+        headers["X-Accel-Buffering"] = "no"
+        return StreamingResponse(
+            follow_log(log, start, is_done),
+            media_type="text/plain",
+            headers=headers,
+        )
+
+    # Byte ranges are of the part of the log that is still stored.
+    status_code = 200
+    if tail is None:
+        headers["Accept-Ranges"] = "bytes"
+        size = end - first
+        byte_range = parse_range(range_header, size) if range_header else None
+        if byte_range:
+            first_byte, last_byte = byte_range
+            start = first + first_byte
+            end = first + last_byte + 1
+            status_code = 206
+            headers["Content-Range"] = f"bytes {first_byte}-{last_byte}/{size}"
+            headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        log.read(start, end),
+        status_code=status_code,
+        media_type="text/plain",
+        headers=headers,
+    )
 
+
+@external_router.get(
+    "/flocks/{flock}/export",
+    description=(
+        "Returns a tar file of the data for every monkey in the flock, as"
+        " JSON lines in monkeys.jsonl, and the log of every monkey if mobu is"
+        " configured to retain logs. The tar file is generated as it is"
+        " sent, and is compressed if the client accepts gzip encoding."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-tar": {}}},
+        404: {"description": "Flock not found", "model": ErrorModel},
+    },
+    summary="Export flock",
+)
+async def get_flock_export(
+    flock: str,
+    config: Annotated[Config, Depends(config_dependency)],
+    context: Annotated[RequestContext, Depends(context_dependency)],
+) -> StreamingResponse:
+    running = context.manager.get_flock(flock)
+    archive = export_flock(running, include_logs=config.log_monkeys_to_file)
     now = datetime.now(tz=UTC).isoformat(timespec="seconds")
-    filename = f"{flock}-{monkey}-{now}"
+    filename = f"{flock}-{now}.tar"
     return StreamingResponse(
-        iterfile(),
-        media_type="text/plain",
+        archive,
+        media_type="application/x-tar",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
+@external_router.get(
+    "/flocks/{flock}/records",
+    description=(
+        "Returns a gzipped CSV file with a row for every iteration and every"
+        " timed phase of an iteration run by the monkeys of the flock, for"
+        " analysis after a load test. Rows for whole iterations have an"
+        " empty phase. If the records of a flock grow too large, the oldest"
+        " are discarded."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/gzip": {}}},
+        404: {"description": "Flock not found", "model": ErrorModel},
+    },
+    summary="Run records of flock",
+)
+async def get_flock_records(
+    flock: str,
+    context: Annotated[RequestContext, Depends(context_dependency)],
+) -> StreamingResponse:
+    running = context.manager.get_flock(flock)
+    chunks = running.export_records()
+    now = datetime.now(tz=UTC).isoformat(timespec="seconds")
+    filename = f"{flock}-records-{now}.csv.gz"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Content-Length": str(sum(len(c) for c in chunks)),
+    }
+    return StreamingResponse(
+        iter(chunks), media_type="application/gzip", headers=headers
+    )
+
+
 @external_router.get(
     "/flocks/{flock}/summary",
-    response_class=FormattedJSONResponse,
-    responses={404: {"description": "Flock not found", "model": ErrorModel}},
+    description=(
+        "The response has an ETag header, and a request with an If-None-Match"
+        " header matching it returns 304 if the statistics have not changed."
+    ),
+    response_model=FlockSummary,
+    responses={
+        304: {"description": "Statistics not changed"},
+        404: {"description": "Flock not found", "model": ErrorModel},
+    },
     summary="Summary of statistics for a flock",
 )
 async def get_flock_summary(
     flock: str,
     context: Annotated[RequestContext, Depends(context_dependency)],
-) -> FlockSummary:
-    return context.manager.get_flock(flock).summary()
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    running = context.manager.get_flock(flock)
+    version = running.summary_version
+    if not_modified := _not_modified(context.request, version):
+        return not_modified
+    summary = running.summary().model_dump(mode="json")
+    return json_class(summary, headers=_cache_headers(version))
+
+
+@external_router.get(
+    "/flocks/{flock}/events",
+    description=(
+        "Returns a stream of server-sent events as the monkeys of the flock"
+        " change state (state), finish iterations (iteration), or fail with"
+        " an error (error). Events are buffered for each client, and a"
+        " dropped event reports the number of events a slow client missed."
+        " The stream ends when the flock is stopped."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        404: {"description": "Flock not found", "model": ErrorModel},
+    },
+    summary="Events for flock",
+)
+async def get_flock_events(
+    flock: str,
+    context: Annotated[RequestContext, Depends(context_dependency)],
+) -> StreamingResponse:
+    subscription = context.manager.get_flock(flock).subscribe()
+    return StreamingResponse(
+        subscription.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @external_router.post(
     "/run",
-    response_class=FormattedJSONResponse,
+    response_model=SolitaryResult,
     response_model_exclude_none=True,
     response_model_exclude_unset=True,
     summary="Run monkey business once",
@@ -235,18 +574,123 @@ async def get_flock_summary(
 async def put_run(
     solitary_config: SolitaryConfig,
     context: Annotated[RequestContext, Depends(context_dependency)],
-) -> SolitaryResult:
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
     context.logger.info(
         "Running solitary monkey",
         config=solitary_config.model_dump(exclude_unset=True),
     )
     solitary = context.factory.create_solitary(solitary_config)
-    return await solitary.run()
+    result = await solitary.run()
+    return json_class(
+        result.model_dump(mode="json", exclude_none=True, exclude_unset=True)
+    )
+
+
+@external_router.get(
+    "/jobs",
+    response_model=list[SolitaryJobData],
+    response_model_exclude_none=True,
+    summary="List solitary jobs",
+)
+async def get_jobs(
+    context: Annotated[RequestContext, Depends(context_dependency)],
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    jobs = context.solitary_jobs.list_jobs()
+    data = [j.model_dump(mode="json", exclude_none=True) for j in jobs]
+    return json_class(data)
+
+
+@external_router.post(
+    "/jobs",
+    description=(
+        "Queues the business to be run once by a solitary monkey and returns"
+        " immediately. Poll the URL in the Location header for the status of"
+        " the job, and retrieve its log from the log route."
+    ),
+    response_model=SolitaryJobData,
+    response_model_exclude_none=True,
+    responses={
+        429: {
+            "description": "Too many solitary jobs are waiting to run",
+            "model": ErrorModel,
+        }
+    },
+    status_code=202,
+    summary="Submit solitary job",
+)
+async def post_job(
+    solitary_config: SolitaryConfig,
+    context: Annotated[RequestContext, Depends(context_dependency)],
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    job = await context.solitary_jobs.submit(solitary_config)
+    context.logger.info(
+        "Submitted solitary job",
+        job=job.id,
+        config=solitary_config.model_dump(exclude_unset=True),
+    )
+    job_url = context.request.url_for("get_job", job=job.id)
+    return json_class(
+        job.dump().model_dump(mode="json", exclude_none=True),
+        status_code=202,
+        headers={"Location": str(job_url)},
+    )
+
+
+@external_router.get(
+    "/jobs/{job}",
+    response_model=SolitaryJobData,
+    response_model_exclude_none=True,
+    responses={404: {"description": "Job not found", "model": ErrorModel}},
+    summary="Status of solitary job",
+)
+async def get_job(
+    job: str,
+    context: Annotated[RequestContext, Depends(context_dependency)],
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    data = context.solitary_jobs.get_job(job).dump()
+    return json_class(data.model_dump(mode="json", exclude_none=True))
+
+
+@external_router.delete(
+    "/jobs/{job}",
+    responses={404: {"description": "Job not found", "model": ErrorModel}},
+    status_code=204,
+    summary="Stop and remove solitary job",
+)
+async def delete_job(
+    job: str,
+    context: Annotated[RequestContext, Depends(context_dependency)],
+) -> None:
+    context.logger.info("Deleting solitary job", job=job)
+    await context.solitary_jobs.delete_job(job)
+
+
+@external_router.get(
+    "/jobs/{job}/log",
+    description=(
+        "Returns the log of the solitary job so far. The log is complete once"
+        " the job has finished."
+    ),
+    response_class=PlainTextResponse,
+    responses={404: {"description": "Job not found", "model": ErrorModel}},
+    summary="Log for solitary job",
+)
+def get_job_log(
+    job: str,
+    context: Annotated[RequestContext, Depends(context_dependency)],
+) -> str:
+    # Reading the log is blocking file I/O, so let FastAPI run this in a
+    # thread rather than on the event loop.
+    return context.solitary_jobs.get_job(job).log()
 
 
 @external_router.get(
     "/summary",
-    response_class=FormattedJSONResponse,
+    response_model=CombinedSummary,
     summary="Summary of all app state",
 )
 async def get_summary(
@@ -254,8 +698,13 @@ async def get_summary(
     ci_manager: Annotated[
         CiManager | None, Depends(maybe_ci_manager_dependency)
     ],
-) -> CombinedSummary:
-    return CombinedSummary(
+    json_class: Annotated[type[JSONResponse], Depends(_json_response_class)],
+) -> Response:
+    summary = CombinedSummary(
         flocks=context.manager.summarize_flocks(),
         ci_manager=ci_manager.summarize() if ci_manager else None,
+        event_loop=context.event_loop_monitor.summary(),
+        log_writer=context.log_writer.summary(),
+        events=context.events.buffer.summary(),
     )
+    return json_class(summary.model_dump(mode="json"))
@@ -19,6 +19,7 @@ from safir.slack.webhook import SlackRouteErrorHandler
 from mobu.sentry import sentry_init
 
 from .asyncio import schedule_periodic
+from .constants import GZIP_MINIMUM_SIZE
 from .dependencies.config import config_dependency
 from .dependencies.context import context_dependency
 from .dependencies.github import ci_manager_dependency
@@ -28,6 +29,7 @@ from .handlers.github_refresh_app import (
     api_router as github_refresh_app_router,
 )
 from .handlers.internal import internal_router
+from .middleware import SelectiveGZipMiddleware
 from .status import post_status
 
 __all__ = ["create_app"]
@@ -146,6 +148,7 @@ def create_app(
 
     # Add middleware.
     app.add_middleware(XForwardedMiddleware)
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
 
     # Enable the generic exception handler for client errors.
     app.exception_handler(ClientRequestError)(client_request_error_handler)
@@ -0,0 +1,82 @@
+"""Middleware for the mobu application."""
+
+from __future__ import annotations
+
+import re
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+__all__ = ["SelectiveGZipMiddleware", "should_compress"]
+
+_EVENTS_PATH = re.compile(r"/flocks/[^/]+/events$")
+"""Path of the stream of events about a flock."""
+
+_LOG_PATH = re.compile(r"/flocks/[^/]+/monkeys/[^/]+/log$")
+"""Path of the log of a monkey."""
+
+_RECORDS_PATH = re.compile(r"/flocks/[^/]+/records$")
+"""Path of the gzipped run records of a flock."""
+
+_TRUE_VALUES = {"1", "on", "t", "true", "y", "yes"}
+"""Query parameter values that FastAPI parses as true."""
+
+
+def should_compress(request: Request) -> bool:
+    """Return whether the response to a request may be compressed.
+
+    Some responses must be sent as is:
+
+    - Streams that are sent as they are generated, such as the events of a
+      flock and a followed monkey log. Compression would hold back data
+      until enough had been written to fill a compressed block.
+    - Byte ranges of a monkey log, which are ranges of the uncompressed log.
+    - Run records, which are already gzipped.
+
+    Parameters
+    ----------
+    request
+        Incoming request.
+
+    Returns
+    -------
+    bool
+        Whether the response may be compressed.
+    """
+    path = request.url.path
+    if _EVENTS_PATH.search(path) or _RECORDS_PATH.search(path):
+        return False
+    if _LOG_PATH.search(path):
+        follow = request.query_params.get("follow", "").lower()
+        return follow not in _TRUE_VALUES and "range" not in request.headers
+    return True
+
+
+class SelectiveGZipMiddleware:
+    """Compress responses with gzip, except for routes that can't be.
+
+    Which routes are left alone is decided from the request by
+    `should_compress`, so that those routes are excluded in one place
+    rather than by each handler setting a ``Content-Encoding`` header that
+    doesn't describe its response.
+
+    Parameters
+    ----------
+    app
+        Application to wrap.
+    minimum_size
+        Responses smaller than this many bytes are not compressed.
+    """
+
+    def __init__(self, app: ASGIApp, *, minimum_size: int) -> None:
+        self._app = app
+        self._gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] == "http" and not should_compress(Request(scope)):
+            await self._app(scope, receive, send)
+        else:
+            await self._gzip(scope, receive, send)
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from typing import Any
 
 from pydantic import BaseModel, ConfigDict, Field
 from safir.logging import LogLevel
@@ -12,6 +13,7 @@ __all__ = [
     "BusinessConfig",
     "BusinessData",
     "BusinessOptions",
+    "IterationTiming",
 ]
 
 
@@ -26,6 +28,20 @@ class BusinessOptions(BaseModel):
         examples=[600],
     )
 
+    expected_interval: HumanTimedelta | None = Field(
+        None,
+        title="Expected interval between iterations",
+        description=(
+            "How often a monkey running in a closed loop is expected to"
+            " start an iteration. If set, iteration latencies are corrected"
+            " for coordinated omission by also recording the latencies of"
+            " the iterations that a slower iteration kept from starting on"
+            " schedule. Ignored for flocks with an arrival rate, whose"
+            " latencies are measured from the scheduled start."
+        ),
+        examples=[120],
+    )
+
     idle_time: HumanTimedelta = Field(
         timedelta(minutes=1),
         title="How long to wait between business executions",
@@ -63,6 +79,50 @@ class BusinessConfig(BaseModel):
         False, title="Restart business after failure", examples=[True]
     )
 
+    def update_options(self, changes: dict[str, Any]) -> None:
+        """Change options of the business in place.
+
+        The options object is shared by every monkey running this business,
+        so the changes apply to all of them. The options are marked as set
+        so that the changes are included when the configuration is
+        serialized without unset fields.
+
+        Parameters
+        ----------
+        changes
+            New values of options, keyed by option name.
+        """
+        for field, value in changes.items():
+            setattr(self.options, field, value)
+        self.model_fields_set.add("options")
+
+
+class IterationTiming(BaseModel):
+    """Timing of one iteration of a business, broken down by phase."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    success: bool = Field(..., title="Whether the iteration succeeded")
+
+    duration: float | None = Field(
+        ...,
+        title="Duration in seconds",
+        description="Null if the business failed during startup",
+        examples=[52.4],
+    )
+
+    phases: dict[str, float] = Field(
+        ...,
+        title="Time spent in each phase in seconds",
+        description=(
+            "Keyed by the name of the phase, such as spawn_lab or"
+            " execute_cell. Phases that ran more than once in the iteration"
+            " are the total time spent in that phase. Phases that ran"
+            " during startup are included in the first iteration."
+        ),
+        examples=[{"spawn_lab": 41.2, "execute_cell": 8.5}],
+    )
+
 
 class BusinessData(BaseModel):
     """Status of a running business.
@@ -82,3 +142,11 @@ class BusinessData(BaseModel):
     refreshing: bool = Field(
         ..., title="If the business is currently in the process of refreshing"
     )
+
+    recent_iterations: list[IterationTiming] = Field(
+        [],
+        title="Timings of recent iterations",
+        description=(
+            "Phase timings of the most recent iterations, oldest first"
+        ),
+    )
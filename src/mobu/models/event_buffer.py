@@ -0,0 +1,45 @@
+"""Models for the buffer of metrics events."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+__all__ = ["EventBufferSummary"]
+
+
+class EventBufferSummary(BaseModel):
+    """Statistics about the buffer of metrics events.
+
+    Events are published in the background so that slow publishing does not
+    add to the time of the iterations being measured. A growing number of
+    dropped events means that events are published more slowly than the
+    monkeys generate them.
+    """
+
+    queued: int = Field(
+        ..., title="Events waiting to be published", examples=[3]
+    )
+
+    published: int = Field(
+        ..., title="Events published since mobu started", examples=[51312]
+    )
+
+    dropped: int = Field(
+        ...,
+        title="Events dropped since mobu started",
+        description="Events dropped because too many were waiting",
+        examples=[0],
+    )
+
+    failed: int = Field(
+        ...,
+        title="Events that could not be published since mobu started",
+        examples=[0],
+    )
+
+    batches: int = Field(
+        ...,
+        title="Batches published since mobu started",
+        description="The events in each batch are published concurrently",
+        examples=[20480],
+    )
@@ -0,0 +1,76 @@
+"""Models for the health of mobu's own event loop."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+from .latency import LatencySummary
+
+__all__ = ["EventLoopSummary", "SlowCallbackSummary"]
+
+
+class SlowCallbackSummary(BaseModel):
+    """Slow event loop callbacks run on behalf of one business."""
+
+    flock: str | None = Field(
+        None,
+        title="Flock running the business",
+        description="Will be null for solitary monkeys and non-monkey work",
+        examples=["autostart"],
+    )
+
+    business: str | None = Field(
+        None,
+        title="Name of the business",
+        description="Will be null for work not done by any monkey",
+        examples=["NotebookRunnerCounting"],
+    )
+
+    count: int = Field(..., title="Number of slow callbacks", examples=[3])
+
+    duration: float = Field(
+        ...,
+        title="Total duration of slow callbacks in seconds",
+        examples=[0.84],
+    )
+
+    max: float = Field(
+        ..., title="Longest slow callback in seconds", examples=[0.41]
+    )
+
+
+class EventLoopSummary(BaseModel):
+    """Health of the event loop that runs all the monkeys.
+
+    Latencies measured by monkeys include any time spent waiting for the
+    event loop, so high lag or many slow callbacks mean that those latencies
+    overstate the latency of the services being tested.
+    """
+
+    lag: LatencySummary = Field(
+        ...,
+        title="Event loop lag",
+        description=(
+            "How much later than scheduled a periodic timer woke up, sampled"
+            " since mobu started"
+        ),
+    )
+
+    slow_callback_threshold: float | None = Field(
+        None,
+        title="Slow callback threshold in seconds",
+        description=(
+            "Callbacks that run at least this long are counted. Only present"
+            " if slow callbacks are tracked."
+        ),
+        examples=[0.1],
+    )
+
+    slow_callbacks: list[SlowCallbackSummary] = Field(
+        ...,
+        title="Slow callbacks since mobu started",
+        description=(
+            "Grouped by the flock and business that ran them. Always empty"
+            " unless slow callbacks are tracked."
+        ),
+    )
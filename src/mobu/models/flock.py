@@ -1,16 +1,131 @@
 """Models for a collection of monkeys."""
 
 from datetime import datetime
+from enum import Enum
 from typing import Self
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from safir.pydantic import HumanTimedelta
 
 from .business.business_config_type import BusinessConfigType
+from .latency import FlockLatencySummary, LatencySummary, RecentPhaseSummary
 from .monkey import MonkeyData
+from .probe import CapacityProbeConfig, CapacityProbeSummary
 from .user import User, UserSpec
 
-__all__ = ["FlockConfig", "FlockData", "FlockSummary"]
+__all__ = [
+    "ArrivalDistribution",
+    "ArrivalRateConfig",
+    "ArrivalSummary",
+    "CpuSummary",
+    "FlockConfig",
+    "FlockData",
+    "FlockSummary",
+    "FlockUpdate",
+    "LoadStage",
+    "LoadStageSummary",
+    "LoadStageType",
+    "OutcomeWindowSummary",
+]
+
+
+class ArrivalDistribution(Enum):
+    """Distribution of the gaps between iterations in an open-loop flock."""
+
+    CONSTANT = "constant"
+    POISSON = "poisson"
+
+
+class ArrivalRateConfig(BaseModel):
+    """Configuration for driving a flock at a target arrival rate.
+
+    Normally each monkey runs its business in a closed loop: it executes,
+    idles, and executes again, so the load offered to the service drops
+    whenever the service slows down. With an arrival rate, the flock instead
+    hands iterations to idle monkeys on a fixed schedule, independent of how
+    long previous iterations took.
+    """
+
+    rate: float = Field(
+        ...,
+        title="Target iterations per second",
+        description=(
+            "The total number of business iterations to start per second,"
+            " split evenly among all replicas of this Mobu StatefulSet."
+        ),
+        gt=0,
+        examples=[2.5],
+    )
+
+    distribution: ArrivalDistribution = Field(
+        ArrivalDistribution.CONSTANT,
+        title="Arrival distribution",
+        description=(
+            "Whether iterations start at constant intervals or as a Poisson"
+            " process with exponentially-distributed gaps averaging the same"
+            " rate."
+        ),
+        examples=[ArrivalDistribution.POISSON],
+    )
+
+
+class LoadStageType(Enum):
+    """Type of a stage of a flock load profile."""
+
+    RAMP = "ramp"
+    STEP = "step"
+    HOLD = "hold"
+
+
+class LoadStage(BaseModel):
+    """One stage of a flock load profile.
+
+    A ``ramp`` stage changes the load linearly from its value at the start of
+    the stage to the target over the duration of the stage, which may be
+    either a ramp up or a ramp down. A ``step`` stage changes the load to the
+    target immediately and then holds it for the duration. A ``hold`` stage
+    leaves the load unchanged for the duration.
+    """
+
+    type: LoadStageType = Field(
+        ..., title="Type of stage", examples=[LoadStageType.RAMP]
+    )
+
+    duration: HumanTimedelta = Field(
+        ..., title="Duration of the stage", examples=["1h"]
+    )
+
+    count: int | None = Field(
+        None,
+        title="Target number of monkeys",
+        description=(
+            "The total number of monkeys to run across all replicas at the"
+            " end of the stage. Only valid for flocks whose users are"
+            " generated from user_spec."
+        ),
+        ge=1,
+        examples=[500],
+    )
+
+    rate: float | None = Field(
+        None,
+        title="Target iterations per second",
+        description=(
+            "The total arrival rate across all replicas at the end of the"
+            " stage. Only valid for flocks with an arrival rate."
+        ),
+        gt=0,
+        examples=[10.0],
+    )
+
+    @model_validator(mode="after")
+    def _validate(self) -> Self:
+        has_target = self.count is not None or self.rate is not None
+        if self.type == LoadStageType.HOLD and has_target:
+            raise ValueError("hold stages cannot have a count or rate")
+        if self.type != LoadStageType.HOLD and not has_target:
+            raise ValueError(f"{self.type.value} stages need a count or rate")
+        return self
 
 
 class FlockConfig(BaseModel):
@@ -55,6 +170,39 @@ class FlockConfig(BaseModel):
         ),
     )
 
+    arrival_rate: ArrivalRateConfig | None = Field(
+        None,
+        title="Open-loop arrival rate",
+        description=(
+            "If set, run the flock open-loop: rather than each monkey"
+            " repeating its business after idle_time, the flock starts"
+            " iterations on idle monkeys at this rate. Iterations that come"
+            " due while every monkey is busy are counted as missed."
+        ),
+    )
+
+    load_profile: list[LoadStage] | None = Field(
+        None,
+        title="Load profile",
+        description=(
+            "Stages to run through in order after the flock has started,"
+            " changing the number of monkeys or the arrival rate over time."
+            " The flock starts with count monkeys and keeps the load of the"
+            " last stage after the profile is finished."
+        ),
+    )
+
+    capacity_probe: CapacityProbeConfig | None = Field(
+        None,
+        title="Capacity search",
+        description=(
+            "If set, raise the load of the flock step by step, starting from"
+            " count monkeys, until a step breaks the given objectives, then"
+            " back off to the highest load that met them. Cannot be combined"
+            " with load_profile."
+        ),
+    )
+
     users: list[User] | None = Field(
         None,
         title="Explicit list of users to run as",
@@ -96,6 +244,67 @@ class FlockConfig(BaseModel):
             )
         return self
 
+    @model_validator(mode="after")
+    def _validate_load_changes(self) -> Self:
+        for stage in self.load_profile or []:
+            if stage.count is not None and self.users:
+                raise ValueError("load_profile counts require user_spec")
+            if stage.rate is not None and not self.arrival_rate:
+                raise ValueError("load_profile rates require arrival_rate")
+        if probe := self.capacity_probe:
+            if self.load_profile:
+                raise ValueError("both capacity_probe and load_profile given")
+            if probe.step_count is not None and self.users:
+                raise ValueError(
+                    "capacity_probe step_count requires user_spec"
+                )
+            if probe.step_rate is not None and not self.arrival_rate:
+                msg = "capacity_probe step_rate requires arrival_rate"
+                raise ValueError(msg)
+        return self
+
+
+class FlockUpdate(BaseModel):
+    """Changes to make to a running flock.
+
+    Any field that is not given is left unchanged. Changing the count only
+    starts or stops the monkeys in the difference, and the remaining monkeys
+    keep running undisturbed.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    count: int | None = Field(
+        None,
+        title="How many monkeys to run",
+        description=(
+            "The new total number of monkeys to run across all replicas."
+            " Only flocks whose users are generated from user_spec can be"
+            " resized. New monkeys are started in batches according to the"
+            " start_batch_size and start_batch_wait of the flock."
+        ),
+        ge=1,
+        examples=[400],
+    )
+
+    idle_time: HumanTimedelta | None = Field(
+        None,
+        title="How long to wait between business executions",
+        description=(
+            "Takes effect for every monkey starting with its next idle period."
+        ),
+        examples=[60],
+    )
+
+    error_idle_time: HumanTimedelta | None = Field(
+        None,
+        title="How long to wait after an error before restarting",
+        description=(
+            "Takes effect for every monkey starting with its next error."
+        ),
+        examples=[600],
+    )
+
 
 class FlockData(BaseModel):
     """Information about a running flock."""
@@ -107,6 +316,100 @@ class FlockData(BaseModel):
     monkeys: list[MonkeyData] = Field(..., title="Monkeys of the flock")
 
 
+class ArrivalSummary(BaseModel):
+    """Statistics about the arrival schedule of an open-loop flock."""
+
+    rate: float = Field(
+        ...,
+        title="Target iterations per second for this replica",
+        examples=[2.5],
+    )
+
+    dispatched_count: int = Field(
+        ...,
+        title="Iterations handed to an idle monkey",
+        examples=[1520],
+    )
+
+    missed_count: int = Field(
+        ...,
+        title="Iterations missed because every monkey was busy",
+        examples=[12],
+    )
+
+
+class CpuSummary(BaseModel):
+    """Event loop time used by the monkeys of a flock."""
+
+    seconds: float = Field(
+        ...,
+        title="Event loop seconds",
+        description=(
+            "Total time the event loop spent running tasks of the flock's"
+            " monkeys"
+        ),
+        examples=[183.2],
+    )
+
+    per_iteration: float | None = Field(
+        ...,
+        title="Event loop seconds per iteration",
+        description="Will be null if no iterations have finished",
+        examples=[0.39],
+    )
+
+
+class OutcomeWindowSummary(BaseModel):
+    """Outcomes of the iterations of a flock over a recent window of time."""
+
+    window: float = Field(
+        ..., title="Length of the window in seconds", examples=[60]
+    )
+
+    success_count: int = Field(
+        ..., title="Successes during the window", examples=[58]
+    )
+
+    failure_count: int = Field(
+        ..., title="Failures during the window", examples=[2]
+    )
+
+    success_rate: float | None = Field(
+        ...,
+        title="Fraction of iterations that succeeded",
+        description="Will be null if no iterations finished in the window",
+        examples=[0.967],
+    )
+
+    iteration_rate: float = Field(
+        ...,
+        title="Iterations per second",
+        description=(
+            "Finished iterations divided by the part of the window during"
+            " which the flock was running"
+        ),
+        examples=[1.0],
+    )
+
+
+class LoadStageSummary(BaseModel):
+    """Status of a stage of a flock load profile that has started."""
+
+    stage: LoadStage = Field(..., title="Configuration of the stage")
+
+    start_time: datetime = Field(
+        ...,
+        title="When the stage started",
+        examples=["2021-07-21T19:43:40.446072+00:00"],
+    )
+
+    iteration: LatencySummary = Field(
+        ...,
+        title="Latency of successful business iterations during the stage",
+        description="Corrected for coordinated omission",
+    )
+
+
 class FlockSummary(BaseModel):
     """Summary statistics about a running flock."""
 
@@ -136,3 +439,54 @@ class FlockSummary(BaseModel):
     failure_count: int = Field(
         ..., title="Total number of monkey failures in flock", examples=[4]
     )
+
+    recent: list[OutcomeWindowSummary] = Field(
+        [],
+        title="Recent outcomes",
+        description=(
+            "Success and iteration rates over the last minute, five minutes,"
+            " and hour"
+        ),
+    )
+
+    arrival: ArrivalSummary | None = Field(
+        None,
+        title="Arrival statistics",
+        description="Only present if the flock has an arrival rate",
+    )
+
+    latency: FlockLatencySummary | None = Field(
+        None,
+        title="Latency statistics",
+        description="Latency percentiles for iterations and their phases",
+    )
+
+    recent_phases: dict[str, RecentPhaseSummary] = Field(
+        {},
+        title="Recent phase timings",
+        description=(
+            "Time spent in each phase over the most recent iterations of each"
+            " monkey, keyed by the name of the phase"
+        ),
+    )
+
+    stages: list[LoadStageSummary] | None = Field(
+        None,
+        title="Load profile stages",
+        description=(
+            "Stages of the load profile that have started so far, in order."
+            " Only present if the flock has a load profile."
+        ),
+    )
+
+    probe: CapacityProbeSummary | None = Field(
+        None,
+        title="Capacity search",
+        description="Only present if the flock is searching for capacity",
+    )
+
+    cpu: CpuSummary | None = Field(
+        None,
+        title="Event loop time",
+        description="Only present if CPU accounting is enabled",
+    )
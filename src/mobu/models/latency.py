@@ -0,0 +1,89 @@
+"""Models for latency statistics."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+__all__ = ["FlockLatencySummary", "LatencySummary", "RecentPhaseSummary"]
+
+
+class LatencySummary(BaseModel):
+    """Percentiles of a latency distribution.
+
+    All latencies are in seconds and are accurate to within 1% of the true
+    value. They will be null if no latencies have been recorded yet.
+    """
+
+    count: int = Field(
+        ..., title="Number of recorded latencies", examples=[54]
+    )
+
+    p50: float | None = Field(
+        ..., title="Median latency in seconds", examples=[1.52]
+    )
+
+    p90: float | None = Field(
+        ..., title="90th percentile latency in seconds", examples=[3.8]
+    )
+
+    p99: float | None = Field(
+        ..., title="99th percentile latency in seconds", examples=[12.1]
+    )
+
+    max: float | None = Field(
+        ..., title="Maximum latency in seconds", examples=[15.003]
+    )
+
+
+class FlockLatencySummary(BaseModel):
+    """Latency statistics for all the monkeys in a flock."""
+
+    iteration: LatencySummary = Field(
+        ...,
+        title="Latency of successful business iterations",
+        description=(
+            "Corrected for coordinated omission. For open-loop flocks, each"
+            " latency is measured from the time the iteration was scheduled"
+            " to start rather than when a monkey actually started it. For"
+            " other flocks, iterations that took longer than idle_time also"
+            " record the latencies of the iterations that would have started"
+            " in the meantime."
+        ),
+    )
+
+    phases: dict[str, LatencySummary] = Field(
+        ...,
+        title="Latency of successful phases of business iterations",
+        description=(
+            "Keyed by the name of the phase, such as spawn_lab or"
+            " execute_cell. Not corrected for coordinated omission."
+        ),
+    )
+
+
+class RecentPhaseSummary(BaseModel):
+    """Timing of a phase over the recent iterations of a flock.
+
+    Only the most recent iterations of each monkey are included, so this
+    shows how long the phase takes now rather than since the flock started.
+    """
+
+    count: int = Field(
+        ...,
+        title="Number of recent iterations that ran the phase",
+        examples=[40],
+    )
+
+    mean: float = Field(
+        ...,
+        title="Mean time spent in the phase in seconds",
+        description="Per iteration, counting all runs in an iteration",
+        examples=[41.7],
+    )
+
+    max: float = Field(
+        ...,
+        title="Maximum time spent in the phase in seconds",
+        description="Per iteration, counting all runs in an iteration",
+        examples=[243.1],
+    )
@@ -0,0 +1,55 @@
+"""Models for the writer of monkey logs."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+__all__ = ["LogWriterSummary"]
+
+
+class LogWriterSummary(BaseModel):
+    """Statistics about the background writer of monkey logs.
+
+    Messages are dropped if the writer falls too far behind, so a growing
+    number of dropped messages means that the disk used for logs is too slow
+    for the amount of logging.
+    """
+
+    queued: int = Field(
+        ..., title="Messages waiting to be written", examples=[12]
+    )
+
+    buffered: int = Field(
+        ...,
+        title="Size of waiting messages",
+        description="Total length of the waiting messages in characters",
+        examples=[2048],
+    )
+
+    written: int = Field(
+        ..., title="Messages written since mobu started", examples=[84301]
+    )
+
+    dropped: int = Field(
+        ...,
+        title="Messages dropped since mobu started",
+        description=(
+            "Messages dropped because too many were waiting to be written, or"
+            " because writing them failed"
+        ),
+        examples=[0],
+    )
+
+    disk_usage: int = Field(
+        ...,
+        title="Disk space used by logs",
+        description="Total size in bytes of the logs of all monkeys on disk",
+        examples=[104857600],
+    )
+
+    batches: int = Field(
+        ...,
+        title="Batches written since mobu started",
+        description="Each batch writes all waiting messages at once",
+        examples=[5120],
+    )
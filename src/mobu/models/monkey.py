@@ -11,7 +11,7 @@ from .business.siaquerysetrunner import SIABusinessData
 from .business.tap import TAPBusinessData
 from .user import AuthenticatedUser
 
-__all__ = ["MonkeyData", "MonkeyState"]
+__all__ = ["MonkeyData", "MonkeyField", "MonkeyState"]
 
 
 class MonkeyState(Enum):
@@ -24,6 +24,15 @@ class MonkeyState(Enum):
     ERROR = "ERROR"
 
 
+class MonkeyField(Enum):
+    """Top-level field of the data for a monkey, used to select fields."""
+
+    NAME = "name"
+    STATE = "state"
+    USER = "user"
+    BUSINESS = "business"
+
+
 class MonkeyData(BaseModel):
     """Data for a running monkey."""
 
@@ -0,0 +1,179 @@
+"""Models for searching for the capacity of a service."""
+
+from __future__ import annotations
+
+from typing import Self
+
+from pydantic import BaseModel, Field, model_validator
+from safir.pydantic import HumanTimedelta
+
+__all__ = [
+    "CapacityProbeConfig",
+    "CapacityProbeStep",
+    "CapacityProbeSummary",
+]
+
+
+class CapacityProbeConfig(BaseModel):
+    """Configuration for searching for the highest sustainable load.
+
+    The flock starts at its configured load and measures it for one step.
+    If the service meets its service level objectives, the load is raised by
+    one step and measured again. When a step breaks an objective, the flock
+    backs off to the highest load that met them and the search stops.
+    """
+
+    step_count: int | None = Field(
+        None,
+        title="Monkeys to add at each step",
+        description=(
+            "The total number of monkeys to add across all replicas at each"
+            " step. Only valid for flocks whose users are generated from"
+            " user_spec. Specify either this or step_rate but not both."
+        ),
+        ge=1,
+        examples=[25],
+    )
+
+    step_rate: float | None = Field(
+        None,
+        title="Iterations per second to add at each step",
+        description=(
+            "The total arrival rate to add across all replicas at each step."
+            " Only valid for flocks with an arrival rate. Specify either this"
+            " or step_count but not both."
+        ),
+        gt=0,
+        examples=[0.5],
+    )
+
+    step_duration: HumanTimedelta = Field(
+        ...,
+        title="How long to measure each step",
+        description=(
+            "Should be long enough for monkeys started at the beginning of"
+            " the step to finish several iterations."
+        ),
+        examples=["10m"],
+    )
+
+    max_count: int | None = Field(
+        None,
+        title="Maximum number of monkeys",
+        description="Stop the search once this many monkeys are running",
+        ge=1,
+        examples=[500],
+    )
+
+    max_rate: float | None = Field(
+        None,
+        title="Maximum iterations per second",
+        description="Stop the search once the arrival rate reaches this",
+        gt=0,
+        examples=[20.0],
+    )
+
+    latency_percentile: float = Field(
+        95,
+        title="Latency percentile",
+        description="Percentile of iteration latency compared to max_latency",
+        gt=0,
+        le=100,
+        examples=[99],
+    )
+
+    max_latency: HumanTimedelta | None = Field(
+        None,
+        title="Maximum iteration latency",
+        description=(
+            "A step breaks the objectives if the latency_percentile latency"
+            " of successful iterations during that step is longer than this"
+        ),
+        examples=["10s"],
+    )
+
+    min_success_rate: float | None = Field(
+        None,
+        title="Minimum success rate",
+        description=(
+            "A step breaks the objectives if the fraction of iterations"
+            " during that step that succeeded is lower than this"
+        ),
+        ge=0,
+        le=1,
+        examples=[0.99],
+    )
+
+    @model_validator(mode="after")
+    def _validate(self) -> Self:
+        if (self.step_count is None) == (self.step_rate is None):
+            raise ValueError("exactly one of step_count or step_rate required")
+        if self.max_latency is None and self.min_success_rate is None:
+            raise ValueError("max_latency or min_success_rate required")
+        return self
+
+
+class CapacityProbeStep(BaseModel):
+    """Measurements of one step of a capacity search."""
+
+    count: int = Field(
+        ..., title="Total number of monkeys during the step", examples=[150]
+    )
+
+    rate: float | None = Field(
+        None,
+        title="Total iterations per second during the step",
+        description="Only present if the flock has an arrival rate",
+        examples=[2.5],
+    )
+
+    latency: float | None = Field(
+        ...,
+        title="Iteration latency in seconds at the configured percentile",
+        description="Will be null if no iterations succeeded during the step",
+        examples=[8.2],
+    )
+
+    success_rate: float | None = Field(
+        ...,
+        title="Fraction of iterations that succeeded",
+        description="Will be null if no iterations finished during the step",
+        examples=[0.995],
+    )
+
+    passed: bool = Field(
+        ..., title="Whether the step met the objectives", examples=[True]
+    )
+
+
+class CapacityProbeSummary(BaseModel):
+    """Progress and result of a capacity search."""
+
+    finished: bool = Field(
+        ..., title="Whether the search has finished", examples=[True]
+    )
+
+    sustainable_count: int | None = Field(
+        None,
+        title="Highest sustainable number of monkeys",
+        description=(
+            "Total number of monkeys during the last step that met the"
+            " objectives. Will be null if no step has met them yet."
+        ),
+        examples=[375],
+    )
+
+    sustainable_rate: float | None = Field(
+        None,
+        title="Highest sustainable iterations per second",
+        description=(
+            "Total arrival rate during the last step that met the"
+            " objectives. Only present if the flock has an arrival rate and"
+            " a step has met them."
+        ),
+        examples=[7.5],
+    )
+
+    steps: list[CapacityProbeStep] = Field(
+        ..., title="Steps measured so far, in order"
+    )
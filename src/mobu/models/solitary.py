@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+from datetime import datetime
+from enum import Enum
+
 from pydantic import BaseModel, Field
 
 from .business.business_config_type import BusinessConfigType
 from .user import User
 
-__all__ = ["SolitaryConfig", "SolitaryResult"]
+__all__ = [
+    "SolitaryConfig",
+    "SolitaryJobData",
+    "SolitaryJobState",
+    "SolitaryResult",
+]
 
 
 class SolitaryConfig(BaseModel):
@@ -39,3 +47,46 @@ class SolitaryResult(BaseModel):
     error: str | None = Field(None, title="Error if the business failed")
 
     log: str = Field(..., title="Log of the business execution")
+
+
+class SolitaryJobState(Enum):
+    """State of a solitary job."""
+
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    FINISHED = "FINISHED"
+
+
+class SolitaryJobData(BaseModel):
+    """Status of a solitary job.
+
+    The log of the job is retrieved separately, since it may be large.
+    """
+
+    id: str = Field(..., title="Identifier of the job")
+
+    state: SolitaryJobState = Field(
+        ..., title="State of the job", examples=[SolitaryJobState.RUNNING]
+    )
+
+    username: str = Field(..., title="User the job runs as")
+
+    business: str = Field(
+        ..., title="Type of business", examples=["NotebookRunnerList"]
+    )
+
+    submit_time: datetime = Field(..., title="When the job was submitted")
+
+    start_time: datetime | None = Field(
+        None, title="When the job started running"
+    )
+
+    end_time: datetime | None = Field(None, title="When the job finished")
+
+    success: bool | None = Field(
+        None,
+        title="Whether the business succeeded",
+        description="Only set once the job has finished",
+    )
+
+    error: str | None = Field(None, title="Error if the business failed")
@@ -3,7 +3,10 @@
 from pydantic import BaseModel, Field
 
 from .ci_manager import CiManagerSummary
+from .event_buffer import EventBufferSummary
+from .event_loop import EventLoopSummary
 from .flock import FlockSummary
+from .log_writer import LogWriterSummary
 
 __all__ = ["CombinedSummary"]
 
@@ -17,3 +20,12 @@ class CombinedSummary(BaseModel):
     ci_manager: CiManagerSummary | None = Field(
         None, title="Info about GitHub CI workers"
     )
+    event_loop: EventLoopSummary | None = Field(
+        None, title="Health of the event loop running the monkeys"
+    )
+    log_writer: LogWriterSummary | None = Field(
+        None, title="Health of the writer of monkey logs"
+    )
+    events: EventBufferSummary | None = Field(
+        None, title="Health of the publisher of metrics events"
+    )
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 __all__ = [
     "AuthenticatedUser",
+    "CachedToken",
     "Group",
     "User",
     "UserSpec",
@@ -127,3 +130,28 @@ class AuthenticatedUser(User):
         examples=["Mobu Test User"],
         exclude=True,
     )
+
+
+class CachedToken(BaseModel):
+    """A service token stored in the token cache."""
+
+    user: User = Field(..., title="User the token was requested for")
+
+    authenticated: AuthenticatedUser = Field(
+        ..., title="Authenticated user with the token"
+    )
+
+    name: str | None = Field(
+        None,
+        title="Full name of user",
+        description=(
+            "Stored separately because it is not serialized with the"
+            " authenticated user"
+        ),
+    )
+
+    expires: datetime = Field(..., title="When the token expires")
+
+    def to_authenticated_user(self) -> AuthenticatedUser:
+        """Return the authenticated user with the token."""
+        return self.authenticated.model_copy(update={"name": self.name})
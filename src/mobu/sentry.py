@@ -7,12 +7,14 @@ from contextlib import contextmanager
 from typing import Any, Literal
 
 import sentry_sdk
-from safir.sentry import before_send_handler
+from safir.sentry import before_send_handler, duration
 from sentry_sdk.tracing import Span, Transaction
 from sentry_sdk.types import Event, Hint
 
 from mobu.constants import SENTRY_ERRORED_KEY
 
+from .services.latency import record_phase
+
 __all__ = [
     "before_send",
     "capturing_start_span",
@@ -40,7 +42,9 @@ def before_send(event: Event, hint: Hint) -> Event | None:
 
 
 @contextmanager
-def capturing_start_span(op: str, **kwargs: Any) -> Generator[Span]:
+def capturing_start_span(
+    op: str, *, timed: bool = True, **kwargs: Any
+) -> Generator[Span]:
     """Start a span, set the op/start time in the context, and capture errors.
 
     Setting the op and start time in the context will propagate it to any error
@@ -49,6 +53,10 @@ def capturing_start_span(op: str, **kwargs: Any) -> Generator[Span]:
     Explicitly capturing errors in the span will tie the Sentry events to this
     specific span, rather than tying them to the span/transaction where they
     would be handled otherwise.
+
+    Unless ``timed`` is `False`, the duration of the span is also recorded as
+    a phase latency of the running business, along with whether the span
+    finished without an exception. Spans that only idle should pass `False`.
     """
     with sentry_sdk.start_span(op=op, **kwargs) as span:
         sentry_sdk.get_isolation_scope().set_context(
@@ -66,10 +74,14 @@ def capturing_start_span(op: str, **kwargs: Any) -> Generator[Span]:
             # Even though we're capturing exceptions at the business level,
             # Sentry knows not to send them twice.
             sentry_sdk.capture_exception(e)
+            if timed:
+                record_phase(op, duration(span), success=False)
             raise
         finally:
             sentry_sdk.get_isolation_scope().remove_context("phase")
             sentry_sdk.get_isolation_scope().remove_tag("phase")
+        if timed:
+            record_phase(op, duration(span))
 
 
 @contextmanager
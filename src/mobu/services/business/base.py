@@ -2,23 +2,29 @@
 
 import asyncio
 from abc import ABCMeta, abstractmethod
-from asyncio import Queue, QueueEmpty
+from asyncio import Event, Future, Timeout
 from collections.abc import AsyncGenerator
-from contextlib import aclosing
+from contextlib import aclosing, asynccontextmanager
 from datetime import UTC, datetime, timedelta
-from enum import Enum
 from typing import TypedDict
 
 from rubin.repertoire import DiscoveryClient
 from structlog.stdlib import BoundLogger
 
-from ...asyncio import wait_first
+from ...asyncio import pause_timer
 from ...events import Events
-from ...models.business.base import BusinessData, BusinessOptions
+from ...models.business.base import BusinessOptions
 from ...models.user import AuthenticatedUser
 from ...sentry import capturing_start_span, start_transaction
+from ..dispatcher import ArrivalDispatcher
+from ..event_loop import set_loop_owner
+from ..feed import FlockFeed
+from ..latency import FlockLatency, set_phase_recorder
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords, RecordContext
+from ..table import BusinessStatus
 
-__all__ = ["Business", "BusinessCommand", "CommonEventAttrs"]
+__all__ = ["Business", "CommonEventAttrs"]
 
 
 class CommonEventAttrs(TypedDict):
@@ -29,12 +35,6 @@ class CommonEventAttrs(TypedDict):
     business: str
 
 
-class BusinessCommand(Enum):
-    """Commands sent over the internal control queue."""
-
-    STOP = "STOP"
-
-
 class Business[T: BusinessOptions](metaclass=ABCMeta):
     """Base class for monkey business (one type of repeated operation).
 
@@ -44,6 +44,10 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
     - In a loop, run ``execute`` followed by ``idle`` until told to stop
     - When told to stop, run ``shutdown``
 
+    If the business is part of an open-loop flock, it is given a dispatcher,
+    and each iteration instead waits for the dispatcher to start it rather
+    than idling after the previous one.
+
     Subclasses should override ``startup``, ``execute``, and ``shutdown`` to
     add appropriate behavior.  ``idle`` by default waits for ``idle_time``,
     which generally does not need to be overridden.  Subclasses should also
@@ -51,7 +55,8 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
 
     All delays should be done by calling ``pause``, and the caller should
     check ``self.stopping`` and exit any loops if it is `True` after calling
-    ``pause``.
+    ``pause``. Pauses are timed by the shared `~mobu.asyncio.PauseTimer`
+    and are ended early by ``stop``.
 
     Parameters
     ----------
@@ -67,6 +72,17 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
         Logger to use to report the results of business.
     flock
         Flock that is running this business, if it is running in a flock.
+    dispatcher
+        Dispatcher that starts each iteration, if the business is running in
+        an open-loop flock.
+    latency
+        Latency histograms of the flock, if it is running in a flock.
+    outcomes
+        Success and failure counts of the flock, if it is running in a flock.
+    feed
+        Feed of events about the flock, if it is running in a flock.
+    records
+        Run records of the flock, if it is running in a flock.
 
     Attributes
     ----------
@@ -81,14 +97,28 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
     logger
         Logger to use to report the results of business. This will generally
         be attached to a file rather than the main logger.
-    success_count
-        Number of successes.
-    failure_count
-        Number of failures.
+    status
+        Status of the business, including its number of successes and
+        failures, reported in the status of the monkey.
     stopping
         Whether `stop` has been called and further execution should stop.
     flock
         Flock that is running this business, if it is running in a flock.
+    dispatcher
+        Dispatcher that starts each iteration, if any.
+    latency
+        Latency histograms into which to record iteration and phase
+        latencies, if any.
+    outcomes
+        Flock counts into which to record successes and failures, if any.
+    feed
+        Feed to which to publish the result of each iteration, if any.
+    records
+        Store into which to record every iteration and phase, if any.
+    record_context
+        What the business is currently running, added to its records.
+        Subclasses update this as they move between notebooks, cells, and
+        queries.
     name
         The name of this kind of business
     """
@@ -102,19 +132,30 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         self.options = options
         self.user = user
         self.discovery = discovery_client
         self.events = events
         self.logger = logger
-        self.success_count = 0
-        self.failure_count = 0
-        self.control: Queue[BusinessCommand] = Queue()
         self.stopping = False
-        self.refreshing = False
         self.flock = flock
+        self.dispatcher = dispatcher
+        self.latency = latency
+        self.outcomes = outcomes
+        self.feed = feed
+        self.records = records
+        self.record_context = RecordContext()
         self.name = type(self).__name__
+        self.status = BusinessStatus(self.name)
+        self._pause: Future[bool] | None = None
+        self._timeout: Timeout | None = None
+        self._stopped = Event()
 
     # Methods that should be overridden by child classes if needed.
 
@@ -146,12 +187,15 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
         """Execute the core business logic.
 
         Calls `startup`, and then loops calling `execute` followed by `idle`,
-        tracking failures by watching for exceptions and updating
-        ``success_count`` and ``failure_count``. When told to stop, calls
-        `shutdown` followed by `close`.
+        tracking failures by watching for exceptions and updating the success
+        and failure counts in ``status``. When told to stop, calls
+        `shutdown` followed by `close`. If the business has a dispatcher,
+        each `execute` instead waits to be dispatched and `idle` is skipped.
 
         This method is normally run in a background task.
         """
+        set_phase_recorder(self.record_phase)
+        set_loop_owner(self.flock, self.name)
         self.logger.info("Starting up...")
         try:
             try:
@@ -165,18 +209,28 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
                 # count startup failure as a failed iteration, a business that
                 # keeps failing during startup reports 100% success in the
                 # flock summary.
-                self.failure_count += 1
+                self.record_failure()
                 raise
 
             while not self.stopping:
+                start = datetime.now(tz=UTC)
+                if self.dispatcher:
+                    intended = await self.wait_for_dispatch()
+                    if not intended:
+                        break
+                    start = intended
                 self.logger.info("Starting next iteration")
                 try:
                     await self.execute()
-                    self.success_count += 1
                 except Exception:
-                    self.failure_count += 1
+                    self.record_failure(datetime.now(tz=UTC) - start)
                     raise
-                await self.idle()
+                duration = datetime.now(tz=UTC) - start
+                self.record_success(duration)
+                if not self.stopping:
+                    self.record_iteration(duration)
+                if not self.dispatcher:
+                    await self.idle()
 
             self.logger.info("Shutting down...")
 
@@ -187,15 +241,17 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
                 await self.shutdown()
             await self.close()
         finally:
-            # Tell the control channel we've processed the stop command.
+            # Tell stop that we've stopped.
             if self.stopping:
-                self.control.task_done()
+                self._stopped.set()
 
     async def run_once(self) -> None:
         """Execute the core business logic, only once.
 
         Calls `startup`, `execute`, `shutdown`, and `close`.
         """
+        set_phase_recorder(self.record_phase)
+        set_loop_owner(self.flock, self.name)
         self.logger.info("Starting up...")
         try:
             await self.startup()
@@ -208,9 +264,28 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
     async def idle(self) -> None:
         """Pause at the end of each business loop."""
         self.logger.info("Idling...")
-        with capturing_start_span(op="idle"):
+        with capturing_start_span(op="idle", timed=False):
             await self.pause(self.options.idle_time)
 
+    async def wait_for_dispatch(self) -> datetime | None:
+        """Wait for the dispatcher to start the next iteration.
+
+        Returns
+        -------
+        datetime.datetime or None
+            The time at which the iteration was scheduled to start, or `None`
+            if the business has been told to stop.
+        """
+        if not self.dispatcher:
+            return datetime.now(tz=UTC)
+        with capturing_start_span(op="wait_for_dispatch", timed=False):
+            try:
+                async with self._interruptible():
+                    intended = await self.dispatcher.wait()
+            except TimeoutError:
+                return None
+        return None if self.stopping else intended
+
     async def error_idle(self) -> None:
         """Pause after an error and before attempting to restart.
 
@@ -224,18 +299,99 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
             await self.pause(error_idle)
         finally:
             if self.stopping:
-                self.control.task_done()
+                self._stopped.set()
 
     async def stop(self) -> None:
         """Tell the running background task to stop and wait for that."""
         self.stopping = True
         self.logger.info("Stopping...")
-        await self.control.put(BusinessCommand.STOP)
-        await self.control.join()
+        if self._pause and not self._pause.done():
+            self._pause.set_result(False)
+        if self._timeout and not self._timeout.expired():
+            self._timeout.reschedule(0)
+        await self._stopped.wait()
         self.logger.info("Stopped")
 
     def signal_refresh(self) -> None:
-        self.refreshing = True
+        self.status.refreshing = True
+
+    def record_success(self, duration: timedelta | None = None) -> None:
+        """Count a successful iteration.
+
+        Parameters
+        ----------
+        duration
+            Time from the (scheduled) start to the end of the iteration.
+        """
+        self.status.timings.finish(duration, success=True)
+        self.status.success_count += 1
+        if self.outcomes:
+            self.outcomes.record_success()
+        if self.feed:
+            self.feed.publish_iteration(
+                self.user.username, success=True, duration=duration
+            )
+        self._record(None, duration, success=True)
+
+    def record_failure(self, duration: timedelta | None = None) -> None:
+        """Count a failed iteration.
+
+        Parameters
+        ----------
+        duration
+            Time from the (scheduled) start of the iteration to the failure,
+            or `None` if the business failed during startup.
+        """
+        self.status.timings.finish(duration, success=False)
+        self.status.failure_count += 1
+        if self.outcomes:
+            self.outcomes.record_failure()
+        if self.feed:
+            self.feed.publish_iteration(
+                self.user.username, success=False, duration=duration
+            )
+        self._record(None, duration, success=False)
+
+    def record_iteration(self, latency: timedelta) -> None:
+        """Record the latency of a successful iteration.
+
+        Closed-loop businesses are only corrected for coordinated omission
+        if ``expected_interval`` is set, since the length of their cycle
+        depends on the latency of the service being tested as well as on
+        ``idle_time``. Open-loop businesses measure latency from the
+        scheduled start of the iteration, which already accounts for it.
+
+        Parameters
+        ----------
+        latency
+            Time from the (scheduled) start to the end of the iteration.
+        """
+        if not self.latency:
+            return
+        expected = self.options.expected_interval
+        if self.dispatcher or expected is None:
+            self.latency.record_iteration(latency)
+        else:
+            self.latency.record_iteration(latency, expected_interval=expected)
+
+    def record_phase(
+        self, phase: str, latency: timedelta, *, success: bool = True
+    ) -> None:
+        """Record the latency of a phase of an iteration.
+
+        Parameters
+        ----------
+        phase
+            Name of the phase, the same as the op of its Sentry span.
+        latency
+            Time taken by the phase.
+        success
+            Whether the phase succeeded.
+        """
+        self.status.timings.record_phase(phase, latency)
+        if self.latency:
+            self.latency.record_phase(phase, latency, success=success)
+        self._record(phase, latency, success=success)
 
     # Utility functions that can be used by child classes.
 
@@ -254,23 +410,20 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
         """
         if self.stopping:
             return False
-        try:
-            if interval:
-                seconds = interval.total_seconds()
-                await asyncio.wait_for(self.control.get(), seconds)
-                return False
-            else:
-                self.control.get_nowait()
-                return False
-        except TimeoutError, QueueEmpty:
+        if not interval:
             return True
+        self._pause = pause_timer.pause(interval.total_seconds())
+        try:
+            return await self._pause
+        finally:
+            self._pause = None
 
     async def iter_with_timeout[U](
         self, generator: AsyncGenerator[U], timeout: timedelta
     ) -> AsyncGenerator[U]:
         """Run a generator with a timeout.
 
-        Wraps the provided generator, ending it ontimeout or if the business
+        Wraps the provided generator, ending it on timeout or if the business
         was told to shut down. (The latter two can be distinguished by
         checking ``self.stopping``.)
 
@@ -279,7 +432,7 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
         generator
             Any object that supports the async generator protocol.
         timeout
-            How long to wait for each new generator result.
+            How long to allow for the whole stream of generator results.
 
         Returns
         -------
@@ -296,46 +449,29 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
 
         Notes
         -----
-        This is unfortunately somewhat complex because we want to read from an
-        generator of messages (progress for spawn or WebSocket messages for
-        code execution) while simultaneously checking our control queue for a
-        shutdown message and imposing a timeout.
-
-        Do this by creating two awaitables, one pause that handles the control
-        queue and the timeout and the other that waits on the generator, and
-        then use the `~mobu.asyncio.wait_first` utility function to wait for
-        the first one that finishes and abort the other one.
+        We want to read from a generator of messages (progress for spawn or
+        WebSocket messages for code execution) while also stopping if the
+        business is told to shut down and imposing a timeout. The deadline is
+        computed once for the whole stream, and each message is awaited
+        inside a timeout at that deadline that `stop` expires early. This
+        avoids creating any tasks per message.
+
+        The timeout cannot be held open across the whole stream, since it
+        would then also apply to the caller while a message is being
+        processed and its cancellation would be raised in the caller's code.
         """
-
-        # While it works for our current code to pass the results of anext()
-        # directly into wait_first and thus into asyncio.create_task, mypy
-        # complains because technically the return value of anext() can be any
-        # Awaitable and does not need to be a Coroutine (which is required for
-        # asyncio.create_task). Turn it into an explicit Coroutine to
-        # guarantee this will always work correctly.
-        async def gen_next() -> U:
-            return await anext(generator)
-
-        start = datetime.now(tz=UTC)
+        deadline = asyncio.get_running_loop().time() + timeout.total_seconds()
         async with aclosing(generator):
-            while True:
-                remaining = timeout - (datetime.now(tz=UTC) - start)
-                if remaining < timedelta(seconds=0):
+            while not self.stopping:
+                try:
+                    async with self._interruptible(deadline):
+                        result = await anext(generator)
+                except StopAsyncIteration, TimeoutError:
                     break
-                pause = self._pause_no_return(timeout)
-                result = await wait_first(gen_next(), pause)
-                if result is None or self.stopping:
+                if self.stopping:
                     break
                 yield result
 
-    def dump(self) -> BusinessData:
-        return BusinessData(
-            name=self.name,
-            failure_count=self.failure_count,
-            success_count=self.success_count,
-            refreshing=self.refreshing,
-        )
-
     def common_event_attrs(self) -> CommonEventAttrs:
         """Attributes that are on every published event."""
         return {
@@ -344,24 +480,42 @@ class Business[T: BusinessOptions](metaclass=ABCMeta):
             "business": self.name,
         }
 
-    async def _pause_no_return(self, interval: timedelta) -> None:
-        """Pause for up to an interval, handling commands.
-
-        The same as `pause`, but returns `None`, needed for proper typing of
-        `iter_with_timeout`.
+    @asynccontextmanager
+    async def _interruptible(
+        self, deadline: float | None = None
+    ) -> AsyncGenerator[None]:
+        """Run a block with a deadline that `stop` ends early.
 
         Parameters
         ----------
-        interval
-            How long to wait.
+        deadline
+            Event loop time by which the block must finish, or `None` to only
+            end it early when the business is told to stop.
+
+        Raises
+        ------
+        TimeoutError
+            Raised if the timeout expired or the business was told to stop.
         """
-        if self.stopping:
-            return
-        try:
-            if interval:
-                seconds = interval.total_seconds()
-                await asyncio.wait_for(self.control.get(), seconds)
-            else:
-                self.control.get_nowait()
-        except TimeoutError, QueueEmpty:
-            pass
+        async with asyncio.timeout_at(deadline) as cm:
+            self._timeout = cm
+            try:
+                if self.stopping:
+                    cm.reschedule(0)
+                yield
+            finally:
+                self._timeout = None
+
+    def _record(
+        self, phase: str | None, duration: timedelta | None, *, success: bool
+    ) -> None:
+        """Add an iteration or phase to the run records of the flock."""
+        if self.records:
+            self.records.record(
+                monkey=self.user.username,
+                business=self.name,
+                phase=phase,
+                duration=duration,
+                success=success,
+                context=self.record_context,
+            )
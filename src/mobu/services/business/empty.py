@@ -20,6 +20,6 @@ class EmptyLoop(Business):
 
     @override
     async def execute(self) -> None:
-        await self.events.empty_loop.publish(
+        self.events.empty_loop.publish(
             EmptyLoopExecution(success=True, **self.common_event_attrs())
         )
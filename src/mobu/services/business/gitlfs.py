@@ -18,6 +18,11 @@ from ...models.business.gitlfs import GitLFSBusinessOptions
 from ...models.user import AuthenticatedUser
 from ...sentry import capturing_start_span, start_transaction
 from ...storage.git import Git
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .base import Business
 
 __all__ = ["GitLFSBusiness"]
@@ -39,6 +44,11 @@ class GitLFSBusiness(Business):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -47,6 +57,11 @@ class GitLFSBusiness(Business):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
         self._lfs_read_url = options.lfs_read_url
         self._lfs_write_url = options.lfs_write_url
@@ -102,7 +117,7 @@ class GitLFSBusiness(Business):
                 event.success = False
                 raise
             finally:
-                await self.events.git_lfs_check.publish(event)
+                self.events.git_lfs_check.publish(event)
 
     def _git(self, repo: Path) -> Git:
         """Return a configured Git client for a specified repo path.
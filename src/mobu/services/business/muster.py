@@ -12,6 +12,11 @@ from ...exceptions import MusterError, MusterWebError
 from ...models.business.muster import MusterOptions
 from ...models.user import AuthenticatedUser
 from ...sentry import capturing_start_span, start_transaction
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .base import Business
 
 __all__ = ["MusterRunner"]
@@ -70,6 +75,11 @@ class MusterRunner(Business):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -78,6 +88,11 @@ class MusterRunner(Business):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
         self._client: AsyncClient
         self._url: str
@@ -111,7 +126,7 @@ class MusterRunner(Business):
                         duration=duration(span),
                         **self.common_event_attrs(),
                     )
-                    await self.events.muster.publish(event)
+                    self.events.muster.publish(event)
                 elapsed = duration(span).total_seconds()
             self.logger.info(f"Muster finished after {elapsed} seconds")
 
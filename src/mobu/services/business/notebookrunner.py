@@ -36,19 +36,22 @@ from ...exceptions import (
     NotebookRepositoryError,
     RepositoryConfigError,
 )
-from ...models.business.notebookrunner import (
-    NotebookRunnerData,
-    NotebookRunnerOptions,
-)
+from ...models.business.notebookrunner import NotebookRunnerOptions
 from ...models.repo import RepoConfig
 from ...models.user import AuthenticatedUser
 from ...sentry import capturing_start_span, start_transaction
 from ...services.business.base import CommonEventAttrs
 from ...services.notebook_finder import NotebookFinder
 from ...services.repo import RepoManager
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
+from ..workers import WorkerPool
 from .nublado import NubladoBusiness
 
-__all__ = ["ExecutionIteration", "NotebookRunner"]
+__all__ = ["ExecutionIteration", "NotebookRunner", "read_code_cells"]
 
 
 class _CommonNotebookEventAttrs(CommonEventAttrs):
@@ -60,6 +63,43 @@ class _CommonNotebookEventAttrs(CommonEventAttrs):
     repo_hash: str
 
 
+def read_code_cells(notebook: Path) -> list[dict[str, Any]]:
+    """Read the code cells of a notebook.
+
+    This may be run in a worker process, so only the parts of each cell that
+    are needed to run it are returned. Notebooks can contain large outputs
+    that would otherwise have to be sent back to the main process.
+
+    Parameters
+    ----------
+    notebook
+        Path to the notebook.
+
+    Returns
+    -------
+    list of dict
+        Code cells of the notebook, each with its source, its ID if it has
+        one, and its number in ``_index``.
+    """
+    cells = json.loads(notebook.read_text())["cells"]
+
+    # Strip non-code cells.
+    cells = [c for c in cells if c["cell_type"] == "code"]
+
+    # Add cell numbers to all the cells, which we'll use in exception
+    # reporting and to annotate timing events so that we can find cells that
+    # take an excessively long time to run. This should be done after
+    # stripping non-code cells, since the UI for notebooks displays cell
+    # numbers only counting code cells.
+    result = []
+    for i, cell in enumerate(cells, start=1):
+        code_cell = {"source": cell["source"], "_index": str(i)}
+        if "id" in cell:
+            code_cell["id"] = cell["id"]
+        result.append(code_cell)
+    return result
+
+
 @dataclass(frozen=True)
 class ExecutionIteration:
     """Properties of a set of notebook executions."""
@@ -85,6 +125,9 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
         Logger to use to report the results of business.
     flock
         Flock that is running this business, if it is running in a flock.
+    worker_pool
+        Worker processes in which to parse notebooks. If not given, notebooks
+        are parsed in the main process.
     """
 
     def __init__(
@@ -97,6 +140,12 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
+        worker_pool: WorkerPool | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -105,15 +154,20 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
         self._config = config_dependency.config
         self._notebook: Path | None = None
         self._notebook_paths: list[Path] | None = None
         self._repo_path: Path | None = None
         self._repo_hash: str | None = None
-        self._running_code: str | None = None
         self._repo_manager = repo_manager
         self._repo_config: RepoConfig | None = None
+        self._workers = worker_pool or WorkerPool(0)
 
     @override
     async def startup(self) -> None:
@@ -131,8 +185,9 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
         self._repo_path = None
         self._repo_hash = None
         self._notebook = None
+        self.status.notebook = None
         self._notebook_paths = None
-        self._running_code = None
+        self.status.running_code = None
 
     async def initialize(self) -> None:
         """Prepare to run the business.
@@ -186,7 +241,7 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
         self.logger.info("Getting new notebooks and forcing new execution")
         await self.cleanup()
         await self.initialize()
-        self.refreshing = False
+        self.status.refreshing = False
 
     async def find_notebooks(self) -> set[Path]:
         with capturing_start_span(op="find_notebooks"):
@@ -216,28 +271,14 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
             random.shuffle(self._notebook_paths)
         return self._notebook_paths.pop()
 
-    def read_notebook(self, notebook: Path) -> list[dict[str, Any]]:
+    async def read_notebook(self, notebook: Path) -> list[dict[str, Any]]:
         with capturing_start_span(op="read_notebook"):
             try:
-                notebook_text = notebook.read_text()
-                cells = json.loads(notebook_text)["cells"]
+                return await self._workers.run(read_code_cells, notebook)
             except Exception as e:
                 msg = f"Invalid notebook {notebook.name}: {e!s}"
                 raise NotebookRepositoryError(msg, self.user.username) from e
 
-        # Strip non-code cells.
-        cells = [c for c in cells if c["cell_type"] == "code"]
-
-        # Add cell numbers to all the cells, which we'll use in exception
-        # reporting and to annotate timing events so that we can find cells
-        # that take an excessively long time to run. This should be done after
-        # stripping non-code cells, since the UI for notebooks displays cell
-        # numbers only counting code cells.
-        for i, cell in enumerate(cells, start=1):
-            cell["_index"] = str(i)
-
-        return cells
-
     @override
     @asynccontextmanager
     async def open_session(
@@ -255,7 +296,7 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
         iterator = self.execution_iterator()
         for count in iterator.iterator:
             iteration = f"{count + 1}/{iterator.size}"
-            if self.refreshing:
+            if self.status.refreshing:
                 await self.refresh()
                 return
             await self.execute_notebook(session, iteration)
@@ -285,7 +326,10 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
         self, session: JupyterLabSession, iteration: str
     ) -> None:
         self._notebook = await self.next_notebook()
+        self.status.notebook = self._notebook.name
         relative_notebook = self._relative_notebook()
+        self.record_context.notebook = relative_notebook
+        self.record_context.cell = None
         logger = self.logger.bind(notebook=relative_notebook)
         msg = f"Notebook {self._notebook.name} iteration {iteration}"
         logger.info(msg)
@@ -294,7 +338,7 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
             notebook=relative_notebook, iteration=iteration
         ) as span:
             try:
-                cells = self.read_notebook(self._notebook)
+                cells = await self.read_notebook(self._notebook)
 
                 # We want to wait if the notebook is totally empty so we don't
                 # spin out of control on empty notebooks
@@ -313,23 +357,21 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
                     if not await self.execution_idle():
                         break
             except:
-                await self._publish_notebook_event(
+                self._publish_notebook_event(
                     duration=duration(span), success=False
                 )
                 raise
 
         logger.info(f"Success running notebook {self._notebook.name}")
-        await self._publish_notebook_event(
-            duration=duration(span), success=True
-        )
+        self._publish_notebook_event(duration=duration(span), success=True)
         if not self._notebook_paths:
             self.logger.info("Done with this cycle of notebooks")
         await self.notebook_idle()
 
-    async def _publish_notebook_event(
+    def _publish_notebook_event(
         self, duration: timedelta, *, success: bool
     ) -> None:
-        await self.events.notebook_execution.publish(
+        self.events.notebook_execution.publish(
             NotebookExecution(
                 **self.common_notebook_event_attrs(),
                 duration=duration,
@@ -337,10 +379,10 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
             )
         )
 
-    async def _publish_cell_event(
+    def _publish_cell_event(
         self, *, cell_id: str, duration: timedelta, success: bool
     ) -> None:
-        await self.events.notebook_cell_execution.publish(
+        self.events.notebook_cell_execution.publish(
             NotebookCellExecution(
                 **self.common_notebook_event_attrs(),
                 duration=duration,
@@ -370,6 +412,7 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
             raise RuntimeError("Executing a cell without a notebook")
         self.logger.info(f"Executing cell {cell_id}:\n{code}\n")
         set_tag("cell", cell_id)
+        self.record_context.cell = cell_id
         cell_info = {
             "code": code,
             "cell_id": cell_id,
@@ -384,7 +427,7 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
             # exception events. Unfortuantely, span data is not included in
             # exception events.
             span.set_data("cell_info", cell_info)
-            self._running_code = code
+            self.status.running_code = code
             try:
                 reply = await session.run_python(code, context=context)
             except Exception as e:
@@ -393,7 +436,7 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
                         filename="nublado_error.txt",
                         bytes=self.remove_ansi_escapes(e.error).encode(),
                     )
-                await self._publish_cell_event(
+                self._publish_cell_event(
                     cell_id=cell_id,
                     duration=duration(span),
                     success=False,
@@ -403,9 +446,13 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
                 msg = f"{notebook}: Error executing cell"
                 raise NotebookCellExecutionError(msg) from e
 
-            self._running_code = None
+            self.status.running_code = None
+
+        # Leave the cell set after a failure, so that the record of the
+        # failed iteration says which cell failed.
+        self.record_context.cell = None
         self.logger.info(f"Result:\n{reply}\n")
-        await self._publish_cell_event(
+        self._publish_cell_event(
             cell_id=cell_id, duration=duration(span), success=True
         )
 
@@ -413,17 +460,9 @@ class NotebookRunner[T: NotebookRunnerOptions](ABC, NubladoBusiness):
         """Pause between each notebook execution."""
         idle_time = self.options.notebook_idle_time
         self.logger.debug("notebook_idle", idle_time=idle_time)
-        with capturing_start_span(op="notebook_idle"):
+        with capturing_start_span(op="notebook_idle", timed=False):
             return await self.pause(idle_time)
 
-    @override
-    def dump(self) -> NotebookRunnerData:
-        return NotebookRunnerData(
-            notebook=self._notebook.name if self._notebook else None,
-            running_code=self._running_code,
-            **super().dump().model_dump(),
-        )
-
     def _relative_notebook(self) -> str:
         """Give the path of the current notebook relative to the repo root."""
         if self._notebook is None or self._repo_path is None:
@@ -11,6 +11,12 @@ from ...models.business.notebookrunnercounting import (
 )
 from ...models.user import AuthenticatedUser
 from ...services.repo import RepoManager
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
+from ..workers import WorkerPool
 from .notebookrunner import ExecutionIteration, NotebookRunner
 
 __all__ = ["NotebookRunnerCounting"]
@@ -46,6 +52,12 @@ class NotebookRunnerCounting(NotebookRunner):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
+        worker_pool: WorkerPool | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -55,6 +67,12 @@ class NotebookRunnerCounting(NotebookRunner):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
+            worker_pool=worker_pool,
         )
         self._max_executions = options.max_executions
 
@@ -9,6 +9,12 @@ from ...events import Events
 from ...models.business.notebookrunner import NotebookRunnerOptions
 from ...models.user import AuthenticatedUser
 from ...services.repo import RepoManager
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
+from ..workers import WorkerPool
 from .notebookrunner import ExecutionIteration, NotebookRunner
 
 __all__ = ["NotebookRunnerList"]
@@ -44,6 +50,12 @@ class NotebookRunnerList(NotebookRunner):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
+        worker_pool: WorkerPool | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -53,6 +65,12 @@ class NotebookRunnerList(NotebookRunner):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
+            worker_pool=worker_pool,
         )
 
     @override
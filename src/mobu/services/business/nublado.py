@@ -24,13 +24,14 @@ from ...exceptions import (
     JupyterSpawnError,
     JupyterSpawnTimeoutError,
 )
-from ...models.business.nublado import (
-    NubladoBusinessData,
-    NubladoBusinessOptions,
-    RunningImage,
-)
+from ...models.business.nublado import NubladoBusinessOptions, RunningImage
 from ...models.user import AuthenticatedUser
 from ...sentry import capturing_start_span, start_transaction
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .base import Business
 
 __all__ = ["NubladoBusiness", "ProgressLogMessage"]
@@ -115,6 +116,11 @@ class NubladoBusiness[T: NubladoBusinessOptions](
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -123,6 +129,11 @@ class NubladoBusiness[T: NubladoBusinessOptions](
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
         self._client = NubladoClient(
             user.username,
@@ -131,7 +142,6 @@ class NubladoBusiness[T: NubladoBusinessOptions](
             logger=logger,
             timeout=options.jupyter_timeout,
         )
-        self._image: RunningImage | None = None
         self._node: str | None = None
         self._random = SystemRandom()
 
@@ -164,7 +174,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
         # the nested transaction shows up as "No instrumentation" in the
         # enclosing transaction in the Sentry UI.
         if self.options.jitter:
-            with capturing_start_span(op="pre_login_delay"):
+            with capturing_start_span(op="pre_login_delay", timed=False):
                 max_delay = self.options.jitter.total_seconds()
                 delay = self._random.uniform(0, max_delay)
                 if not await self.pause(timedelta(seconds=delay)):
@@ -184,7 +194,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
             op=f"mobu.{self.name}.pre_execute_code",
         ):
             if self.options.delete_lab or await self._client.is_lab_stopped():
-                self._image = None
+                self.status.image = None
                 set_tag("image_description", None)
                 set_tag("image_reference", None)
                 if not await self.spawn_lab():
@@ -207,7 +217,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
         subclasses in `execute_code` in between each block of code that is
         executed.
         """
-        with capturing_start_span(op="execution_idle"):
+        with capturing_start_span(op="execution_idle", timed=False):
             return await self.pause(self.options.execution_idle_time)
 
     @override
@@ -222,7 +232,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
             jitter = self.options.jitter.total_seconds()
             delay_seconds = self._random.uniform(0, jitter)
             delay = timedelta(seconds=delay_seconds)
-            with capturing_start_span(op="idle"):
+            with capturing_start_span(op="idle", timed=False):
                 await self.pause(self.options.idle_time + delay)
         else:
             await super().idle()
@@ -237,7 +247,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
             try:
                 result = await self._spawn_lab(span)
             except:
-                await self.events.nublado_spawn_lab.publish(
+                self.events.nublado_spawn_lab.publish(
                     NubladoSpawnLab(
                         success=False,
                         duration=duration(span),
@@ -245,7 +255,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
                     )
                 )
                 raise
-        await self.events.nublado_spawn_lab.publish(
+        self.events.nublado_spawn_lab.publish(
             NubladoSpawnLab(
                 success=True,
                 duration=duration(span),
@@ -338,12 +348,12 @@ class NubladoBusiness[T: NubladoBusinessOptions](
             self.logger.warning(msg, image_data=image_data)
             reference = None
             description = None
-        self._image = RunningImage(
+        self.status.image = RunningImage(
             reference=reference.strip() if reference else None,
             description=description.strip() if description else None,
         )
-        set_tag("image_description", self._image.description)
-        set_tag("image_reference", self._image.reference)
+        set_tag("image_description", self.status.image.description)
+        set_tag("image_reference", self.status.image.reference)
         if self.options.get_node:
             self._node = await session.run_python(_GET_NODE)
             set_tag("node", self._node)
@@ -359,7 +369,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
             try:
                 result = await self._delete_lab()
             except:
-                await self.events.nublado_delete_lab.publish(
+                self.events.nublado_delete_lab.publish(
                     NubladoDeleteLab(
                         success=False,
                         duration=duration(span),
@@ -370,7 +380,7 @@ class NubladoBusiness[T: NubladoBusinessOptions](
         if result:
             # Only record a success if we waited to see if the delete was
             # actually successful.
-            await self.events.nublado_delete_lab.publish(
+            self.events.nublado_delete_lab.publish(
                 NubladoDeleteLab(
                     success=True,
                     duration=duration(span),
@@ -409,17 +419,11 @@ class NubladoBusiness[T: NubladoBusinessOptions](
                 return False
 
         self.logger.info("Lab successfully deleted")
-        self._image = None
+        self.status.image = None
         set_tag("image_description", None)
         set_tag("image_reference", None)
         return True
 
-    @override
-    def dump(self) -> NubladoBusinessData:
-        return NubladoBusinessData(
-            image=self._image, **super().dump().model_dump()
-        )
-
     def remove_ansi_escapes(self, string: str) -> str:
         """Remove ANSI escape sequences from a string.
 
@@ -19,6 +19,11 @@ from ...events import Events, NubladoPythonExecution
 from ...models.business.nubladopythonloop import NubladoPythonLoopOptions
 from ...models.user import AuthenticatedUser
 from ...sentry import start_transaction
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .nublado import NubladoBusiness
 
 __all__ = ["NubladoPythonLoop"]
@@ -50,6 +55,11 @@ class NubladoPythonLoop(NubladoBusiness):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -58,6 +68,11 @@ class NubladoPythonLoop(NubladoBusiness):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
 
     @override
@@ -72,15 +87,15 @@ class NubladoPythonLoop(NubladoBusiness):
                 try:
                     reply = await session.run_python(code)
                 except Exception:
-                    await self._publish_failure(code=code)
+                    self._publish_failure(code=code)
                     raise
             self.logger.info(f"{code} -> {reply}")
-            await self._publish_success(code=code, duration=duration(span))
+            self._publish_success(code=code, duration=duration(span))
             if not await self.execution_idle():
                 break
 
-    async def _publish_success(self, code: str, duration: timedelta) -> None:
-        await self.events.nublado_python_execution.publish(
+    def _publish_success(self, code: str, duration: timedelta) -> None:
+        self.events.nublado_python_execution.publish(
             NubladoPythonExecution(
                 duration=duration,
                 code=code,
@@ -89,8 +104,8 @@ class NubladoPythonLoop(NubladoBusiness):
             )
         )
 
-    async def _publish_failure(self, code: str) -> None:
-        await self.events.nublado_python_execution.publish(
+    def _publish_failure(self, code: str) -> None:
+        self.events.nublado_python_execution.publish(
             NubladoPythonExecution(
                 duration=None,
                 code=code,
@@ -20,12 +20,16 @@ from ...events import Events
 from ...events import SIAQuery as SIAQueryEvent
 from ...exceptions import ServiceDiscoveryError, SIAClientError
 from ...models.business.siaquerysetrunner import (
-    SIABusinessData,
     SIAQuery,
     SIAQuerySetRunnerOptions,
 )
 from ...models.user import AuthenticatedUser
 from ...sentry import capturing_start_span, start_transaction
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .base import Business
 
 __all__ = ["SIAQuerySetRunner"]
@@ -59,6 +63,11 @@ class SIAQuerySetRunner(Business):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -67,8 +76,12 @@ class SIAQuerySetRunner(Business):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
-        self._running_query: SIAQuery | None = None
         self._client: pyvo.dal.SIA2Service | None = None
         self._pool = ThreadPoolExecutor(max_workers=1)
         self._random = SystemRandom()
@@ -109,7 +122,7 @@ class SIAQuerySetRunner(Business):
                     "query_info",
                     {"query": str(query), "started_at": span.start_timestamp},
                 )
-                self._running_query = query
+                self.status.running_query = query
 
                 success = False
                 try:
@@ -127,7 +140,7 @@ class SIAQuerySetRunner(Business):
                     )
                     success = True
                 finally:
-                    await self.events.sia_query.publish(
+                    self.events.sia_query.publish(
                         payload=SIAQueryEvent(
                             success=success,
                             duration=duration(span),
@@ -135,17 +148,11 @@ class SIAQuerySetRunner(Business):
                         )
                     )
 
-                self._running_query = None
+                self.status.running_query = None
                 elapsed = duration(span).total_seconds()
 
             self.logger.info(f"Query finished after {elapsed} seconds")
 
-    @override
-    def dump(self) -> SIABusinessData:
-        return SIABusinessData(
-            running_query=self._running_query, **super().dump().model_dump()
-        )
-
     async def _make_client(self, token: str) -> pyvo.dal.SIA2Service:
         """Create a SIA client.
 
@@ -15,9 +15,14 @@ from structlog.stdlib import BoundLogger
 
 from ...events import Events, TapQuery
 from ...exceptions import ServiceDiscoveryError, TAPClientError
-from ...models.business.tap import TAPBusinessData, TAPBusinessOptions
+from ...models.business.tap import TAPBusinessOptions
 from ...models.user import AuthenticatedUser
 from ...sentry import capturing_start_span, start_transaction
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .base import Business
 
 __all__ = ["TAPBusiness"]
@@ -54,6 +59,11 @@ class TAPBusiness[T: TAPBusinessOptions](Business[T], metaclass=ABCMeta):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -62,8 +72,12 @@ class TAPBusiness[T: TAPBusinessOptions](Business[T], metaclass=ABCMeta):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
-        self._running_query: str | None = None
         self._client: pyvo.dal.TAPService | None = None
         self._pool = ThreadPoolExecutor(max_workers=1)
 
@@ -93,14 +107,14 @@ class TAPBusiness[T: TAPBusinessOptions](Business[T], metaclass=ABCMeta):
                     "query_info",
                     {"query": query, "started_at": span.start_timestamp},
                 )
-                self._running_query = query
+                self.status.running_query = query
 
                 success = False
                 try:
                     await self.run_query(query)
                     success = True
                 finally:
-                    await self.events.tap_query.publish(
+                    self.events.tap_query.publish(
                         payload=TapQuery(
                             success=success,
                             duration=duration(span),
@@ -109,7 +123,7 @@ class TAPBusiness[T: TAPBusinessOptions](Business[T], metaclass=ABCMeta):
                         )
                     )
 
-                self._running_query = None
+                self.status.running_query = None
                 elapsed = duration(span).total_seconds()
 
             self.logger.info(f"Query finished after {elapsed} seconds")
@@ -170,12 +184,6 @@ class TAPBusiness[T: TAPBusinessOptions](Business[T], metaclass=ABCMeta):
             with contextlib.suppress(Exception):
                 job.delete()
 
-    @override
-    def dump(self) -> TAPBusinessData:
-        return TAPBusinessData(
-            running_query=self._running_query, **super().dump().model_dump()
-        )
-
     async def _make_client(self, token: str) -> pyvo.dal.TAPService:
         """Create a TAP client.
 
@@ -11,6 +11,11 @@ from structlog.stdlib import BoundLogger
 from ...events import Events
 from ...models.business.tapqueryrunner import TAPQueryRunnerOptions
 from ...models.user import AuthenticatedUser
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .tap import TAPBusiness
 
 __all__ = ["TAPQueryRunner"]
@@ -44,6 +49,11 @@ class TAPQueryRunner(TAPBusiness):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -52,9 +62,16 @@ class TAPQueryRunner(TAPBusiness):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
         self._random = SystemRandom()
 
     @override
     def get_next_query(self) -> str:
-        return self._random.choice(self.options.queries)
+        query = self._random.choice(self.options.queries)
+        self.record_context.query = query
+        return query
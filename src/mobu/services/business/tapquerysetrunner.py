@@ -16,6 +16,11 @@ from structlog.stdlib import BoundLogger
 from ...events import Events
 from ...models.business.tapquerysetrunner import TAPQuerySetRunnerOptions
 from ...models.user import AuthenticatedUser
+from ..dispatcher import ArrivalDispatcher
+from ..feed import FlockFeed
+from ..latency import FlockLatency
+from ..outcomes import FlockOutcomes
+from ..records import FlockRecords
 from .tap import TAPBusiness
 
 __all__ = ["TAPQuerySetRunner"]
@@ -49,6 +54,11 @@ class TAPQuerySetRunner(TAPBusiness):
         events: Events,
         logger: BoundLogger,
         flock: str | None,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
     ) -> None:
         super().__init__(
             options=options,
@@ -57,6 +67,11 @@ class TAPQuerySetRunner(TAPBusiness):
             events=events,
             logger=logger,
             flock=flock,
+            dispatcher=dispatcher,
+            latency=latency,
+            outcomes=outcomes,
+            feed=feed,
+            records=records,
         )
         self._random = SystemRandom()
 
@@ -92,6 +107,7 @@ class TAPQuerySetRunner(TAPBusiness):
         """
         template_name = self._random.choice(self._env.list_templates(["sql"]))
         template = self._env.get_template(template_name)
+        self.record_context.query = template_name
         return template.render(self._generate_parameters())
 
     def _generate_random_polygon(
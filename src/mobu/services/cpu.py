@@ -0,0 +1,153 @@
+"""Attribution of event loop time to the flocks that used it."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Coroutine, Generator, Iterator
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from time import perf_counter
+from typing import Any, override
+
+__all__ = [
+    "CpuAccount",
+    "TimedCoroutine",
+    "charge_tasks_to",
+    "cpu_task_factory",
+]
+
+_cpu_account: ContextVar[CpuAccount | None] = ContextVar(
+    "cpu_account", default=None
+)
+"""Account charged for tasks created in the current context."""
+
+
+class CpuAccount:
+    """Total time the event loop spent running the tasks of a flock.
+
+    Time is only recorded while `cpu_task_factory` is installed as the task
+    factory of the event loop.
+    """
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Charge time to the account.
+
+        Parameters
+        ----------
+        seconds
+            Time spent running a step of one of its tasks.
+        """
+        self.seconds += seconds
+
+
+class TimedCoroutine[T](Coroutine[Any, Any, T]):
+    """Coroutine wrapper that reports the time spent in each step.
+
+    A task runs its coroutine by repeatedly calling `send` or `throw` until
+    it finishes, so timing those calls measures the time the task spent
+    running on the event loop, excluding the time it spent waiting. This
+    works with any event loop that runs coroutines in tasks, unlike timing
+    the callbacks of a particular event loop implementation.
+
+    The time is reported in the context of the task, so context variables
+    set by the task are visible to the callback.
+
+    Parameters
+    ----------
+    coro
+        Coroutine to wrap.
+    record
+        Called with the time in seconds spent in each step.
+    """
+
+    def __init__(
+        self,
+        coro: Coroutine[Any, Any, T],
+        record: Callable[[float], None],
+    ) -> None:
+        self._coro = coro
+        self._record = record
+
+    @override
+    def send(self, value: Any) -> Any:
+        start = perf_counter()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._record(perf_counter() - start)
+
+    @override
+    def throw(self, *args: Any) -> Any:
+        start = perf_counter()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._record(perf_counter() - start)
+
+    @override
+    def close(self) -> None:
+        self._coro.close()
+
+    @override
+    def __await__(self) -> Generator[Any, None, T]:
+        return self._coro.__await__()
+
+    @override
+    def __repr__(self) -> str:
+        return repr(self._coro)
+
+
+@contextmanager
+def charge_tasks_to(account: CpuAccount | None) -> Iterator[None]:
+    """Charge tasks created inside the context manager to an account.
+
+    Tasks created by those tasks are charged to the same account, since they
+    inherit the context of the task that created them.
+
+    Parameters
+    ----------
+    account
+        Account to charge, or `None` to not charge tasks to any account.
+    """
+    token = _cpu_account.set(account)
+    try:
+        yield
+    finally:
+        _cpu_account.reset(token)
+
+
+def cpu_task_factory(
+    loop: asyncio.AbstractEventLoop,
+    coro: Coroutine[Any, Any, Any],
+    *,
+    context: Context | None = None,
+    **kwargs: Any,
+) -> asyncio.Task:
+    """Create a task whose running time is charged to its account.
+
+    Install this with `asyncio.AbstractEventLoop.set_task_factory`. Tasks
+    created outside of `charge_tasks_to` are created unchanged.
+
+    Parameters
+    ----------
+    loop
+        Event loop for the task.
+    coro
+        Coroutine the task will run.
+    context
+        Context for the task, if not the current context.
+    **kwargs
+        Other arguments for the task.
+
+    Returns
+    -------
+    asyncio.Task
+        Newly-created task.
+    """
+    account = context.get(_cpu_account) if context else _cpu_account.get()
+    if account:
+        coro = TimedCoroutine(coro, account.add)
+    return asyncio.Task(coro, loop=loop, context=context, **kwargs)
@@ -0,0 +1,114 @@
+"""Open-loop dispatch of business iterations at a target rate."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import UTC, datetime, timedelta
+from random import SystemRandom
+
+from structlog.stdlib import BoundLogger
+
+from ..models.flock import ArrivalDistribution, ArrivalRateConfig
+
+__all__ = ["ArrivalDispatcher"]
+
+
+class ArrivalDispatcher:
+    """Hands out business iterations to idle monkeys at a target rate.
+
+    Monkeys in an open-loop flock call `wait` when they are ready to run
+    another iteration. The dispatcher, running in a background job, wakes up
+    at each scheduled arrival and releases the monkey that has been waiting
+    the longest. If no monkey is waiting, the arrival is counted as missed
+    rather than queued, so that a slow service sees the load it would see
+    from real users instead of a backlog.
+
+    Arrivals are scheduled against a fixed timeline, so if the dispatcher
+    itself falls behind (a starved event loop, for instance), it releases the
+    overdue iterations immediately rather than silently lowering the rate.
+
+    Parameters
+    ----------
+    config
+        Arrival rate configuration for the flock.
+    replica_count
+        The number of running mobu instances. The configured rate is split
+        evenly among them.
+    logger
+        Logger to use.
+    """
+
+    def __init__(
+        self,
+        config: ArrivalRateConfig,
+        *,
+        replica_count: int,
+        logger: BoundLogger,
+    ) -> None:
+        self.rate = config.rate / replica_count
+        self._replica_count = replica_count
+        self.dispatched_count = 0
+        self.missed_count = 0
+        self._distribution = config.distribution
+        self._logger = logger
+        self._random = SystemRandom()
+        self._waiting: deque[asyncio.Future[datetime]] = deque()
+
+    async def run(self) -> None:
+        """Dispatch iterations until cancelled.
+
+        This should be run in a background job for the lifetime of the flock.
+        """
+        self._logger.info("Starting open-loop dispatch", rate=self.rate)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        start_time = datetime.now(tz=UTC)
+        offset = 0.0
+        while True:
+            offset += self._next_gap()
+            delay = start + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._dispatch(start_time + timedelta(seconds=offset))
+
+    def set_rate(self, rate: float) -> None:
+        """Change the target rate, starting with the next arrival.
+
+        Parameters
+        ----------
+        rate
+            New total rate across all replicas.
+        """
+        self.rate = rate / self._replica_count
+
+    async def wait(self) -> datetime:
+        """Wait until this monkey is dispatched for its next iteration.
+
+        Returns
+        -------
+        datetime
+            The time at which this iteration was scheduled to start, which
+            may be earlier than the time at which the caller wakes up.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        return await future
+
+    def _dispatch(self, intended: datetime) -> None:
+        """Release the longest-waiting monkey, or record a miss."""
+        while self._waiting:
+            future = self._waiting.popleft()
+            if not future.done():
+                future.set_result(intended)
+                self.dispatched_count += 1
+                return
+        self.missed_count += 1
+
+    def _next_gap(self) -> float:
+        """Return the number of seconds until the next arrival."""
+        match self._distribution:
+            case ArrivalDistribution.CONSTANT:
+                return 1 / self.rate
+            case ArrivalDistribution.POISSON:
+                return self._random.expovariate(self.rate)
@@ -0,0 +1,220 @@
+"""Monitoring of the health of mobu's own event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from asyncio import AbstractEventLoop, Task
+from collections.abc import Coroutine
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from structlog.stdlib import BoundLogger
+
+from ..constants import (
+    EVENT_LOOP_HEALTH_INTERVAL,
+    EVENT_LOOP_LAG_INTERVAL,
+    SLOW_CALLBACK_THRESHOLD,
+)
+from ..events import EventLoopLag, Events, SlowCallbacks
+from ..models.event_loop import EventLoopSummary, SlowCallbackSummary
+from .cpu import TimedCoroutine
+from .latency import LatencyHistogram
+
+__all__ = ["EventLoopMonitor", "set_loop_owner"]
+
+_Owner = tuple[str | None, str | None]
+"""Flock and name of a business, either of which may be unknown."""
+
+_loop_owner: ContextVar[_Owner | None] = ContextVar("loop_owner", default=None)
+"""Flock and name of the business running in the current context."""
+
+
+@dataclass
+class _SlowCallbackStats:
+    """Statistics about the slow callbacks of one business."""
+
+    count: int = 0
+    duration: float = 0.0
+    max: float = 0.0
+
+    def record(self, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.max = max(self.max, duration)
+
+
+class EventLoopMonitor:
+    """Measures the lag and slow callbacks of the running event loop.
+
+    Every monkey in the process shares one event loop, so a monkey doing
+    CPU-bound work delays all the others, and every latency they measure
+    includes that delay. This monitor makes that visible in two ways:
+
+    - A background task repeatedly sleeps for a short interval and records
+      how much later than scheduled it woke up.
+    - If enabled, every step of every task started after `start` is timed,
+      and steps that run longer than a threshold are counted as slow
+      callbacks, grouped by the flock and business running in the task's
+      context. This adds a small overhead to every task, so it is off by
+      default.
+
+    Steps are timed by a task factory installed on the running event loop,
+    which wraps any task factory that was already installed, so this works
+    with any event loop that supports task factories, including uvloop.
+    Callbacks that aren't run by a task, such as the protocol callbacks of
+    a transport, aren't timed, but all monkey business runs in tasks.
+
+    The statistics since startup are available from `summary`, and the
+    statistics for each interval are published as metrics events.
+
+    Parameters
+    ----------
+    events
+        Event publishers.
+    logger
+        Logger to use.
+    time_steps
+        Whether to time the steps of tasks to find slow callbacks.
+    """
+
+    def __init__(
+        self, events: Events, logger: BoundLogger, *, time_steps: bool = False
+    ) -> None:
+        self._events = events
+        self._logger = logger
+        self._time_steps = time_steps
+        self._threshold = SLOW_CALLBACK_THRESHOLD.total_seconds()
+        self._lag = LatencyHistogram()
+        self._interval_lag = LatencyHistogram()
+        self._slow: dict[_Owner, _SlowCallbackStats] = {}
+        self._interval_slow: dict[_Owner, _SlowCallbackStats] = {}
+        self._tasks: list[Task] = []
+        self._loop: AbstractEventLoop | None = None
+        self._previous_factory: Any = None
+
+    def start(self) -> None:
+        """Start monitoring the running event loop.
+
+        Any other task factory should be installed before this is called,
+        since it is wrapped rather than replaced.
+        """
+        if self._time_steps:
+            self._loop = asyncio.get_running_loop()
+            self._previous_factory = self._loop.get_task_factory()
+            self._loop.set_task_factory(self._task_factory)
+        self._tasks = [
+            asyncio.create_task(self._sample_lag()),
+            asyncio.create_task(self._publish()),
+        ]
+
+    async def aclose(self) -> None:
+        """Stop monitoring the event loop."""
+        for task in self._tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        if self._loop:
+            if self._loop.get_task_factory() == self._task_factory:
+                self._loop.set_task_factory(self._previous_factory)
+            self._loop = None
+            self._previous_factory = None
+
+    def summary(self) -> EventLoopSummary:
+        """Summarize the health of the event loop since startup."""
+        slow_callbacks = [
+            SlowCallbackSummary(
+                flock=flock,
+                business=business,
+                count=stats.count,
+                duration=stats.duration,
+                max=stats.max,
+            )
+            for (flock, business), stats in self._slow.items()
+        ]
+        return EventLoopSummary(
+            lag=self._lag.summary(),
+            slow_callback_threshold=(
+                self._threshold if self._time_steps else None
+            ),
+            slow_callbacks=slow_callbacks,
+        )
+
+    async def _publish(self) -> None:
+        """Publish metrics events for each interval."""
+        interval = EVENT_LOOP_HEALTH_INTERVAL.total_seconds()
+        while True:
+            await asyncio.sleep(interval)
+            lag = self._interval_lag
+            slow = self._interval_slow
+            self._interval_lag = LatencyHistogram()
+            self._interval_slow = {}
+            event = EventLoopLag(
+                lag_p50=lag.percentile(50) or timedelta(0),
+                lag_p99=lag.percentile(99) or timedelta(0),
+                lag_max=lag.percentile(100) or timedelta(0),
+                slow_callback_count=sum(s.count for s in slow.values()),
+            )
+            self._events.event_loop_lag.publish(event)
+            for (flock, business), stats in slow.items():
+                slow_event = SlowCallbacks(
+                    flock=flock,
+                    business=business,
+                    count=stats.count,
+                    duration=timedelta(seconds=stats.duration),
+                    max_duration=timedelta(seconds=stats.max),
+                )
+                self._events.slow_callbacks.publish(slow_event)
+
+    def _record_step(self, elapsed: float) -> None:
+        """Record a step of a task if it was slow.
+
+        Called in the context of the task, so the business that owns it can
+        be found from the context.
+        """
+        if elapsed < self._threshold:
+            return
+        key = _loop_owner.get() or (None, None)
+        for stats in (self._slow, self._interval_slow):
+            if key not in stats:
+                stats[key] = _SlowCallbackStats()
+            stats[key].record(elapsed)
+
+    async def _sample_lag(self) -> None:
+        """Repeatedly measure how late the event loop wakes up a sleeper."""
+        loop = asyncio.get_running_loop()
+        interval = EVENT_LOOP_LAG_INTERVAL.total_seconds()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag = timedelta(seconds=loop.time() - start - interval)
+            self._lag.record(lag)
+            self._interval_lag.record(lag)
+
+    def _task_factory(
+        self,
+        loop: AbstractEventLoop,
+        coro: Coroutine[Any, Any, Any],
+        **kwargs: Any,
+    ) -> Task:
+        """Create a task whose steps are timed."""
+        timed = TimedCoroutine(coro, self._record_step)
+        if self._previous_factory:
+            return self._previous_factory(loop, timed, **kwargs)
+        return Task(timed, loop=loop, **kwargs)
+
+
+def set_loop_owner(flock: str | None, business: str) -> None:
+    """Attribute event loop work in the current context to a business.
+
+    Parameters
+    ----------
+    flock
+        Flock running the business, if any.
+    business
+        Name of the business.
+    """
+    _loop_owner.set((flock, business))
@@ -0,0 +1,203 @@
+"""Background publishing of metrics events."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any, TypeAlias
+
+import structlog
+from safir.metrics import EventPayload, EventPublisher
+from structlog.stdlib import BoundLogger
+
+from ..constants import EVENT_BATCH_SIZE, EVENT_BUFFER_SIZE
+from ..models.event_buffer import EventBufferSummary
+
+__all__ = ["BufferedPublisher", "EventBuffer"]
+
+_Event: TypeAlias = tuple[EventPublisher[Any], EventPayload]
+"""A queued event and the publisher to publish it with."""
+
+
+class EventBuffer:
+    """Publishes metrics events from a background task.
+
+    Events are queued by `BufferedPublisher` and published by a single task,
+    which publishes up to a batch of waiting events concurrently each time.
+    Slow publishing, such as from Kafka latency or backpressure, therefore
+    never adds to the time of the business iterations being measured.
+
+    The number of queued events is bounded. If the task falls that far
+    behind, further events are dropped until it catches up, with a warning
+    when events start being dropped and a count of the dropped events once
+    they can be queued again. Events that fail to publish are logged and
+    counted but not retried.
+
+    Parameters
+    ----------
+    size
+        Maximum number of queued events.
+    batch_size
+        Maximum number of events to publish concurrently.
+    logger
+        Logger to use for dropped events and publishing failures.
+    """
+
+    def __init__(
+        self,
+        size: int = EVENT_BUFFER_SIZE,
+        batch_size: int = EVENT_BATCH_SIZE,
+        logger: BoundLogger | None = None,
+    ) -> None:
+        self._size = size
+        self._batch_size = batch_size
+        self._logger = logger or structlog.get_logger("mobu")
+        self._queue: deque[_Event] = deque()
+        self._ready = asyncio.Event()
+        self._done = asyncio.Condition()
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+        self._queued = 0
+        self._published = 0
+        self._dropped = 0
+        self._overflow = 0
+        self._failed = 0
+        self._batches = 0
+
+    async def aclose(self) -> None:
+        """Publish all queued events and stop the background task.
+
+        Events queued after this are dropped.
+        """
+        self._closed = True
+        if self._task:
+            self._ready.set()
+            await self._task
+            self._task = None
+        else:
+            await self._drain()
+
+    async def flush(self) -> None:
+        """Wait until every event queued so far has been published."""
+        if not self._task:
+            await self._drain()
+            return
+        target = self._queued
+        async with self._done:
+            await self._done.wait_for(
+                lambda: self._published + self._failed >= target
+            )
+
+    def put[P: EventPayload](
+        self, publisher: EventPublisher[P], payload: P
+    ) -> bool:
+        """Queue an event to be published.
+
+        Parameters
+        ----------
+        publisher
+            Publisher for that type of event.
+        payload
+            Event to publish.
+
+        Returns
+        -------
+        bool
+            `True` if the event was queued, `False` if it was dropped because
+            too many events are already queued or the buffer was closed.
+        """
+        if self._closed or len(self._queue) >= self._size:
+            if not self._overflow:
+                event = type(payload).__name__
+                msg = "Dropping metrics events"
+                reason = "closed" if self._closed else "full"
+                self._logger.warning(msg, event_type=event, reason=reason)
+            self._dropped += 1
+            self._overflow += 1
+            return False
+        if self._overflow:
+            msg = "Queueing metrics events again"
+            self._logger.info(msg, dropped=self._overflow)
+            self._overflow = 0
+        self._queue.append((publisher, payload))
+        self._queued += 1
+        self._ready.set()
+        return True
+
+    def start(self) -> None:
+        """Start publishing queued events in the background."""
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    def summary(self) -> EventBufferSummary:
+        """Return statistics about the buffer."""
+        return EventBufferSummary(
+            queued=len(self._queue),
+            published=self._published,
+            dropped=self._dropped,
+            failed=self._failed,
+            batches=self._batches,
+        )
+
+    async def _drain(self) -> None:
+        """Publish queued events until there are none left."""
+        while self._queue:
+            count = min(len(self._queue), self._batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            await self._publish_batch(batch)
+
+    async def _publish_batch(self, batch: list[_Event]) -> None:
+        """Publish a batch of events concurrently."""
+        awaits = [p.publish(e) for p, e in batch]
+        results = await asyncio.gather(*awaits, return_exceptions=True)
+        for (_, payload), result in zip(batch, results, strict=True):
+            if isinstance(result, BaseException):
+                self._failed += 1
+                event = type(payload).__name__
+                msg = "Failed to publish metrics event"
+                self._logger.error(msg, event_type=event, exc_info=result)
+            else:
+                self._published += 1
+        self._batches += 1
+        async with self._done:
+            self._done.notify_all()
+
+    async def _run(self) -> None:
+        """Publish queued events until the buffer is closed."""
+        while not self._closed or self._queue:
+            await self._ready.wait()
+            self._ready.clear()
+            await self._drain()
+
+
+class BufferedPublisher[P: EventPayload]:
+    """Publisher of one type of metrics event through an `EventBuffer`.
+
+    Parameters
+    ----------
+    publisher
+        Underlying publisher for that type of event.
+    buffer
+        Buffer shared by all publishers.
+    """
+
+    def __init__(
+        self, publisher: EventPublisher[P], buffer: EventBuffer
+    ) -> None:
+        self.publisher = publisher
+        self._buffer = buffer
+
+    def publish(self, payload: P) -> bool:
+        """Queue an event to be published in the background.
+
+        Parameters
+        ----------
+        payload
+            Event to publish.
+
+        Returns
+        -------
+        bool
+            `True` if the event was queued, `False` if it was dropped.
+        """
+        return self._buffer.put(self.publisher, payload)
@@ -0,0 +1,90 @@
+"""Streaming export of the status and logs of a flock."""
+
+from __future__ import annotations
+
+import json
+import tarfile
+import time
+from collections.abc import Iterator
+
+from .flock import Flock
+from .logstore import MonkeyLog
+
+__all__ = ["export_flock"]
+
+
+def export_flock(flock: Flock, *, include_logs: bool) -> Iterator[bytes]:
+    """Export the status and logs of every monkey in a flock as a tar file.
+
+    The status of the monkeys and their logs are collected when
+    this is called, so it should be called from the event loop. The archive
+    itself is generated lazily as the returned iterator is consumed, reading
+    each log in chunks, so nothing is staged in memory or on disk. Since
+    reading the logs blocks, the iterator should be consumed in a thread, as
+    `~fastapi.responses.StreamingResponse` does for synchronous iterators.
+
+    The archive is not compressed, since the response will be compressed
+    for clients that accept it.
+
+    Parameters
+    ----------
+    flock
+        Flock to export.
+    include_logs
+        Whether to include the log of each monkey.
+
+    Returns
+    -------
+    Iterator of bytes
+        Chunks of a tar archive containing :file:`<flock>/monkeys.jsonl`,
+        with the data of one monkey per line in the form of
+        `~mobu.models.monkey.MonkeyData`, and, if logs are included, the log
+        of each monkey as :file:`<flock>/logs/<monkey>.log`.
+    """
+    status = "".join(json.dumps(m) + "\n" for m in flock.dump()["monkeys"])
+    logs = {}
+    if include_logs:
+        for name in flock.list_monkeys():
+            logs[name] = flock.get_monkey(name).log()
+    return _generate_archive(flock.name, status.encode(), logs)
+
+
+def _generate_archive(
+    name: str, status: bytes, logs: dict[str, MonkeyLog]
+) -> Iterator[bytes]:
+    """Generate a tar archive of the status and logs of a flock."""
+    mtime = int(time.time())
+    yield _header(f"{name}/monkeys.jsonl", len(status), mtime)
+    yield status + _padding(len(status))
+    for monkey, log in logs.items():
+        # The log may still be growing, so only include as much of it as was
+        # there when its header was written.
+        start, end = log.bounds()
+        size = end - start
+        yield _header(f"{name}/logs/{monkey}.log", size, mtime)
+        written = 0
+        for chunk in log.read(start, end):
+            written += len(chunk)
+            yield chunk
+
+        # Part of the log may have been deleted while it was being read, in
+        # which case fill the rest of its space in the archive with nulls.
+        if written < size:
+            yield tarfile.NUL * (size - written)
+        yield _padding(size)
+    yield tarfile.NUL * tarfile.BLOCKSIZE * 2
+
+
+def _header(path: str, size: int, mtime: int) -> bytes:
+    """Construct the tar header for a file."""
+    info = tarfile.TarInfo(path)
+    info.size = size
+    info.mtime = mtime
+    info.mode = 0o644
+    return info.tobuf(tarfile.PAX_FORMAT)
+
+
+def _padding(size: int) -> bytes:
+    """Construct the padding to the end of the last block of a file."""
+    remainder = size % tarfile.BLOCKSIZE
+    return tarfile.NUL * (tarfile.BLOCKSIZE - remainder) if remainder else b""
@@ -0,0 +1,227 @@
+"""Feed of events about the monkeys in a flock."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from collections.abc import AsyncGenerator
+from datetime import timedelta
+from typing import Any
+
+from ..constants import FEED_BUFFER_SIZE, FEED_KEEPALIVE_INTERVAL
+from ..models.monkey import MonkeyState
+
+__all__ = ["FeedSubscription", "FlockFeed"]
+
+
+class FeedSubscription:
+    """Events from the feed of a flock waiting to be sent to one subscriber.
+
+    Parameters
+    ----------
+    feed
+        Feed the subscription is to.
+    size
+        Maximum number of events to buffer. Further events are dropped until
+        the subscriber catches up, and the subscriber is then sent a
+        ``dropped`` event with the number of events it missed.
+    """
+
+    def __init__(self, feed: FlockFeed, size: int = FEED_BUFFER_SIZE) -> None:
+        self.dropped = 0
+        self._feed = feed
+        self._size = size
+        self._messages: deque[bytes] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def close(self) -> None:
+        """End the subscription once any buffered events have been sent."""
+        self._closed = True
+        self._ready.set()
+
+    def put(self, message: bytes) -> None:
+        """Buffer an event, or drop it if the buffer is full.
+
+        Parameters
+        ----------
+        message
+            Event encoded as a server-sent event.
+        """
+        if len(self._messages) >= self._size:
+            self.dropped += 1
+            return
+        self._messages.append(message)
+        self._ready.set()
+
+    async def stream(
+        self, keepalive: timedelta = FEED_KEEPALIVE_INTERVAL
+    ) -> AsyncGenerator[bytes]:
+        """Generate the events of the subscription as they are published.
+
+        The subscription is only added to the feed once the generator is
+        started, and is removed from the feed when the generator is closed,
+        which for a streaming response happens when the client disconnects.
+        A subscription whose stream is never started, such as because the
+        client disconnected before the response was sent, therefore never
+        buffers any events.
+
+        Parameters
+        ----------
+        keepalive
+            How often to generate a comment if there are no events.
+
+        Yields
+        ------
+        bytes
+            Each event, encoded as a server-sent event.
+        """
+        self._feed.add(self)
+        try:
+            while True:
+                if self._messages:
+                    yield self._messages.popleft()
+                elif self.dropped:
+                    data = {"count": self.dropped}
+                    self.dropped = 0
+                    yield _encode("dropped", data)
+                elif self._closed:
+                    return
+                else:
+                    self._ready.clear()
+                    try:
+                        async with asyncio.timeout(keepalive.total_seconds()):
+                            await self._ready.wait()
+                    except TimeoutError:
+                        yield b": keepalive\n\n"
+        finally:
+            self._feed.unsubscribe(self)
+
+
+class FlockFeed:
+    """Broadcasts events about the monkeys in a flock to subscribers.
+
+    Monkeys and their businesses publish state changes, the results of
+    iterations, and errors as they happen. Each event is encoded as a
+    server-sent event once and then buffered for every subscriber, so
+    following a flock never requires serializing the status of the whole
+    flock, and publishing costs nothing if there are no subscribers.
+
+    Parameters
+    ----------
+    buffer_size
+        Maximum number of events to buffer for each subscriber.
+    """
+
+    def __init__(self, buffer_size: int = FEED_BUFFER_SIZE) -> None:
+        self._buffer_size = buffer_size
+        self._subscribers: set[FeedSubscription] = set()
+        self._closed = False
+
+    def add(self, subscription: FeedSubscription) -> None:
+        """Start buffering published events for a subscription.
+
+        If the feed has already been closed, the subscription is closed
+        instead.
+
+        Parameters
+        ----------
+        subscription
+            Subscription to add.
+        """
+        if self._closed:
+            subscription.close()
+        else:
+            self._subscribers.add(subscription)
+
+    def close(self) -> None:
+        """End all subscriptions, such as when the flock is stopped."""
+        self._closed = True
+        for subscription in self._subscribers:
+            subscription.close()
+
+    def publish_error(self, monkey: str, error: Exception) -> None:
+        """Publish an exception that stopped the business of a monkey.
+
+        Parameters
+        ----------
+        monkey
+            Name of the monkey.
+        error
+            Exception raised by the business.
+        """
+        if self._subscribers:
+            data = {"monkey": monkey, "error": type(error).__name__}
+            if message := str(error):
+                data["message"] = message
+            self._publish("error", data)
+
+    def publish_iteration(
+        self, monkey: str, *, success: bool, duration: timedelta | None
+    ) -> None:
+        """Publish the result of an iteration of the business of a monkey.
+
+        Parameters
+        ----------
+        monkey
+            Name of the monkey.
+        success
+            Whether the iteration succeeded.
+        duration
+            Time from the (scheduled) start to the end of the iteration, or
+            `None` if the business failed before its first iteration.
+        """
+        if self._subscribers:
+            seconds = None
+            if duration is not None:
+                seconds = duration.total_seconds()
+            data = {"monkey": monkey, "success": success, "duration": seconds}
+            self._publish("iteration", data)
+
+    def publish_state(self, monkey: str, state: MonkeyState) -> None:
+        """Publish a change to the state of a monkey.
+
+        Parameters
+        ----------
+        monkey
+            Name of the monkey.
+        state
+            New state of the monkey.
+        """
+        if self._subscribers:
+            self._publish("state", {"monkey": monkey, "state": state.value})
+
+    def subscribe(self) -> FeedSubscription:
+        """Create a subscription to events.
+
+        Returns
+        -------
+        FeedSubscription
+            New subscription, which receives the events published once its
+            stream has been started, and is removed from the feed when its
+            stream is closed.
+        """
+        return FeedSubscription(self, self._buffer_size)
+
+    def unsubscribe(self, subscription: FeedSubscription) -> None:
+        """Remove a subscription.
+
+        Parameters
+        ----------
+        subscription
+            Subscription to remove.
+        """
+        self._subscribers.discard(subscription)
+
+    def _publish(self, event: str, data: dict[str, Any]) -> None:
+        """Encode an event and buffer it for every subscriber."""
+        message = _encode(event, data)
+        for subscription in self._subscribers:
+            subscription.put(message)
+
+
+def _encode(event: str, data: dict[str, Any]) -> bytes:
+    """Encode an event as a server-sent event."""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n".encode()
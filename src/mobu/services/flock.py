@@ -4,25 +4,46 @@ from __future__ import annotations
 
 import asyncio
 import math
+from collections.abc import Collection
+from contextlib import aclosing, suppress
 from datetime import UTC, datetime
-from itertools import batched
+from typing import Any
 
-from aiojobs import Scheduler
+from aiojobs import Job, Scheduler
 from httpx import AsyncClient
 from rubin.repertoire import DiscoveryClient
 from structlog.stdlib import BoundLogger
 
+from ..dependencies.config import config_dependency
 from ..events import Events
-from ..exceptions import MonkeyNotFoundError
+from ..exceptions import FlockResizeError, MonkeyNotFoundError
 from ..models.business.notebookrunnercounting import (
     NotebookRunnerCountingConfig,
     NotebookRunnerCountingOptions,
 )
-from ..models.flock import FlockConfig, FlockData, FlockSummary
+from ..models.flock import (
+    ArrivalSummary,
+    CpuSummary,
+    FlockConfig,
+    FlockSummary,
+    FlockUpdate,
+)
+from ..models.monkey import MonkeyField
 from ..models.user import AuthenticatedUser, User, UserSpec
 from ..services.repo import RepoManager
 from ..storage.gafaelfawr import GafaelfawrStorage
+from .cpu import CpuAccount
+from .dispatcher import ArrivalDispatcher
+from .feed import FeedSubscription, FlockFeed
+from .latency import FlockLatency
+from .logwriter import LogWriter
 from .monkey import Monkey
+from .outcomes import FlockOutcomes
+from .probe import CapacityProber
+from .profile import LoadProfileRunner
+from .records import FlockRecords
+from .table import MonkeyPage, MonkeySelection, MonkeyTable
+from .workers import WorkerPool
 
 __all__ = ["Flock"]
 
@@ -30,6 +51,14 @@ __all__ = ["Flock"]
 class Flock:
     """Container for a group of monkeys all running the same business.
 
+    If the flock is configured with an arrival rate, it also runs an
+    `~mobu.services.dispatcher.ArrivalDispatcher` in the background that
+    starts iterations on idle monkeys at that rate. If it is configured with
+    a load profile, it runs a `~mobu.services.profile.LoadProfileRunner` in
+    the background that changes its size or rate over time. If it is
+    configured to search for capacity, it similarly runs a
+    `~mobu.services.probe.CapacityProber`.
+
     Parameters
     ----------
     flock_config
@@ -50,6 +79,10 @@ class Flock:
         Event publishers.
     repo_manager
         For efficiently cloning git repos.
+    worker_pool
+        Worker processes for CPU-bound work of the monkeys.
+    log_writer
+        Background writer for the logs of the monkeys.
     logger
         Global logger.
     """
@@ -66,6 +99,8 @@ class Flock:
         http_client: AsyncClient,
         events: Events,
         repo_manager: RepoManager,
+        worker_pool: WorkerPool,
+        log_writer: LogWriter,
         logger: BoundLogger,
     ) -> None:
         self.name = flock_config.name
@@ -78,17 +113,139 @@ class Flock:
         self._http_client = http_client
         self._events = events
         self._repo_manager = repo_manager
+        self._worker_pool = worker_pool
+        self._log_writer = log_writer
         self._logger = logger.bind(flock=self.name)
         self._monkeys: dict[str, Monkey] = {}
+        self._table = MonkeyTable()
         self._start_time: datetime | None = None
+        self._update_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+
+        # Usernames generated from a user spec keep the padding for the
+        # initial count, so that resizing doesn't rename existing monkeys.
+        self._padding = int(math.log10(max(flock_config.count, 1)) + 1)
+        self._latency = FlockLatency()
+        self._counts = FlockOutcomes()
+        self._cpu = CpuAccount()
+        self._feed = FlockFeed()
+        self._records = FlockRecords(self.name)
+        self._dispatcher: ArrivalDispatcher | None = None
+        self._dispatch_job: Job | None = None
+        if flock_config.arrival_rate:
+            self._dispatcher = ArrivalDispatcher(
+                flock_config.arrival_rate,
+                replica_count=replica_count,
+                logger=self._logger,
+            )
+        arrival_rate = flock_config.arrival_rate
+        self._profile: LoadProfileRunner | None = None
+        self._profile_job: Job | None = None
+        if flock_config.load_profile:
+            self._profile = LoadProfileRunner(
+                flock_config.load_profile,
+                flock=self.name,
+                business=flock_config.business.type,
+                count=self._monkey_count,
+                rate=arrival_rate.rate if arrival_rate else None,
+                resize=self._resize,
+                dispatcher=self._dispatcher,
+                latency=self._latency,
+                events=events,
+                logger=self._logger,
+            )
+        self._prober: CapacityProber | None = None
+        self._probe_job: Job | None = None
+        if flock_config.capacity_probe:
+            self._prober = CapacityProber(
+                flock_config.capacity_probe,
+                flock=self.name,
+                business=flock_config.business.type,
+                count=flock_config.count,
+                rate=arrival_rate.rate if arrival_rate else None,
+                resize=self._resize,
+                outcomes=self._outcomes,
+                dispatcher=self._dispatcher,
+                latency=self._latency,
+                events=events,
+                logger=self._logger,
+            )
+
+    @property
+    def version(self) -> str:
+        """Version of the data returned by `dump`.
+
+        This changes whenever the configuration of the flock or the status of
+        any of its monkeys changes.
+        """
+        return str(self._table.version)
+
+    @property
+    def summary_version(self) -> str:
+        """Version of the data returned by `summary`.
+
+        Besides changing with `version`, this changes every time the rolling
+        windows of outcomes move forward and whenever any other statistic in
+        the summary changes: latencies, the counts of the dispatcher, the
+        progress of a capacity search, and the CPU time used.
+        """
+        parts: list[object] = [
+            self._table.version,
+            self._counts.epoch,
+            self._latency.version,
+        ]
+        if self._dispatcher:
+            parts.append(self._dispatcher.rate)
+            parts.append(self._dispatcher.dispatched_count)
+            parts.append(self._dispatcher.missed_count)
+        if self._prober:
+            parts.append(self._prober.version)
+        if config_dependency.config.cpu_accounting:
+            parts.append(self._cpu.seconds)
+        return "-".join(str(p) for p in parts)
+
+    def dump(
+        self,
+        page: MonkeyPage | None = None,
+        fields: Collection[MonkeyField] | None = None,
+    ) -> dict[str, Any]:
+        """Return information about running monkeys.
+
+        The status of the monkeys is serialized directly from the status
+        table of the flock rather than through a model for each monkey.
 
-    def dump(self) -> FlockData:
-        """Return information about all running monkeys."""
-        return FlockData(
-            name=self._config.name,
-            config=self._config,
-            monkeys=[m.dump() for m in self._monkeys.values()],
+        Parameters
+        ----------
+        page
+            If given, only include these monkeys rather than all of them.
+        fields
+            If given, only include these fields for each monkey.
+
+        Returns
+        -------
+        dict
+            JSON-compatible data in the form of `~mobu.models.flock.FlockData`.
+        """
+        config = self._config.model_dump(
+            mode="json", exclude_none=True, exclude_unset=True
         )
+        if page is None:
+            page = self._table.select(MonkeySelection())
+        return {
+            "name": self._config.name,
+            "config": config,
+            "monkeys": page.to_json(fields),
+        }
+
+    def export_records(self) -> list[bytes]:
+        """Return the run records of the flock as a gzipped CSV file.
+
+        Returns
+        -------
+        list of bytes
+            Chunks of the file, each a complete gzip member.
+        """
+        return self._records.export()
 
     def get_monkey(self, name: str) -> Monkey:
         """Retrieve a given monkey by name.
@@ -117,67 +274,133 @@ class Flock:
         """List the names of the monkeys."""
         return sorted(self._monkeys.keys())
 
+    def select_monkeys(self, selection: MonkeySelection) -> MonkeyPage:
+        """Select a page of monkeys by their status.
+
+        Parameters
+        ----------
+        selection
+            Criteria for the monkeys to select.
+
+        Returns
+        -------
+        MonkeyPage
+            Matching monkeys, in the order they were started.
+        """
+        return self._table.select(selection)
+
+    def subscribe(self) -> FeedSubscription:
+        """Subscribe to events about the monkeys of the flock.
+
+        Returns
+        -------
+        FeedSubscription
+            Subscription to events published once its stream has been
+            started, which ends when the flock is stopped.
+        """
+        return self._feed.subscribe()
+
     def summary(self) -> FlockSummary:
         """Return summary statistics about the flock."""
-        count = 0
-        successes = 0
-        failures = 0
-        for monkey in self._monkeys.values():
-            count += 1
-            successes += monkey.business.success_count
-            failures += monkey.business.failure_count
+        successes, failures = self._outcomes()
+        arrival = None
+        if self._dispatcher:
+            arrival = ArrivalSummary(
+                rate=self._dispatcher.rate,
+                dispatched_count=self._dispatcher.dispatched_count,
+                missed_count=self._dispatcher.missed_count,
+            )
+        cpu = None
+        if config_dependency.config.cpu_accounting:
+            iterations = successes + failures
+            cpu = CpuSummary(
+                seconds=self._cpu.seconds,
+                per_iteration=(
+                    self._cpu.seconds / iterations if iterations else None
+                ),
+            )
         return FlockSummary(
             name=self.name,
             business=self._config.business.type,
             start_time=self._start_time,
-            monkey_count=count,
+            monkey_count=len(self._monkeys),
             success_count=successes,
             failure_count=failures,
+            recent=self._counts.window_summaries(),
+            arrival=arrival,
+            latency=self._latency.summary(),
+            recent_phases=self._table.recent_phases.summary(),
+            stages=self._profile.summary() if self._profile else None,
+            probe=self._prober.summary() if self._prober else None,
+            cpu=cpu,
         )
 
     async def start(self) -> None:
         """Start all the monkeys."""
-        self._logger.info("Creating users")
-        users = await self._create_users()
         self._logger.info("Starting flock")
-        for user in users:
-            monkey = self._create_monkey(user)
-            self._monkeys[user.username] = monkey
+        async with self._update_lock:
+            await self._start_monkeys(self._replica_users())
+            if self._stopping.is_set():
+                return
 
-        # Start in staggered batches
-        if self._config.start_batch_size and self._config.start_batch_wait:
-            # start_batch_size is the number of monkeys that should be started
-            # concurrently across ALL replicas, so we should only start our
-            # share of the batch.
-            size = int(self._config.start_batch_size / self._replica_count)
-            wait_secs = self._config.start_batch_wait.total_seconds()
-            batches = list(batched(self._monkeys.values(), size, strict=False))
-            num = len(batches)
-            for i in range(num):
-                batch = batches[i]
-                logger = self._logger.bind(
-                    current_batch=i + 1,
-                    num_batches=num,
-                    monkeys_in_batch=len(batch),
-                )
-                logger.info("starting batch")
-                tasks = [monkey.start(self._scheduler) for monkey in batch]
-                await asyncio.gather(*tasks)
+            # Only start dispatching once every batch of monkeys has been
+            # started so that the staggered start isn't reported as missed
+            # iterations.
+            if self._dispatcher:
+                dispatch = self._dispatcher.run()
+                self._dispatch_job = await self._scheduler.spawn(dispatch)
+            if self._profile:
+                profile = self._profile.run()
+                self._profile_job = await self._scheduler.spawn(profile)
+            if self._prober:
+                probe = self._prober.run()
+                self._probe_job = await self._scheduler.spawn(probe)
+
+            self._start_time = datetime.now(tz=UTC)
+            self._table.version.bump()
+
+    async def update(self, update: FlockUpdate) -> None:
+        """Change the configuration of the running flock.
+
+        Changing the count starts or stops only the monkeys in the
+        difference. Other monkeys keep running with their existing users and
+        labs.
+
+        Parameters
+        ----------
+        update
+            Changes to make to the flock.
 
-                # Don't wait after starting the last batch
-                if i < num - 1:
-                    logger.info("pausing for batch", wait_secs=wait_secs)
-                    await asyncio.sleep(wait_secs)
+        Raises
+        ------
+        FlockResizeError
+            Raised if the count was changed but the flock runs as an explicit
+            list of users.
+        """
+        if update.count is not None and self._config.users:
+            raise FlockResizeError(self.name)
 
-        # Start all at the same time
-        else:
-            tasks = [
-                monkey.start(self._scheduler)
-                for monkey in self._monkeys.values()
-            ]
-            await asyncio.gather(*tasks)
+        # All monkeys share the options object of the flock configuration,
+        # so changing it changes the options of every running monkey.
+        fields = {"idle_time", "error_idle_time"}
+        changes = update.model_dump(include=fields, exclude_none=True)
+        if changes:
+            self._config.business.update_options(changes)
+            self._table.version.bump()
 
-        self._start_time = datetime.now(tz=UTC)
+        # Serialize resizes so that each one sees the monkeys started or
+        # stopped by the previous one.
+        if update.count is None:
+            return
+        async with self._update_lock:
+            if self._stopping.is_set():
+                return
+            self._config = self._config.model_copy(
+                update={"count": update.count}
+            )
+            self._table.version.bump()
+            await self._remove_monkeys()
+            await self._add_monkeys()
 
     async def stop(self) -> None:
         """Stop all the monkeys.
@@ -185,10 +408,28 @@ class Flock:
         Stopping a monkey can require waiting for a timeout from JupyterHub if
         it were in the middle of spawning, so stop them all in parallel to
         avoid waiting for the sum of all timeouts.
+
+        A start or resize that is still in progress stops starting monkeys
+        before its next batch, and is waited for so that it can't start any
+        monkeys once the flock has been stopped.
         """
         self._logger.info("Stopping flock")
-        awaits = [m.stop() for m in self._monkeys.values()]
-        await asyncio.gather(*awaits)
+        self._stopping.set()
+        async with self._update_lock:
+            if self._profile_job:
+                await self._profile_job.close()
+                self._profile_job = None
+            if self._probe_job:
+                await self._probe_job.close()
+                self._probe_job = None
+            if self._dispatch_job:
+                await self._dispatch_job.close()
+                self._dispatch_job = None
+            awaits = [m.stop() for m in self._monkeys.values()]
+            await asyncio.gather(*awaits)
+            self._feed.close()
+            for monkey in self._monkeys.values():
+                monkey.delete_log()
 
     def signal_refresh(self) -> None:
         """Signal all the monkeys to refresh their busniess."""
@@ -209,6 +450,118 @@ class Flock:
                 return True
         return False
 
+    async def _add_monkeys(self) -> None:
+        """Start monkeys for any users of this replica without one."""
+        users = [
+            u for u in self._replica_users() if u.username not in self._monkeys
+        ]
+        if not users:
+            return
+        self._logger.info("Adding monkeys", count=len(users))
+        await self._start_monkeys(users)
+
+    def _monkey_count(self) -> int:
+        """Return the total number of monkeys the flock should run."""
+        return self._config.count
+
+    def _outcomes(self) -> tuple[int, int]:
+        """Return the total successes and failures of the flock so far."""
+        return self._counts.success_count, self._counts.failure_count
+
+    async def _remove_monkeys(self) -> None:
+        """Stop the monkeys whose users are no longer part of the flock."""
+        usernames = {u.username for u in self._replica_users()}
+        names = [n for n in self._monkeys if n not in usernames]
+        if not names:
+            return
+        self._logger.info("Removing monkeys", count=len(names))
+        await self._discard_monkeys(names)
+
+    async def _discard_monkeys(self, names: list[str]) -> None:
+        """Stop some monkeys and forget them."""
+        # Only forget the monkeys once they have stopped, so that if this is
+        # cancelled, stopping the flock still stops them.
+        await asyncio.gather(*(self._monkeys[n].stop() for n in names))
+        for name in names:
+            self._monkeys.pop(name).delete_log()
+            self._table.remove(name)
+
+    async def _resize(self, count: int) -> None:
+        """Change the total number of monkeys in the flock."""
+        await self.update(FlockUpdate(count=count))
+
+    async def _start_monkeys(self, users: list[User]) -> None:
+        """Create users and start their monkeys, as each user is ready.
+
+        Tokens for the users are created concurrently, and each monkey is
+        started as soon as its token exists rather than once every token
+        exists. If so configured, monkeys are started in staggered batches,
+        and a batch is started once all of its tokens exist and the wait since
+        the previous batch has passed.
+
+        If creating a token fails, the monkeys already created are stopped and
+        removed again, so that a failed start or resize doesn't leave part of
+        the requested monkeys running.
+        """
+        size = 1
+        wait_secs = 0.0
+        if self._config.start_batch_size and self._config.start_batch_wait:
+            # start_batch_size is the number of monkeys that should be started
+            # concurrently across ALL replicas, so we should only start our
+            # share of the batch.
+            size = int(self._config.start_batch_size / self._replica_count)
+            size = max(size, 1)
+            wait_secs = self._config.start_batch_wait.total_seconds()
+        num = math.ceil(len(users) / size)
+
+        loop = asyncio.get_running_loop()
+        scopes = self._config.scopes
+        tokens = self._gafaelfawr.create_service_tokens(users, scopes)
+        batch: list[Monkey] = []
+        created: list[str] = []
+        current = 0
+        next_start = loop.time()
+        try:
+            async with aclosing(tokens):
+                async for user in tokens:
+                    monkey = self._create_monkey(user)
+                    self._monkeys[user.username] = monkey
+                    self._table.add(monkey.status)
+                    created.append(user.username)
+                    batch.append(monkey)
+                    if len(batch) < size and len(created) < len(users):
+                        continue
+
+                    # Tokens for later batches are created while pausing, so
+                    # only wait for whatever is left of the pause after the
+                    # previous batch.
+                    current += 1
+                    if wait_secs:
+                        logger = self._logger.bind(
+                            current_batch=current,
+                            num_batches=num,
+                            monkeys_in_batch=len(batch),
+                        )
+                        delay = next_start - loop.time()
+                        if delay > 0:
+                            logger.info("pausing for batch", wait_secs=delay)
+                            with suppress(TimeoutError):
+                                stopping = self._stopping.wait()
+                                await asyncio.wait_for(stopping, delay)
+                        if not self._stopping.is_set():
+                            logger.info("starting batch")
+                    if self._stopping.is_set():
+                        return
+                    tasks = [monkey.start(self._scheduler) for monkey in batch]
+                    await asyncio.gather(*tasks)
+                    batch = []
+                    next_start = loop.time() + wait_secs
+        except Exception:
+            msg = "Failed to start monkeys, removing new monkeys"
+            self._logger.exception(msg, count=len(created))
+            await self._discard_monkeys(created)
+            raise
+
     def _create_monkey(self, user: AuthenticatedUser) -> Monkey:
         """Create a monkey that will run as a given user."""
         return Monkey(
@@ -221,10 +574,18 @@ class Flock:
             events=self._events,
             repo_manager=self._repo_manager,
             logger=self._logger,
+            dispatcher=self._dispatcher,
+            latency=self._latency,
+            outcomes=self._counts,
+            feed=self._feed,
+            records=self._records,
+            worker_pool=self._worker_pool,
+            log_writer=self._log_writer,
+            cpu=self._cpu,
         )
 
-    async def _create_users(self) -> list[AuthenticatedUser]:
-        """Create the authenticated users the monkeys will run as."""
+    def _replica_users(self) -> list[User]:
+        """Return the users this replica should run monkeys as."""
         users = self._config.users
         if not users:
             if not self._config.user_spec:
@@ -238,29 +599,15 @@ class Flock:
         # equaly as possible among all replicas.
         replica_index = self._replica_index
         replica_count = self._replica_count
-        users = [
+        return [
             user
             for i, user in enumerate(users)
             if i % replica_count == replica_index
         ]
-        scopes = self._config.scopes
-        coros = [
-            self._gafaelfawr.create_service_token(u, scopes) for u in users
-        ]
-
-        # Gafaelfawr has to add database rows for each token to the same
-        # table, so the amount of effective parallelization is limited.
-        # Perform the user creation in a fixed-size batch so that we get some
-        # speed-up without just piling up Gafaelfawr tasks waiting for
-        # database transactions.
-        results = []
-        for batch in batched(coros, 10, strict=False):
-            results.extend(await asyncio.gather(*batch))
-        return results
 
     def _users_from_spec(self, *, spec: UserSpec, count: int) -> list[User]:
         """Generate count Users from the provided spec."""
-        padding = int(math.log10(count) + 1)
+        padding = self._padding
         users = []
 
         for i in range(1, count + 1):
@@ -0,0 +1,260 @@
+"""Manager for solitary monkeys run as background jobs."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import shortuuid
+from aiojobs import Job, Scheduler
+from httpx import AsyncClient
+from rubin.repertoire import DiscoveryClient
+from structlog.stdlib import BoundLogger
+
+from ..dependencies.config import config_dependency
+from ..events import Events
+from ..exceptions import SolitaryJobNotFoundError, SolitaryQueueFullError
+from ..models.solitary import (
+    SolitaryConfig,
+    SolitaryJobData,
+    SolitaryJobState,
+    SolitaryResult,
+)
+from ..services.repo import RepoManager
+from ..storage.gafaelfawr import GafaelfawrStorage
+from .logwriter import LogWriter
+from .solitary import Solitary
+from .workers import WorkerPool
+
+__all__ = ["SolitaryJob", "SolitaryJobManager"]
+
+
+class SolitaryJob:
+    """A solitary monkey running in the background.
+
+    Parameters
+    ----------
+    job_id
+        Identifier of the job.
+    solitary_config
+        Configuration for the monkey.
+    solitary
+        Runner for the monkey.
+    """
+
+    def __init__(
+        self, job_id: str, solitary_config: SolitaryConfig, solitary: Solitary
+    ) -> None:
+        self.id = job_id
+        self.state = SolitaryJobState.QUEUED
+        self.submit_time = datetime.now(tz=UTC)
+        self.start_time: datetime | None = None
+        self.end_time: datetime | None = None
+        self.result: SolitaryResult | None = None
+        self._config = solitary_config
+        self._solitary = solitary
+        self._job: Job | None = None
+
+    def dump(self) -> SolitaryJobData:
+        """Return the status of the job."""
+        return SolitaryJobData(
+            id=self.id,
+            state=self.state,
+            username=self._config.user.username,
+            business=self._config.business.type,
+            submit_time=self.submit_time,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            success=self.result.success if self.result else None,
+            error=self.result.error if self.result else None,
+        )
+
+    def log(self) -> str:
+        """Return the log of the monkey so far."""
+        if self.result:
+            return self.result.log
+        return self._solitary.log()
+
+    async def start(self, scheduler: Scheduler, logger: BoundLogger) -> None:
+        """Start the job.
+
+        Parameters
+        ----------
+        scheduler
+            Scheduler that limits how many jobs run at the same time.
+        logger
+            Logger for errors that prevented the monkey from running.
+        """
+        self._job = await scheduler.spawn(self._run(logger))
+
+    async def stop(self) -> None:
+        """Stop the job if it is queued or running."""
+        if self._job:
+            await self._job.close()
+            self._job = None
+
+    async def _run(self, logger: BoundLogger) -> None:
+        """Run the monkey and record its result."""
+        self.state = SolitaryJobState.RUNNING
+        self.start_time = datetime.now(tz=UTC)
+        try:
+            self.result = await self._solitary.run()
+        except Exception as e:
+            logger.exception("Solitary job failed", job=self.id)
+            log = self._solitary.log()
+            self.result = SolitaryResult(success=False, error=str(e), log=log)
+        finally:
+            self.state = SolitaryJobState.FINISHED
+            self.end_time = datetime.now(tz=UTC)
+
+
+class SolitaryJobManager:
+    """Runs solitary monkeys as background jobs.
+
+    Jobs are run by a scheduler with a limit on how many run at the same
+    time, so that many jobs can be submitted at once without holding open an
+    HTTP request for each of them. This should be a process singleton.
+
+    Parameters
+    ----------
+    gafaelfawr_storage
+        Gafaelfawr storage client.
+    discovery_client
+        Shared service discovery client.
+    http_client
+        Shared HTTP client.
+    events
+        Event publishers.
+    repo_manager
+        For efficiently cloning git repos.
+    worker_pool
+        Worker processes for CPU-bound work of the monkeys.
+    log_writer
+        Background writer for the logs of the monkeys.
+    logger
+        Global logger.
+    """
+
+    def __init__(
+        self,
+        *,
+        gafaelfawr_storage: GafaelfawrStorage,
+        discovery_client: DiscoveryClient,
+        http_client: AsyncClient,
+        events: Events,
+        repo_manager: RepoManager,
+        worker_pool: WorkerPool,
+        log_writer: LogWriter,
+        logger: BoundLogger,
+    ) -> None:
+        self._config = config_dependency.config
+        self._gafaelfawr = gafaelfawr_storage
+        self._discovery = discovery_client
+        self._http_client = http_client
+        self._events = events
+        self._repo_manager = repo_manager
+        self._worker_pool = worker_pool
+        self._log_writer = log_writer
+        self._logger = logger
+        self._jobs: dict[str, SolitaryJob] = {}
+        self._scheduler = Scheduler(
+            limit=self._config.solitary_concurrency, pending_limit=0
+        )
+
+    async def aclose(self) -> None:
+        """Stop all jobs and free all resources."""
+        await self._scheduler.close()
+        self._jobs.clear()
+
+    async def delete_job(self, job_id: str) -> None:
+        """Stop a job if it hasn't finished and forget about it.
+
+        Parameters
+        ----------
+        job_id
+            Identifier of the job.
+
+        Raises
+        ------
+        SolitaryJobNotFoundError
+            Raised if no job was found with that identifier.
+        """
+        job = self.get_job(job_id)
+        del self._jobs[job_id]
+        await job.stop()
+
+    def get_job(self, job_id: str) -> SolitaryJob:
+        """Retrieve a job by its identifier.
+
+        Parameters
+        ----------
+        job_id
+            Identifier of the job.
+
+        Returns
+        -------
+        SolitaryJob
+            Requested job.
+
+        Raises
+        ------
+        SolitaryJobNotFoundError
+            Raised if no job was found with that identifier.
+        """
+        self._expire_jobs()
+        job = self._jobs.get(job_id)
+        if not job:
+            raise SolitaryJobNotFoundError(job_id)
+        return job
+
+    def list_jobs(self) -> list[SolitaryJobData]:
+        """Return the status of all jobs, in the order they were submitted."""
+        self._expire_jobs()
+        return [j.dump() for j in self._jobs.values()]
+
+    async def submit(self, solitary_config: SolitaryConfig) -> SolitaryJob:
+        """Submit a solitary monkey to be run in the background.
+
+        Parameters
+        ----------
+        solitary_config
+            Configuration for the monkey.
+
+        Returns
+        -------
+        SolitaryJob
+            New job, which may be queued until other jobs finish.
+
+        Raises
+        ------
+        SolitaryQueueFullError
+            Raised if the job would have to wait and too many jobs are already
+            waiting.
+        """
+        self._expire_jobs()
+        scheduler = self._scheduler
+        busy = scheduler.active_count >= self._config.solitary_concurrency
+        queue_size = self._config.solitary_queue_size
+        if busy and scheduler.pending_count >= queue_size:
+            raise SolitaryQueueFullError
+        solitary = Solitary(
+            solitary_config=solitary_config,
+            gafaelfawr_storage=self._gafaelfawr,
+            discovery_client=self._discovery,
+            http_client=self._http_client,
+            events=self._events,
+            repo_manager=self._repo_manager,
+            logger=self._logger,
+            worker_pool=self._worker_pool,
+            log_writer=self._log_writer,
+        )
+        job = SolitaryJob(shortuuid.uuid(), solitary_config, solitary)
+        self._jobs[job.id] = job
+        await job.start(scheduler, self._logger)
+        return job
+
+    def _expire_jobs(self) -> None:
+        """Forget about jobs that finished longer ago than the retention."""
+        cutoff = datetime.now(tz=UTC) - self._config.solitary_retention
+        for job in list(self._jobs.values()):
+            if job.end_time and job.end_time < cutoff:
+                del self._jobs[job.id]
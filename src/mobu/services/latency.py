@@ -0,0 +1,276 @@
+"""Latency histograms for monkey business."""
+
+from __future__ import annotations
+
+import math
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Protocol
+
+from ..models.latency import FlockLatencySummary, LatencySummary
+
+__all__ = [
+    "FlockLatency",
+    "LatencyHistogram",
+    "PhaseRecorder",
+    "record_phase",
+    "set_phase_recorder",
+]
+
+_SUB_BUCKET_BITS = 7
+"""Number of bits of precision kept for each value (a relative error of 1%)."""
+
+_HALF_SUB_BUCKET_COUNT = 1 << (_SUB_BUCKET_BITS - 1)
+"""Number of sub-buckets in each bucket after the first."""
+
+_HIGHEST_TRACKABLE = int(timedelta(days=1) / timedelta(microseconds=1))
+"""Longest latency in microseconds that gets its own bucket."""
+
+
+class PhaseRecorder(Protocol):
+    """Callback that records the latency of a phase of a business."""
+
+    def __call__(
+        self, phase: str, latency: timedelta, *, success: bool = True
+    ) -> None: ...
+
+
+_phase_recorder: ContextVar[PhaseRecorder | None] = ContextVar(
+    "phase_recorder", default=None
+)
+"""Callback that records phase latencies for the current business."""
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of latencies in the style of HdrHistogram.
+
+    Latencies are stored as counts in log-linear buckets: each power of two
+    of microseconds is split into the same number of linear sub-buckets, so
+    that any recorded value can be recovered to within 1% using a fixed
+    amount of memory regardless of how many values are recorded.
+    Latencies longer than a day are counted in the last bucket, although the
+    maximum is tracked exactly.
+    """
+
+    def __init__(self) -> None:
+        size = self._index(_HIGHEST_TRACKABLE) + 1
+        self.count = 0
+        self._counts = [0] * size
+        self._max = 0
+
+    def record(self, latency: timedelta) -> None:
+        """Record a single latency.
+
+        Parameters
+        ----------
+        latency
+            Latency to record.
+        """
+        value = max(latency // timedelta(microseconds=1), 0)
+        self._counts[self._index(min(value, _HIGHEST_TRACKABLE))] += 1
+        self._max = max(self._max, value)
+        self.count += 1
+
+    def record_corrected(
+        self, latency: timedelta, expected_interval: timedelta
+    ) -> None:
+        """Record a latency, correcting for coordinated omission.
+
+        A monkey that waits for each iteration to finish before starting the
+        next one doesn't start the iterations it would have started while a
+        slow one was in progress, so it under-reports how long those would
+        have taken. Correct for this by also recording the latencies those
+        missing iterations would have seen had they been started on
+        schedule, as HdrHistogram does.
+
+        Parameters
+        ----------
+        latency
+            Latency to record.
+        expected_interval
+            Expected interval between the starts of successive iterations.
+            If this is zero, no correction is done.
+        """
+        self.record(latency)
+        if expected_interval <= timedelta(0):
+            return
+        missing = latency - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def percentile(self, percentile: float) -> timedelta | None:
+        """Return the latency at a given percentile.
+
+        Parameters
+        ----------
+        percentile
+            Percentile, from 0 to 100.
+
+        Returns
+        -------
+        datetime.timedelta or None
+            Latency at or below which that percentage of recorded latencies
+            fall, or `None` if nothing has been recorded.
+        """
+        if not self.count:
+            return None
+        target = max(math.ceil(percentile / 100 * self.count), 1)
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= self.count:
+                break
+            if seen >= target:
+                value = min(self._highest_equivalent(index), self._max)
+                return timedelta(microseconds=value)
+
+        # The highest occupied bucket contains the maximum, which is known
+        # exactly even if it was too large for the buckets.
+        return timedelta(microseconds=self._max)
+
+    def summary(self) -> LatencySummary:
+        """Summarize the recorded latencies."""
+        p50, p90, p99 = (self.percentile(p) for p in (50, 90, 99))
+        return LatencySummary(
+            count=self.count,
+            p50=p50.total_seconds() if p50 is not None else None,
+            p90=p90.total_seconds() if p90 is not None else None,
+            p99=p99.total_seconds() if p99 is not None else None,
+            max=self._max / 1_000_000 if self.count else None,
+        )
+
+    def _index(self, value: int) -> int:
+        """Return the index of the sub-bucket holding a value."""
+        bucket = max(value.bit_length() - _SUB_BUCKET_BITS, 0)
+        return bucket * _HALF_SUB_BUCKET_COUNT + (value >> bucket)
+
+    def _highest_equivalent(self, index: int) -> int:
+        """Return the highest value that would be stored in a sub-bucket."""
+        bucket = max(index // _HALF_SUB_BUCKET_COUNT - 1, 0)
+        sub_bucket = index - bucket * _HALF_SUB_BUCKET_COUNT
+        return ((sub_bucket + 1) << bucket) - 1
+
+
+class FlockLatency:
+    """Latency histograms shared by all the monkeys in a flock.
+
+    Attributes
+    ----------
+    version
+        Incremented whenever anything is recorded or a stage is started, so
+        that callers can tell cheaply whether the summary may have changed.
+    """
+
+    def __init__(self) -> None:
+        self._iteration = LatencyHistogram()
+        self._phases: dict[str, LatencyHistogram] = {}
+        self._stages: list[LatencyHistogram] = []
+        self.version = 0
+
+    def record_iteration(
+        self, latency: timedelta, expected_interval: timedelta | None = None
+    ) -> None:
+        """Record the latency of a business iteration.
+
+        Parameters
+        ----------
+        latency
+            Latency of the iteration.
+        expected_interval
+            If given, the expected interval between iterations, used to
+            correct for coordinated omission.
+        """
+        self.version += 1
+        histograms = [self._iteration]
+        if self._stages:
+            histograms.append(self._stages[-1])
+        for histogram in histograms:
+            if expected_interval is None:
+                histogram.record(latency)
+            else:
+                histogram.record_corrected(latency, expected_interval)
+
+    def record_phase(
+        self, phase: str, latency: timedelta, *, success: bool = True
+    ) -> None:
+        """Record the latency of one phase of a business iteration.
+
+        Parameters
+        ----------
+        phase
+            Name of the phase.
+        latency
+            Latency of the phase.
+        success
+            Whether the phase succeeded. Failed phases are not recorded,
+            since how long it took to fail says little about the service.
+        """
+        if not success:
+            return
+        self.version += 1
+        if phase not in self._phases:
+            self._phases[phase] = LatencyHistogram()
+        self._phases[phase].record(latency)
+
+    def start_stage(self) -> LatencyHistogram:
+        """Start recording iteration latencies for a new stage.
+
+        Iterations are recorded in the histogram of the current stage as well
+        as the histogram for the lifetime of the flock.
+
+        Returns
+        -------
+        LatencyHistogram
+            Histogram of iteration latencies for the new stage.
+        """
+        histogram = LatencyHistogram()
+        self._stages.append(histogram)
+        self.version += 1
+        return histogram
+
+    def stage_summaries(self) -> list[LatencySummary]:
+        """Summarize the iteration latencies of each stage, in order."""
+        return [h.summary() for h in self._stages]
+
+    def summary(self) -> FlockLatencySummary:
+        """Summarize the latencies of the flock."""
+        return FlockLatencySummary(
+            iteration=self._iteration.summary(),
+            phases={k: v.summary() for k, v in sorted(self._phases.items())},
+        )
+
+
+def record_phase(
+    phase: str, latency: timedelta, *, success: bool = True
+) -> None:
+    """Record the latency of a phase for the currently running business.
+
+    This is called by `~mobu.sentry.capturing_start_span`, so any phase
+    instrumented for Sentry is also recorded locally. If no business is
+    running in the current context, the latency is discarded.
+
+    Parameters
+    ----------
+    phase
+        Name of the phase.
+    latency
+        Latency of the phase.
+    success
+        Whether the phase succeeded.
+    """
+    recorder = _phase_recorder.get()
+    if recorder:
+        recorder(phase, latency, success=success)
+
+
+def set_phase_recorder(recorder: PhaseRecorder) -> None:
+    """Set the callback for phase latencies in the current context.
+
+    Parameters
+    ----------
+    recorder
+        Callback that takes the name of the phase, its latency, and whether
+        it succeeded.
+    """
+    _phase_recorder.set(recorder)
@@ -0,0 +1,117 @@
+"""Reading parts of monkey logs while they are being written."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from collections.abc import AsyncIterator, Callable
+
+from ..constants import LOG_FOLLOW_MAX_INTERVAL, LOG_FOLLOW_MIN_INTERVAL
+from ..exceptions import RangeNotSatisfiableError
+from .logstore import MonkeyLog
+
+__all__ = ["follow_log", "parse_range"]
+
+_CHUNK_SIZE = 64 * 1024
+"""Maximum size of the chunks in which followed logs are sent."""
+
+_RANGE_REGEX = re.compile(r"bytes=(\d*)-(\d*)")
+"""Regular expression matching a single byte range in a Range header."""
+
+
+async def follow_log(
+    log: MonkeyLog, start: int, done: Callable[[], bool]
+) -> AsyncIterator[bytes]:
+    """Stream a log as it is written.
+
+    The log is polled for new data, backing off from
+    `~mobu.constants.LOG_FOLLOW_MIN_INTERVAL` to
+    `~mobu.constants.LOG_FOLLOW_MAX_INTERVAL` while nothing is written.
+    Reads are done in a thread so that catching up on a large log doesn't
+    block the event loop. Segments of the log that are rotated while it is
+    being followed are read transparently.
+
+    Parameters
+    ----------
+    log
+        Log to follow.
+    start
+        Offset from which to start streaming.
+    done
+        Called after the log has been read to the end. Streaming stops if it
+        returns `True`, meaning that nothing more will be written.
+
+    Yields
+    ------
+    bytes
+        Chunks of the log.
+    """
+    interval = LOG_FOLLOW_MIN_INTERVAL.total_seconds()
+    max_interval = LOG_FOLLOW_MAX_INTERVAL.total_seconds()
+    position = start
+    while True:
+        # Check whether the log is finished before the final read, so that
+        # nothing written just before it finished is missed.
+        finished = done()
+        first, end = log.bounds()
+        position = max(position, first)
+        while position < end:
+            stop = min(end, position + _CHUNK_SIZE)
+            chunk = await asyncio.to_thread(_read, log, position, stop)
+            if not chunk:
+                # The log was deleted.
+                return
+            position += len(chunk)
+            yield chunk
+            interval = LOG_FOLLOW_MIN_INTERVAL.total_seconds()
+        if finished:
+            return
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse the value of a Range header for a log.
+
+    Only a single range of bytes is supported. Other ranges, including
+    multiple ranges, are ignored, which tells the client that the whole log
+    is being returned.
+
+    Parameters
+    ----------
+    header
+        Value of the Range header.
+    size
+        Size of the log.
+
+    Returns
+    -------
+    tuple of int or None
+        Offsets of the first and last bytes of the range, inclusive, or
+        `None` if the range is not supported and should be ignored.
+
+    Raises
+    ------
+    RangeNotSatisfiableError
+        Raised if the range doesn't overlap the log.
+    """
+    match = _RANGE_REGEX.fullmatch(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    if match.group(1) == "":
+        suffix = int(match.group(2))
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiableError(size)
+        return (max(0, size - suffix), size - 1)
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else None
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiableError(size)
+    return (start, size - 1 if end is None else min(end, size - 1))
+
+
+def _read(log: MonkeyLog, start: int, end: int) -> bytes:
+    """Read part of a log into memory."""
+    return b"".join(log.read(start, end))
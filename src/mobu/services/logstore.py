@@ -0,0 +1,503 @@
+"""Bounded storage for the logs of monkeys on local disk."""
+
+from __future__ import annotations
+
+import gzip
+import shutil
+import threading
+from collections import deque
+from collections.abc import Collection, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import mkdtemp
+from typing import BinaryIO
+
+__all__ = ["LogSegment", "LogStore", "MonkeyLog"]
+
+_CHUNK_SIZE = 64 * 1024
+"""Size of the chunks in which logs are read."""
+
+
+@dataclass(slots=True, eq=False)
+class LogSegment:
+    """One file of the log of a monkey."""
+
+    path: Path
+    """Path to the file."""
+
+    start: int
+    """Offset of the first byte of the segment in the log."""
+
+    size: int
+    """Size of the segment, uncompressed."""
+
+    disk_size: int
+    """Space the segment uses on disk."""
+
+    compressed: bool
+    """Whether the segment has been rotated and compressed."""
+
+    @property
+    def end(self) -> int:
+        """Offset after the last byte of the segment in the log."""
+        return self.start + self.size
+
+    def open(self) -> BinaryIO:
+        """Open the segment for reading its uncompressed contents."""
+        if self.compressed:
+            return gzip.open(self.path, "rb")
+        return self.path.open("rb")
+
+
+class MonkeyLog:
+    """Log of one monkey, stored as a series of segments.
+
+    Messages are appended to an uncompressed segment, which is compressed
+    once it reaches the rotation size of the store and replaced with a new
+    segment. The oldest compressed segments are deleted once the log uses
+    more than its maximum size, or the store uses more than its budget.
+
+    Offsets in the log count every byte ever written to it, so they stay
+    valid as segments are deleted. Reading from an offset that has been
+    deleted starts at the oldest remaining data instead.
+
+    Only one thread may write to the log at a time, but the log may be read
+    from any thread while it is being written.
+
+    Parameters
+    ----------
+    store
+        Store that holds the log.
+    directory
+        Directory for the segments of the log, which must already exist.
+    """
+
+    def __init__(self, store: LogStore, directory: Path) -> None:
+        self._store = store
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._segments: deque[LogSegment] = deque()
+        self._current = self._new_segment(0)
+        self._stream: BinaryIO | None = None
+        self._deleted = False
+
+    def bounds(self) -> tuple[int, int]:
+        """Return the offsets of the data currently in the log.
+
+        Returns
+        -------
+        tuple of int
+            Offset of the oldest byte still stored, and offset after the
+            newest byte.
+        """
+        with self._lock:
+            first = self._segments[0] if self._segments else self._current
+            return (first.start, self._current.end)
+
+    def close(self) -> None:
+        """Close the file being written, if any.
+
+        The log can still be read, and is reopened if written to again.
+        """
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+
+    def delete(self) -> None:
+        """Delete the log. Further writes are discarded."""
+        self.close()
+        with self._lock:
+            if self._deleted:
+                return
+            self._deleted = True
+            segments = [*self._segments, self._current]
+            self._segments.clear()
+        self._store.remove_log(segments)
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def evict(self, segment: LogSegment) -> bool:
+        """Delete a compressed segment to free disk space.
+
+        Parameters
+        ----------
+        segment
+            Segment to delete.
+
+        Returns
+        -------
+        bool
+            `True` if the segment was deleted, `False` if it was not part of
+            the log, such as if it was already deleted.
+        """
+        with self._lock:
+            if segment not in self._segments:
+                return False
+            self._segments.remove(segment)
+        segment.path.unlink(missing_ok=True)
+        self._store.release(segment.disk_size, [segment])
+        return True
+
+    def find_tail(self, lines: int, end: int) -> int:
+        """Find the start of the last lines of the log.
+
+        The uncompressed segment is read backwards from the end in chunks,
+        so finding a few lines doesn't depend on the size of the log.
+        Compressed segments can only be read forwards, so only the newlines
+        that might be needed are remembered while reading them.
+
+        Parameters
+        ----------
+        lines
+            Number of lines to find.
+        end
+            Offset of the end of the log, from `bounds`.
+
+        Returns
+        -------
+        int
+            Offset of the first of the last lines, or the offset of the
+            oldest stored byte if the log doesn't have that many lines.
+        """
+        first, _ = self.bounds()
+        if lines <= 0 or end <= first:
+            return end
+
+        # A newline at the end of the log terminates the last line rather than
+        # starting a new one, so don't count it.
+        limit = end
+        if b"".join(self.read(end - 1, end)) == b"\n":
+            limit -= 1
+
+        while not self._deleted:
+            with self._lock:
+                segments = [*self._segments, self._current]
+            try:
+                for segment in reversed(segments):
+                    if segment.start >= limit:
+                        continue
+                    offset, lines = self._find_tail_in(segment, lines, limit)
+                    if offset is not None:
+                        return offset
+                    limit = segment.start
+            except FileNotFoundError:
+                # A segment was rotated or deleted, so look at the current
+                # segments again.
+                continue
+            break
+        return self.bounds()[0]
+
+    def read(self, start: int, end: int) -> Iterator[bytes]:
+        """Read part of the log.
+
+        Parameters
+        ----------
+        start
+            Offset of the first byte to read. If that byte is no longer
+            stored, reading starts at the oldest stored byte.
+        end
+            Offset after the last byte to read, which must not be after the
+            end of the log.
+
+        Yields
+        ------
+        bytes
+            Chunks of the log.
+        """
+        position = start
+        while position < end and not self._deleted:
+            segment = self._find_segment(position)
+            position = max(position, segment.start)
+            try:
+                fh = segment.open()
+            except FileNotFoundError:
+                # The segment was rotated or deleted, so look it up again.
+                continue
+            with fh:
+                fh.seek(position - segment.start)
+                size = min(end, segment.end) - position
+                for chunk in _read_chunks(fh, size):
+                    position += len(chunk)
+                    yield chunk
+
+    def write(self, data: str) -> None:
+        """Append to the log, rotating the current segment if it is full.
+
+        Parameters
+        ----------
+        data
+            Data to append.
+        """
+        if self._deleted:
+            return
+        encoded = data.encode()
+        if not self._stream:
+            self._stream = self._current.path.open("ab")
+        self._stream.write(encoded)
+        self._stream.flush()
+        with self._lock:
+            self._current.size += len(encoded)
+            self._current.disk_size += len(encoded)
+        self._store.charge(len(encoded))
+        if self._current.size >= self._store.rotation_size:
+            self._rotate()
+
+    def _find_segment(self, position: int) -> LogSegment:
+        """Find the oldest stored segment that ends after a position."""
+        with self._lock:
+            for segment in self._segments:
+                if segment.end > position:
+                    return segment
+            return self._current
+
+    def _find_tail_in(
+        self, segment: LogSegment, lines: int, limit: int
+    ) -> tuple[int | None, int]:
+        """Find the start of the last lines of a segment.
+
+        Only newlines before the limit are counted.
+
+        Returns
+        -------
+        tuple
+            Offset of the first of the last lines in the log, or `None` if
+            the segment doesn't have that many lines, and the number of lines
+            left to find in earlier segments.
+        """
+        end = min(limit, segment.end) - segment.start
+        with segment.open() as fh:
+            if segment.compressed:
+                newlines: deque[int] = deque(maxlen=lines)
+                position = 0
+                while position < end:
+                    chunk = fh.read(min(_CHUNK_SIZE, end - position))
+                    if not chunk:
+                        break
+                    index = -1
+                    while (index := chunk.find(b"\n", index + 1)) >= 0:
+                        newlines.append(position + index)
+                    position += len(chunk)
+                if len(newlines) == lines:
+                    return (segment.start + newlines[0] + 1, 0)
+                return (None, lines - len(newlines))
+
+            position = end
+            while position > 0:
+                start = max(0, position - _CHUNK_SIZE)
+                fh.seek(start)
+                chunk = fh.read(position - start)
+                index = len(chunk)
+                while (index := chunk.rfind(b"\n", 0, index)) >= 0:
+                    lines -= 1
+                    if lines == 0:
+                        return (segment.start + start + index + 1, 0)
+                position = start
+            return (None, lines)
+
+    def _new_segment(self, start: int) -> LogSegment:
+        """Create the description of a new uncompressed segment."""
+        path = self._directory / f"{start:020d}.log"
+        return LogSegment(
+            path=path, start=start, size=0, disk_size=0, compressed=False
+        )
+
+    def _rotate(self) -> None:
+        """Compress the current segment and start a new one."""
+        self.close()
+        old = self._current
+        path = old.path.with_suffix(".log.gz")
+        with old.path.open("rb") as source, gzip.open(path, "wb") as dest:
+            shutil.copyfileobj(source, dest)
+        disk_size = path.stat().st_size
+        segment = LogSegment(
+            path=path,
+            start=old.start,
+            size=old.size,
+            disk_size=disk_size,
+            compressed=True,
+        )
+        with self._lock:
+            self._segments.append(segment)
+            self._current = self._new_segment(old.end)
+            segments = list(self._segments)
+        old.path.unlink()
+        self._store.release(old.disk_size - disk_size)
+
+        # Enforce the maximum size of the log before that of the store, so
+        # that a noisy monkey loses its own history before that of others.
+        total = disk_size + sum(s.disk_size for s in segments[:-1])
+        for oldest in segments:
+            if total <= self._store.max_size:
+                break
+            if self.evict(oldest):
+                total -= oldest.disk_size
+        self._store.add_segment(self, segment)
+
+
+class LogStore:
+    """Local disk storage for the logs of all monkeys in a replica.
+
+    Logs are stored in a temporary directory that is created when the first
+    log is created and deleted when the store is closed. This should be a
+    process singleton.
+
+    Parameters
+    ----------
+    segment_size
+        Size at which the segment being written to a log is compressed and
+        a new one started, unless there are enough logs that this has to be
+        smaller to stay within the budget.
+    max_size
+        Maximum disk space used by the log of one monkey. Once a log uses
+        more, its oldest compressed segments are deleted.
+    budget
+        Maximum disk space used by all logs. Once the logs use more, the
+        oldest compressed segments of any log are deleted.
+    """
+
+    def __init__(
+        self, *, segment_size: int, max_size: int, budget: int
+    ) -> None:
+        self.segment_size = segment_size
+        self.max_size = max_size
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._usage = 0
+        self._log_count = 0
+        self._segments: deque[tuple[MonkeyLog, LogSegment]] = deque()
+        self._directory: Path | None = None
+
+    @property
+    def rotation_size(self) -> int:
+        """Size at which the segment being written to a log is compressed.
+
+        Only compressed segments can be deleted to stay within the budget,
+        so this is reduced below the segment size when there are enough logs
+        that the segments being written could otherwise use more than half
+        of the budget.
+        """
+        with self._lock:
+            count = max(self._log_count, 1)
+        return max(1, min(self.segment_size, self.budget // (2 * count)))
+
+    @property
+    def usage(self) -> int:
+        """Disk space used by all logs."""
+        with self._lock:
+            return self._usage
+
+    def add_segment(self, log: MonkeyLog, segment: LogSegment) -> None:
+        """Record a new compressed segment, deleting old ones if needed.
+
+        Parameters
+        ----------
+        log
+            Log the segment belongs to.
+        segment
+            New compressed segment.
+        """
+        with self._lock:
+            self._segments.append((log, segment))
+        self._enforce_budget()
+
+    def charge(self, size: int) -> None:
+        """Record disk space newly used by a log.
+
+        If the logs now use more than the budget, the oldest compressed
+        segments are deleted.
+
+        Parameters
+        ----------
+        size
+            Number of bytes.
+        """
+        with self._lock:
+            self._usage += size
+            over_budget = self._usage > self.budget
+        if over_budget:
+            self._enforce_budget()
+
+    def close(self) -> None:
+        """Delete all logs."""
+        with self._lock:
+            self._segments.clear()
+            self._usage = 0
+            self._log_count = 0
+            directory = self._directory
+            self._directory = None
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def create_log(self, name: str) -> MonkeyLog:
+        """Create a new, empty log.
+
+        Parameters
+        ----------
+        name
+            Name of the monkey, used in the name of the directory holding its
+            log.
+
+        Returns
+        -------
+        MonkeyLog
+            New log.
+        """
+        with self._lock:
+            if not self._directory:
+                self._directory = Path(mkdtemp(prefix="mobu-logs-"))
+            directory = Path(mkdtemp(prefix=f"{name}-", dir=self._directory))
+            self._log_count += 1
+        return MonkeyLog(self, directory)
+
+    def remove_log(self, segments: Collection[LogSegment]) -> None:
+        """Record that a log has been deleted.
+
+        Parameters
+        ----------
+        segments
+            All segments of the log, which no longer use disk space.
+        """
+        with self._lock:
+            self._log_count -= 1
+        self.release(sum(s.disk_size for s in segments), segments)
+
+    def release(
+        self, size: int, segments: Collection[LogSegment] = ()
+    ) -> None:
+        """Record disk space no longer used by a log.
+
+        Parameters
+        ----------
+        size
+            Number of bytes.
+        segments
+            Compressed segments that were deleted, which are no longer
+            candidates for deletion to keep within the budget.
+        """
+        with self._lock:
+            self._usage -= size
+            if segments:
+                deleted = set(segments)
+                self._segments = deque(
+                    (log, segment)
+                    for log, segment in self._segments
+                    if segment not in deleted
+                )
+
+    def _enforce_budget(self) -> None:
+        """Delete the oldest compressed segments until within the budget."""
+        while True:
+            with self._lock:
+                if self._usage <= self.budget or not self._segments:
+                    return
+                oldest_log, oldest = self._segments.popleft()
+            oldest_log.evict(oldest)
+
+
+def _read_chunks(fh: BinaryIO, size: int) -> Iterator[bytes]:
+    """Read exactly size bytes from a file in chunks."""
+    while size > 0:
+        chunk = fh.read(min(size, _CHUNK_SIZE))
+        if not chunk:
+            raise RuntimeError("Log file was truncated while being read")
+        size -= len(chunk)
+        yield chunk
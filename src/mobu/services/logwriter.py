@@ -0,0 +1,262 @@
+"""Background writer for the logs of all monkeys."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from functools import partial
+from typing import TypeAlias, override
+
+from ..constants import LOG_WRITER_BUFFER_SIZE
+from ..models.log_writer import LogWriterSummary
+from .logstore import LogStore, MonkeyLog
+
+__all__ = ["LogWriter", "MonkeyLogHandler"]
+
+_Entry: TypeAlias = tuple[MonkeyLog, str] | Callable[[], None]
+"""A queued log message, or an action to run once it is reached."""
+
+
+class LogWriter:
+    """Writes the logs of all monkeys from a background thread.
+
+    Log messages are queued by `MonkeyLogHandler` and written by a single
+    thread, which writes everything queued for a log with one call each time
+    it wakes up. Disk I/O, including rotating and compressing logs, therefore
+    never blocks the event loop running the monkeys, and the number of writes
+    grows with the number of monkeys rather than the number of messages.
+
+    The total size of queued messages is bounded. If the thread falls that
+    far behind, further messages are dropped until it catches up, and each
+    affected log gets a message saying how many messages it lost. This
+    should be a process singleton.
+
+    Parameters
+    ----------
+    store
+        Storage for the logs.
+    buffer_size
+        Maximum total length of queued messages, in characters.
+    """
+
+    def __init__(
+        self, store: LogStore, buffer_size: int = LOG_WRITER_BUFFER_SIZE
+    ) -> None:
+        self._store = store
+        self._buffer_size = buffer_size
+        self._buffered = 0
+        self._queue: deque[_Entry] = deque()
+        self._ready = threading.Condition()
+        self._closed = False
+        self._written = 0
+        self._dropped = 0
+        self._batches = 0
+        self._thread = threading.Thread(
+            target=self._run, name="mobu-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    async def aclose(self) -> None:
+        """Write all queued messages and stop the background thread.
+
+        Messages logged after this are written directly.
+        """
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        await asyncio.to_thread(self._thread.join)
+
+    def create_handler(self, log: MonkeyLog) -> MonkeyLogHandler:
+        """Create a logging handler that writes to a log through this writer.
+
+        Parameters
+        ----------
+        log
+            Log to write to.
+
+        Returns
+        -------
+        MonkeyLogHandler
+            New logging handler.
+        """
+        return MonkeyLogHandler(self, log)
+
+    def create_log(self, name: str) -> MonkeyLog:
+        """Create a new, empty log in the store used by this writer.
+
+        Parameters
+        ----------
+        name
+            Name of the monkey.
+
+        Returns
+        -------
+        MonkeyLog
+            New log.
+        """
+        return self._store.create_log(name)
+
+    def defer(self, action: Callable[[], None]) -> None:
+        """Run an action once everything queued so far has been written.
+
+        The action is run by the background thread, or immediately if the
+        writer has been closed.
+
+        Parameters
+        ----------
+        action
+            Action to run, such as closing or deleting a log.
+        """
+        with self._ready:
+            if not self._closed:
+                self._queue.append(action)
+                self._ready.notify()
+                return
+        action()
+
+    async def flush(self) -> None:
+        """Wait until every message queued so far has been written."""
+        future: Future[None] = Future()
+        self.defer(partial(future.set_result, None))
+        await asyncio.wrap_future(future)
+
+    def summary(self) -> LogWriterSummary:
+        """Return statistics about the writer."""
+        with self._ready:
+            return LogWriterSummary(
+                queued=sum(1 for e in self._queue if isinstance(e, tuple)),
+                buffered=self._buffered,
+                written=self._written,
+                dropped=self._dropped,
+                batches=self._batches,
+                disk_usage=self._store.usage,
+            )
+
+    def write(self, log: MonkeyLog, message: str) -> bool:
+        """Queue a message to be written to a log.
+
+        Parameters
+        ----------
+        log
+            Log to write to.
+        message
+            Formatted message, including the trailing newline.
+
+        Returns
+        -------
+        bool
+            `True` if the message was queued or written, `False` if it was
+            dropped because too many messages are already queued.
+        """
+        with self._ready:
+            if not self._closed:
+                size = len(message)
+                full = self._buffered + size > self._buffer_size
+                if full and self._buffered > 0:
+                    self._dropped += 1
+                    return False
+                self._queue.append((log, message))
+                self._buffered += size
+                self._ready.notify()
+                return True
+        log.write(message)
+        return True
+
+    def _run(self) -> None:
+        """Write queued messages until the writer is closed."""
+        while True:
+            with self._ready:
+                while not self._queue and not self._closed:
+                    self._ready.wait()
+                if not self._queue:
+                    return
+                batch = self._queue
+                self._queue = deque()
+                self._buffered = 0
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: deque[_Entry]) -> None:
+        """Write a batch of queued messages and run any queued actions."""
+        messages: dict[MonkeyLog, list[str]] = {}
+        for entry in batch:
+            if isinstance(entry, tuple):
+                log, message = entry
+                messages.setdefault(log, []).append(message)
+            else:
+                self._write_messages(messages)
+                messages = {}
+                entry()
+        self._write_messages(messages)
+        with self._ready:
+            self._batches += 1
+
+    def _write_messages(self, messages: dict[MonkeyLog, list[str]]) -> None:
+        """Write the queued messages for each log with a single write."""
+        written = 0
+        dropped = 0
+        for log, lines in messages.items():
+            try:
+                log.write("".join(lines))
+            except Exception:
+                dropped += len(lines)
+            else:
+                written += len(lines)
+        with self._ready:
+            self._written += written
+            self._dropped += dropped
+
+
+class MonkeyLogHandler(logging.Handler):
+    """Logging handler that writes a monkey's log through a `LogWriter`.
+
+    Messages are formatted when they are logged and written later by the
+    background thread of the writer.
+
+    Parameters
+    ----------
+    writer
+        Writer for the logs of all monkeys.
+    log
+        Log to write to.
+    """
+
+    def __init__(self, writer: LogWriter, log: MonkeyLog) -> None:
+        super().__init__()
+        self.dropped = 0
+        self._writer = writer
+        self._log = log
+
+    @override
+    def close(self) -> None:
+        self._writer.defer(self._log.close)
+        super().close()
+
+    @override
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            message = self.format(record) + "\n"
+        except Exception:
+            self.handleError(record)
+            return
+        if self.dropped:
+            notice = logging.makeLogRecord(
+                {
+                    "msg": f"Dropped {self.dropped} log messages",
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                }
+            )
+            message = self.format(notice) + "\n" + message
+        try:
+            queued = self._writer.write(self._log, message)
+        except Exception:
+            self.handleError(record)
+            return
+        if queued:
+            self.dropped = 0
+        else:
+            self.dropped += 1
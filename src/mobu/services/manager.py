@@ -12,10 +12,12 @@ from structlog.stdlib import BoundLogger
 from ..dependencies.config import config_dependency
 from ..events import Events
 from ..exceptions import FlockNotFoundError
-from ..models.flock import FlockConfig, FlockSummary
+from ..models.flock import FlockConfig, FlockSummary, FlockUpdate
 from ..services.repo import RepoManager
 from ..storage.gafaelfawr import GafaelfawrStorage
 from .flock import Flock
+from .logwriter import LogWriter
+from .workers import WorkerPool
 
 __all__ = ["FlockManager"]
 
@@ -39,6 +41,10 @@ class FlockManager:
         Event publishers.
     repo_manager
         For efficiently cloning git repos.
+    worker_pool
+        Worker processes for CPU-bound work of the monkeys.
+    log_writer
+        Background writer for the logs of the monkeys.
     logger
         Global logger to use for process-wide (not monkey) logging.
     """
@@ -51,6 +57,8 @@ class FlockManager:
         http_client: AsyncClient,
         events: Events,
         repo_manager: RepoManager,
+        worker_pool: WorkerPool,
+        log_writer: LogWriter,
         logger: BoundLogger,
     ) -> None:
         self._config = config_dependency.config
@@ -59,15 +67,22 @@ class FlockManager:
         self._http_client = http_client
         self._events = events
         self._repo_manager = repo_manager
+        self._worker_pool = worker_pool
+        self._log_writer = log_writer
         self._logger = logger
         self._flocks: dict[str, Flock] = {}
         self._scheduler = Scheduler(limit=None, pending_limit=0)
 
     async def aclose(self) -> None:
-        """Stop all flocks and free all resources."""
+        """Stop all flocks and free all resources.
+
+        Metrics events from the flocks that are still waiting to be published
+        are published before this returns.
+        """
         awaits = [self.stop_flock(f) for f in self._flocks]
         await asyncio.gather(*awaits)
         await self._scheduler.close()
+        await self._events.flush()
 
     async def autostart(self) -> None:
         """Automatically start configured flocks.
@@ -101,6 +116,8 @@ class FlockManager:
             http_client=self._http_client,
             events=self._events,
             repo_manager=self._repo_manager,
+            worker_pool=self._worker_pool,
+            log_writer=self._log_writer,
             logger=self._logger,
         )
         if flock.name in self._flocks:
@@ -139,6 +156,16 @@ class FlockManager:
             if flock.uses_repo(repo_url=repo_url, repo_ref=repo_ref)
         ]
 
+    def list_usernames(self) -> set[str]:
+        """List the usernames of the monkeys of every flock.
+
+        Returns
+        -------
+        set of str
+            Usernames of all running monkeys.
+        """
+        return {n for f in self._flocks.values() for n in f.list_monkeys()}
+
     def list_flocks(self) -> list[str]:
         """List all flocks.
 
@@ -178,6 +205,35 @@ class FlockManager:
         del self._flocks[name]
         await flock.stop()
 
+    async def update_flock(self, name: str, update: FlockUpdate) -> Flock:
+        """Change the configuration of a running flock.
+
+        Parameters
+        ----------
+        name
+            Name of flock to update.
+        update
+            Changes to make to the flock.
+
+        Returns
+        -------
+        Flock
+            Updated flock.
+
+        Raises
+        ------
+        FlockNotFoundError
+            Raised if no flock was found with that name.
+        FlockResizeError
+            Raised if the count was changed but the flock runs as an explicit
+            list of users.
+        """
+        flock = self._flocks.get(name)
+        if flock is None:
+            raise FlockNotFoundError(name)
+        await flock.update(update)
+        return flock
+
     def refresh_flock(self, name: str) -> None:
         """Tell a flock to refresh.
 
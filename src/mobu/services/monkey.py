@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import logging
 import sys
-from tempfile import NamedTemporaryFile, _TemporaryFileWrapper
+from typing import Any
 
 import sentry_sdk
 import structlog
@@ -17,6 +17,7 @@ from structlog.stdlib import BoundLogger
 
 from ..dependencies.config import config_dependency
 from ..events import Events
+from ..exceptions import NotRetainingLogsError
 from ..models.business.business_config_type import BusinessConfigType
 from ..models.business.empty import EmptyLoopConfig
 from ..models.business.gitlfs import GitLFSConfig
@@ -32,7 +33,7 @@ from ..models.business.nubladopythonloop import NubladoPythonLoopConfig
 from ..models.business.siaquerysetrunner import SIAQuerySetRunnerConfig
 from ..models.business.tapqueryrunner import TAPQueryRunnerConfig
 from ..models.business.tapquerysetrunner import TAPQuerySetRunnerConfig
-from ..models.monkey import MonkeyData, MonkeyState
+from ..models.monkey import MonkeyState
 from ..models.user import AuthenticatedUser
 from ..services.business.notebookrunnercounting import NotebookRunnerCounting
 from ..services.business.notebookrunnerinfinite import NotebookRunnerInfinite
@@ -46,6 +47,16 @@ from .business.nubladopythonloop import NubladoPythonLoop
 from .business.siaquerysetrunner import SIAQuerySetRunner
 from .business.tapqueryrunner import TAPQueryRunner
 from .business.tapquerysetrunner import TAPQuerySetRunner
+from .cpu import CpuAccount, charge_tasks_to
+from .dispatcher import ArrivalDispatcher
+from .feed import FlockFeed
+from .latency import FlockLatency
+from .logstore import MonkeyLog
+from .logwriter import LogWriter
+from .outcomes import FlockOutcomes
+from .records import FlockRecords
+from .table import MonkeyStatus
+from .workers import WorkerPool
 
 __all__ = ["Monkey"]
 
@@ -76,6 +87,26 @@ class Monkey:
         For efficiently cloning git repos.
     logger
         Global logger.
+    dispatcher
+        Dispatcher that starts each business iteration, if the monkey is part
+        of an open-loop flock.
+    latency
+        Latency histograms of the flock, if the monkey is part of a flock.
+    outcomes
+        Success and failure counts of the flock, if the monkey is part of a
+        flock.
+    feed
+        Feed of events about the flock, if the monkey is part of a flock.
+    records
+        Run records of the flock, if the monkey is part of a flock.
+    worker_pool
+        Worker processes for CPU-bound work of the business.
+    log_writer
+        Background writer for the log of the monkey. If not given, the monkey
+        logs to the global logger.
+    cpu
+        Account charged for the event loop time used by the monkey's tasks,
+        if the monkey is part of a flock.
     """
 
     def __init__(
@@ -90,6 +121,14 @@ class Monkey:
         events: Events,
         repo_manager: RepoManager,
         logger: BoundLogger,
+        dispatcher: ArrivalDispatcher | None = None,
+        latency: FlockLatency | None = None,
+        outcomes: FlockOutcomes | None = None,
+        feed: FlockFeed | None = None,
+        records: FlockRecords | None = None,
+        worker_pool: WorkerPool | None = None,
+        log_writer: LogWriter | None = None,
+        cpu: CpuAccount | None = None,
     ) -> None:
         self._config = config_dependency.config
         self._name = name
@@ -101,16 +140,20 @@ class Monkey:
         self._events = events
         self._repo_manager = repo_manager
         self._user = user
+        self._cpu = cpu
+        self._feed = feed
+        self._log_writer = log_writer
 
-        self._state = MonkeyState.IDLE
         self._global_logger = logger.bind(
             monkey=self._name, user=self._user.username
         )
         self._job: Job | None = None
 
-        self._logfile = NamedTemporaryFile()
-        if self._config.log_monkeys_to_file:
-            self._logger = self._build_logger(self._logfile)
+        # Only create a log, and any files, if logging monkeys to files.
+        self._log: MonkeyLog | None = None
+        if self._config.log_monkeys_to_file and log_writer:
+            self._log = log_writer.create_log(self._name)
+            self._logger = self._build_logger(log_writer, self._log)
         else:
             self._logger = self._global_logger
 
@@ -127,6 +170,11 @@ class Monkey:
                     events=self._events,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
                 )
             case GitLFSConfig():
                 self.business = GitLFSBusiness(
@@ -136,6 +184,11 @@ class Monkey:
                     events=self._events,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
                 )
             case MusterConfig():
                 self.business = MusterRunner(
@@ -145,6 +198,11 @@ class Monkey:
                     events=self._events,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
                 )
             case NubladoPythonLoopConfig():
                 self.business = NubladoPythonLoop(
@@ -154,6 +212,11 @@ class Monkey:
                     events=self._events,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
                 )
             case NotebookRunnerCountingConfig():
                 self.business = NotebookRunnerCounting(
@@ -164,6 +227,12 @@ class Monkey:
                     repo_manager=self._repo_manager,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
+                    worker_pool=worker_pool,
                 )
             case NotebookRunnerListConfig():
                 self.business = NotebookRunnerList(
@@ -174,6 +243,12 @@ class Monkey:
                     repo_manager=self._repo_manager,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
+                    worker_pool=worker_pool,
                 )
             case NotebookRunnerInfiniteConfig():
                 self.business = NotebookRunnerInfinite(
@@ -184,6 +259,12 @@ class Monkey:
                     repo_manager=self._repo_manager,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
+                    worker_pool=worker_pool,
                 )
             case TAPQueryRunnerConfig():
                 self.business = TAPQueryRunner(
@@ -193,6 +274,11 @@ class Monkey:
                     events=self._events,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
                 )
             case TAPQuerySetRunnerConfig():
                 self.business = TAPQuerySetRunner(
@@ -202,6 +288,11 @@ class Monkey:
                     events=self._events,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
                 )
             case SIAQuerySetRunnerConfig():
                 self.business = SIAQuerySetRunner(
@@ -211,8 +302,17 @@ class Monkey:
                     events=self._events,
                     logger=self._logger,
                     flock=self._flock,
+                    dispatcher=dispatcher,
+                    latency=latency,
+                    outcomes=outcomes,
+                    feed=feed,
+                    records=records,
                 )
 
+        self.status = MonkeyStatus(
+            name=name, user=user, business=self.business.status
+        )
+
         self._slack = None
         if self._config.slack_alerts and self._config.alert_hook:
             self._slack = SlackWebhookClient(
@@ -227,16 +327,42 @@ class Monkey:
         exc
             Exception prompting the alert.
         """
-        if self._state in (MonkeyState.STOPPING, MonkeyState.FINISHED):
-            state = self._state.name
+        if self.status.state in (MonkeyState.STOPPING, MonkeyState.FINISHED):
+            state = self.status.state.name
             self._logger.info(f"Not sending alert because state is {state}")
             return
         sentry_sdk.capture_exception(exc)
 
-    def logfile(self) -> str:
-        """Get the log file for a monkey's log."""
-        self._logfile.flush()
-        return self._logfile.name
+    def delete_log(self) -> None:
+        """Delete the monkey's log, discarding anything logged afterwards."""
+        if self._log and self._log_writer:
+            self._log_writer.defer(self._log.delete)
+            self._log = None
+
+    async def flush_log(self) -> None:
+        """Wait until everything logged so far is in the log."""
+        if self._log_writer:
+            await self._log_writer.flush()
+
+    def log(self) -> MonkeyLog:
+        """Get the monkey's log.
+
+        Messages are written by a background writer, so the most recent
+        messages may not be in the log yet.
+
+        Returns
+        -------
+        MonkeyLog
+            Log of the monkey.
+
+        Raises
+        ------
+        NotRetainingLogsError
+            Raised if monkeys don't log to files.
+        """
+        if not self._log:
+            raise NotRetainingLogsError
+        return self._log
 
     async def run_once(self) -> str | None:
         """Run the monkey business once.
@@ -246,24 +372,25 @@ class Monkey:
         str or None
             Error message on failure, or `None` if the business succeeded.
         """
-        self._state = MonkeyState.RUNNING
+        self._set_state(MonkeyState.RUNNING)
         error = None
         with sentry_sdk.isolation_scope():
             sentry_sdk.set_user({"username": self._user.username})
             sentry_sdk.set_tag("business", self.business.name)
             try:
                 await self.business.run_once()
-                self._state = MonkeyState.FINISHED
+                self._set_state(MonkeyState.FINISHED)
             except Exception as e:
                 msg = "Exception thrown while doing monkey business"
                 self._logger.exception(msg)
                 error = str(e)
-                self._state = MonkeyState.ERROR
+                self._set_state(MonkeyState.ERROR)
             return error
 
     async def start(self, scheduler: Scheduler) -> None:
         """Start the monkey."""
-        self._job = await scheduler.spawn(self._runner())
+        with charge_tasks_to(self._cpu):
+            self._job = await scheduler.spawn(self._runner())
 
     async def _runner(self) -> None:
         """Core monkey execution loop.
@@ -280,61 +407,96 @@ class Monkey:
                 sentry_sdk.set_user({"username": self._user.username})
                 sentry_sdk.set_tag("business", self.business.name)
                 try:
-                    self._state = MonkeyState.RUNNING
+                    self._set_state(MonkeyState.RUNNING)
                     await self.business.run()
                     run = False
                 except Exception as e:
                     msg = "Exception thrown while doing monkey business"
                     await self.alert(e)
+                    if self._feed:
+                        self._feed.publish_error(self._name, e)
                     self._logger.exception(msg)
 
-                    run = self._restart and self._state == MonkeyState.RUNNING
+                    running = self.status.state == MonkeyState.RUNNING
+                    run = self._restart and running
                     if run:
-                        self._state = MonkeyState.ERROR
+                        self._set_state(MonkeyState.ERROR)
                         await self.business.error_idle()
-                        if self._state == MonkeyState.STOPPING:
+                        if self.status.state == MonkeyState.STOPPING:
                             run = False
                     else:
-                        self._state = MonkeyState.STOPPING
+                        self._set_state(MonkeyState.STOPPING)
                         msg = "Shutting down monkey due to error"
                         self._global_logger.warning(msg)
 
                 await self.business.close()
-                self.state = MonkeyState.FINISHED
+
+        self._set_state(MonkeyState.FINISHED)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the monkey has stopped running its business.
+
+        A monkey that is stopping is also finished once its job has ended,
+        since nothing will move it out of that state if the job was closed
+        before it could finish.
+        """
+        if self.status.state == MonkeyState.FINISHED:
+            return True
+        if self.status.state == MonkeyState.STOPPING:
+            return self._job is not None and self._job.closed
+        return False
 
     async def stop(self) -> None:
         """Stop the monkey."""
-        if self._state in (MonkeyState.RUNNING, MonkeyState.ERROR):
-            self._state = MonkeyState.STOPPING
+        if self.status.state in (MonkeyState.RUNNING, MonkeyState.ERROR):
+            self._set_state(MonkeyState.STOPPING)
             await self.business.stop()
         if self._job:
             await self._job.wait()
             self._job = None
-        self._state = MonkeyState.FINISHED
+        self._set_state(MonkeyState.FINISHED)
 
     def signal_refresh(self) -> None:
         """Tell the business to refresh."""
         self.business.signal_refresh()
 
-    def dump(self) -> MonkeyData:
-        """Return information about a running monkey."""
-        return MonkeyData(
-            name=self._name,
-            business=self.business.dump(),
-            state=self._state,
-            user=self._user,
-        )
+    def dump(self) -> dict[str, Any]:
+        """Return information about a running monkey.
+
+        Returns
+        -------
+        dict
+            JSON-compatible data in the form of
+            `~mobu.models.monkey.MonkeyData`.
+        """
+        return self.status.to_json()
+
+    def _set_state(self, state: MonkeyState) -> None:
+        """Change the state of the monkey, publishing the change if needed."""
+        if state == self.status.state:
+            return
+        self.status.state = state
+        if self._feed:
+            self._feed.publish_state(self._name, state)
 
-    def _build_logger(self, logfile: _TemporaryFileWrapper) -> BoundLogger:
+    def _build_logger(
+        self, log_writer: LogWriter, log: MonkeyLog
+    ) -> BoundLogger:
         """Construct a logger for the actions of this monkey.
 
-        This logger will always log to a file, and will log to standard output
-        if the logging profile is ``development``.
+        This logger will always log to the monkey's log, and will log to
+        standard output if the logging profile is ``development``. Each
+        monkey gets its own logger rather than one registered by name with
+        the logging module, so that monkeys with the same name, such as
+        concurrent solitary jobs for one user, never share handlers.
 
         Parameters
         ----------
-        logfile
-            File to which to write the log messages.
+        log_writer
+            Background writer for the log.
+        log
+            Log to which to write the log messages.
 
         Returns
         -------
@@ -344,11 +506,9 @@ class Monkey:
         formatter = logging.Formatter(
             fmt="%(asctime)s %(message)s", datefmt=DATE_FORMAT
         )
-        file_handler = logging.FileHandler(logfile.name)
+        file_handler = log_writer.create_handler(log)
         file_handler.setFormatter(formatter)
-        logger = logging.getLogger(self._name)
-        logger.handlers = []
-        logger.setLevel(self._log_level.value)
+        logger = logging.Logger(self._name, self._log_level.value)
         logger.addHandler(file_handler)
         logger.propagate = False
         if self._config.log_profile == Profile.development:
@@ -356,5 +516,5 @@ class Monkey:
             stream_handler.setFormatter(formatter)
             logger.addHandler(stream_handler)
         result = structlog.wrap_logger(logger, wrapper_class=BoundLogger)
-        result.info("Starting new file logger", file=logfile.name)
+        result.info("Starting new file logger")
         return result
@@ -0,0 +1,102 @@
+"""Success and failure counts of the monkeys in a flock."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from time import monotonic
+
+from ..models.flock import OutcomeWindowSummary
+
+__all__ = ["FlockOutcomes"]
+
+_BUCKET = timedelta(seconds=5)
+"""Length of time covered by each bucket of counts."""
+
+_WINDOWS = (timedelta(minutes=1), timedelta(minutes=5), timedelta(hours=1))
+"""Rolling windows over which to summarize recent outcomes."""
+
+
+class FlockOutcomes:
+    """Success and failure counts shared by all the monkeys in a flock.
+
+    Businesses record each outcome as it happens, so summarizing the flock
+    doesn't require visiting every monkey. Besides the lifetime totals,
+    outcomes are counted in fixed-length time buckets kept in a ring large
+    enough for the longest rolling window. A bucket is reset when it is
+    first reused after the ring wraps around.
+    """
+
+    def __init__(self) -> None:
+        self.success_count = 0
+        self.failure_count = 0
+        self._start = monotonic()
+        size = max(_WINDOWS) // _BUCKET
+        self._buckets = [-1] * size
+        self._successes = [0] * size
+        self._failures = [0] * size
+
+    @property
+    def epoch(self) -> int:
+        """Number of the current time bucket.
+
+        The rolling window summaries only change when an outcome is recorded
+        or when this changes.
+        """
+        return int(monotonic() // _BUCKET.total_seconds())
+
+    def record_success(self) -> None:
+        """Record a successful iteration."""
+        self.success_count += 1
+        self._successes[self._slot()] += 1
+
+    def record_failure(self) -> None:
+        """Record a failed iteration."""
+        self.failure_count += 1
+        self._failures[self._slot()] += 1
+
+    def window_summaries(self) -> list[OutcomeWindowSummary]:
+        """Summarize the outcomes over each rolling window.
+
+        Returns
+        -------
+        list of OutcomeWindowSummary
+            Summaries for the last minute, five minutes, and hour, in that
+            order.
+        """
+        now = monotonic()
+        current = int(now // _BUCKET.total_seconds())
+        summaries = []
+        for window in _WINDOWS:
+            first = current - window // _BUCKET + 1
+            successes = 0
+            failures = 0
+            for bucket in range(first, current + 1):
+                slot = bucket % len(self._buckets)
+                if self._buckets[slot] == bucket:
+                    successes += self._successes[slot]
+                    failures += self._failures[slot]
+
+            # The window starts at the start of its oldest bucket, or when
+            # the flock started if that was more recent.
+            window_start = max(first * _BUCKET.total_seconds(), self._start)
+            elapsed = now - window_start
+            total = successes + failures
+            summary = OutcomeWindowSummary(
+                window=window.total_seconds(),
+                success_count=successes,
+                failure_count=failures,
+                success_rate=successes / total if total else None,
+                iteration_rate=total / elapsed if elapsed > 0 else 0.0,
+            )
+            summaries.append(summary)
+        return summaries
+
+    def _slot(self) -> int:
+        """Return the slot of the current bucket, resetting it if stale."""
+        bucket = self.epoch
+        slot = bucket % len(self._buckets)
+        if self._buckets[slot] != bucket:
+            self._buckets[slot] = bucket
+            self._successes[slot] = 0
+            self._failures[slot] = 0
+        return slot
@@ -0,0 +1,209 @@
+"""Searching for the highest load a service can sustain."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from structlog.stdlib import BoundLogger
+
+from ..events import CapacityProbeResult, Events
+from ..models.probe import (
+    CapacityProbeConfig,
+    CapacityProbeStep,
+    CapacityProbeSummary,
+)
+from .dispatcher import ArrivalDispatcher
+from .latency import FlockLatency
+
+__all__ = ["CapacityProber"]
+
+
+class CapacityProber:
+    """Raises the load of a flock step by step until it breaks objectives.
+
+    Each step is measured for the configured duration using its own latency
+    histogram and the number of iterations that succeeded and failed during
+    it. Once a step breaks an objective, or the configured maximum load has
+    been measured, the flock is returned to the highest load that met the
+    objectives and that load is reported.
+
+    Parameters
+    ----------
+    config
+        Configuration for the search.
+    flock
+        Name of the flock.
+    business
+        Name of the business the flock is running.
+    count
+        Total number of monkeys the flock starts with.
+    rate
+        Total arrival rate the flock starts with, if it is open-loop.
+    resize
+        Callback to change the total number of monkeys in the flock.
+    outcomes
+        Callback returning the total numbers of successes and failures of
+        the flock so far.
+    dispatcher
+        Dispatcher of the flock, if it is open-loop.
+    latency
+        Latency histograms of the flock.
+    events
+        Event publishers.
+    logger
+        Logger to use.
+
+    Attributes
+    ----------
+    version
+        Incremented whenever the summary changes.
+    """
+
+    def __init__(
+        self,
+        config: CapacityProbeConfig,
+        *,
+        flock: str,
+        business: str,
+        count: int,
+        rate: float | None,
+        resize: Callable[[int], Awaitable[None]],
+        outcomes: Callable[[], tuple[int, int]],
+        dispatcher: ArrivalDispatcher | None,
+        latency: FlockLatency,
+        events: Events,
+        logger: BoundLogger,
+    ) -> None:
+        self._config = config
+        self._flock = flock
+        self._business = business
+        self._count = count
+        self._rate = rate
+        self._resize = resize
+        self._outcomes = outcomes
+        self._dispatcher = dispatcher
+        self._latency = latency
+        self._events = events
+        self._logger = logger
+        self._steps: list[CapacityProbeStep] = []
+        self._finished = False
+        self.version = 0
+
+    def summary(self) -> CapacityProbeSummary:
+        """Summarize the progress of the search."""
+        passed = [s for s in self._steps if s.passed]
+        best = passed[-1] if passed else None
+        return CapacityProbeSummary(
+            finished=self._finished,
+            sustainable_count=best.count if best else None,
+            sustainable_rate=best.rate if best else None,
+            steps=self._steps,
+        )
+
+    async def run(self) -> None:
+        """Search for the highest sustainable load.
+
+        This should be run in a background job. The flock is left running at
+        the highest sustainable load when the search finishes, or at its
+        starting load if even that broke the objectives.
+        """
+        self._logger.info("Starting capacity search")
+        start_count = self._count
+        start_rate = self._rate
+        while True:
+            step = await self._measure()
+            self._steps.append(step)
+            self.version += 1
+            self._logger.info(
+                "Measured capacity step", **step.model_dump(exclude_none=True)
+            )
+            if not step.passed or self._at_maximum():
+                break
+            await self._raise_load()
+
+        # Back off to the last step that passed.
+        summary = self.summary()
+        count = summary.sustainable_count or start_count
+        await self._set_load(count, summary.sustainable_rate or start_rate)
+        self._finished = True
+        self.version += 1
+        self._logger.info(
+            "Finished capacity search",
+            sustainable_count=summary.sustainable_count,
+            sustainable_rate=summary.sustainable_rate,
+        )
+        event = CapacityProbeResult(
+            flock=self._flock,
+            business=self._business,
+            count=summary.sustainable_count,
+            rate=summary.sustainable_rate,
+            steps=len(self._steps),
+        )
+        self._events.capacity_probe.publish(event)
+
+    def _at_maximum(self) -> bool:
+        """Whether the load can't be raised any further."""
+        config = self._config
+        if config.step_count is not None and config.max_count is not None:
+            return self._count >= config.max_count
+        if config.step_rate is not None and config.max_rate is not None:
+            return self._rate is not None and self._rate >= config.max_rate
+        return False
+
+    async def _measure(self) -> CapacityProbeStep:
+        """Measure the current load for one step."""
+        histogram = self._latency.start_stage()
+        start_successes, start_failures = self._outcomes()
+        await asyncio.sleep(self._config.step_duration.total_seconds())
+        end_successes, end_failures = self._outcomes()
+        successes = end_successes - start_successes
+        failures = end_failures - start_failures
+
+        latency = histogram.percentile(self._config.latency_percentile)
+        success_rate = None
+        if successes + failures:
+            success_rate = successes / (successes + failures)
+
+        # A step in which nothing finished says nothing about whether the
+        # service can sustain the load, so it counts as a failure.
+        passed = success_rate is not None
+        if self._config.max_latency is not None:
+            passed = passed and latency is not None
+            if latency is not None and latency > self._config.max_latency:
+                passed = False
+        min_success_rate = self._config.min_success_rate
+        if success_rate is not None and min_success_rate is not None:
+            passed = passed and success_rate >= min_success_rate
+
+        return CapacityProbeStep(
+            count=self._count,
+            rate=self._rate,
+            latency=latency.total_seconds() if latency is not None else None,
+            success_rate=success_rate,
+            passed=passed,
+        )
+
+    async def _raise_load(self) -> None:
+        """Raise the load by one step, up to the maximum."""
+        config = self._config
+        count = self._count
+        rate = self._rate
+        if config.step_count is not None:
+            count += config.step_count
+            if config.max_count is not None:
+                count = min(count, config.max_count)
+        if config.step_rate is not None and rate is not None:
+            rate += config.step_rate
+            if config.max_rate is not None:
+                rate = min(rate, config.max_rate)
+        await self._set_load(count, rate)
+
+    async def _set_load(self, count: int, rate: float | None) -> None:
+        """Change the number of monkeys and the rate."""
+        if rate is not None and self._dispatcher:
+            self._dispatcher.set_rate(rate)
+            self._rate = rate
+        if count != self._count:
+            self._count = count
+            await self._resize(count)
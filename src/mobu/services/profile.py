@@ -0,0 +1,162 @@
+"""Running a flock through the stages of a load profile."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+
+from structlog.stdlib import BoundLogger
+
+from ..events import Events, LoadStageChange
+from ..models.flock import LoadStage, LoadStageSummary, LoadStageType
+from .dispatcher import ArrivalDispatcher
+from .latency import FlockLatency
+
+__all__ = ["LoadProfileRunner"]
+
+RAMP_INTERVAL = timedelta(seconds=1)
+"""How often to adjust the load during a ramp stage."""
+
+
+class LoadProfileRunner:
+    """Changes the load of a flock over time according to a load profile.
+
+    Counts are changed by resizing the flock, which starts or stops only the
+    monkeys in the difference. Rates are changed on the dispatcher of an
+    open-loop flock. Ramps are followed in small steps against a fixed
+    timeline, so a resize that takes a while (starting a large batch of
+    monkeys, for instance) doesn't stretch the profile.
+
+    Parameters
+    ----------
+    stages
+        Stages of the load profile.
+    flock
+        Name of the flock.
+    business
+        Name of the business the flock is running.
+    count
+        Callback to get the total number of monkeys the flock is currently
+        configured to run, which may have been changed by an operator since
+        the previous stage.
+    rate
+        Total arrival rate the flock starts with, if it is open-loop.
+    resize
+        Callback to change the total number of monkeys in the flock.
+    dispatcher
+        Dispatcher of the flock, if it is open-loop.
+    latency
+        Latency histograms of the flock.
+    events
+        Event publishers.
+    logger
+        Logger to use.
+    """
+
+    def __init__(
+        self,
+        stages: list[LoadStage],
+        *,
+        flock: str,
+        business: str,
+        count: Callable[[], int],
+        rate: float | None,
+        resize: Callable[[int], Awaitable[None]],
+        dispatcher: ArrivalDispatcher | None,
+        latency: FlockLatency,
+        events: Events,
+        logger: BoundLogger,
+    ) -> None:
+        self._stages = stages
+        self._flock = flock
+        self._business = business
+        self._count = count
+        self._resize = resize
+        self._dispatcher = dispatcher
+        self._rate = rate
+        self._latency = latency
+        self._events = events
+        self._logger = logger
+        self._start_times: list[datetime] = []
+
+    def summary(self) -> list[LoadStageSummary]:
+        """Summarize the stages that have been started so far."""
+        latencies = self._latency.stage_summaries()
+        return [
+            LoadStageSummary(stage=s, start_time=t, iteration=latency)
+            for s, t, latency in zip(
+                self._stages, self._start_times, latencies, strict=False
+            )
+        ]
+
+    async def run(self) -> None:
+        """Run through each stage of the profile in order.
+
+        This should be run in a background job. The load of the last stage
+        is left in place when it finishes.
+        """
+        for index, stage in enumerate(self._stages):
+            self._start_stage(index, stage)
+            match stage.type:
+                case LoadStageType.RAMP:
+                    await self._ramp(stage)
+                case LoadStageType.STEP:
+                    await self._set_load(stage.count, stage.rate)
+                    await asyncio.sleep(stage.duration.total_seconds())
+                case LoadStageType.HOLD:
+                    await asyncio.sleep(stage.duration.total_seconds())
+        self._logger.info("Finished load profile")
+
+    async def _ramp(self, stage: LoadStage) -> None:
+        """Change the load linearly to the target of a stage."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        duration = stage.duration.total_seconds()
+        start_count = self._count()
+        start_rate = self._rate
+        elapsed = 0.0
+        while elapsed < duration:
+            step = min(RAMP_INTERVAL.total_seconds(), duration - elapsed)
+            await asyncio.sleep(start + elapsed + step - loop.time())
+            elapsed = loop.time() - start
+            fraction = min(elapsed / duration, 1.0)
+            count = None
+            if stage.count is not None:
+                change = (stage.count - start_count) * fraction
+                count = start_count + round(change)
+            rate = None
+            if stage.rate is not None and start_rate is not None:
+                rate = start_rate + (stage.rate - start_rate) * fraction
+            await self._set_load(count, rate)
+        await self._set_load(stage.count, stage.rate)
+
+    async def _set_load(self, count: int | None, rate: float | None) -> None:
+        """Change the number of monkeys and the rate, if given."""
+        if rate is not None and self._dispatcher:
+            self._dispatcher.set_rate(rate)
+            self._rate = rate
+        if count is not None and count != self._count():
+            await self._resize(count)
+
+    def _start_stage(self, index: int, stage: LoadStage) -> None:
+        """Record and announce the start of a stage."""
+        self._start_times.append(datetime.now(tz=UTC))
+        self._latency.start_stage()
+        self._logger.info(
+            "Starting load profile stage",
+            stage=index,
+            type=stage.type.value,
+            count=stage.count,
+            rate=stage.rate,
+        )
+        event = LoadStageChange(
+            flock=self._flock,
+            business=self._business,
+            stage=index,
+            type=stage.type.value,
+            duration=stage.duration,
+            count=stage.count,
+            rate=stage.rate,
+        )
+        self._events.load_stage.publish(event)
@@ -0,0 +1,172 @@
+"""Records of every iteration and phase run by the monkeys of a flock."""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from ..constants import RECORD_BATCH_SIZE, RECORDS_MAX_SIZE
+
+__all__ = ["FlockRecords", "RecordContext"]
+
+_COLUMNS = (
+    "flock",
+    "monkey",
+    "business",
+    "phase",
+    "start",
+    "duration",
+    "success",
+    "notebook",
+    "cell",
+    "query",
+)
+"""Columns of the run records, in order."""
+
+
+@dataclass(slots=True)
+class RecordContext:
+    """What a business is currently running, added to its run records.
+
+    Businesses update this as they move between notebooks, cells, and
+    queries, so that each record says what it was a record of.
+    """
+
+    notebook: str | None = None
+    """Notebook being run, if any."""
+
+    cell: str | None = None
+    """ID of the notebook cell being run, if any."""
+
+    query: str | None = None
+    """Name of the template of the query being run, or the query itself if
+    it didn't come from a template."""
+
+
+class FlockRecords:
+    """Append-only store of the run records of the monkeys in a flock.
+
+    A record is kept for every iteration, with an empty phase, and for every
+    timed phase of an iteration. Records are buffered by column and
+    compressed in batches as gzipped CSV, so that keeping every record of a
+    long load test is cheap. The compressed batches are concatenated into a
+    single gzip file when the records are exported.
+
+    Once the compressed batches are larger than the maximum size, the oldest
+    batches are discarded.
+
+    Parameters
+    ----------
+    flock
+        Name of the flock.
+    batch_size
+        Number of records to compress together.
+    max_size
+        Maximum total size of the compressed batches.
+    """
+
+    def __init__(
+        self,
+        flock: str,
+        *,
+        batch_size: int = RECORD_BATCH_SIZE,
+        max_size: int = RECORDS_MAX_SIZE,
+    ) -> None:
+        self.count = 0
+        self.dropped = 0
+        self._flock = flock
+        self._batch_size = batch_size
+        self._max_size = max_size
+        self._columns: list[list[Any]] = [[] for _ in _COLUMNS]
+        self._batches: deque[tuple[int, bytes]] = deque()
+        self._size = 0
+        self._header = self._compress([_COLUMNS])
+
+    def export(self) -> list[bytes]:
+        """Return all stored records as the chunks of a gzipped CSV file.
+
+        The chunks are a snapshot of the records when this is called, so
+        they can be sent from another thread while more are recorded.
+
+        Returns
+        -------
+        list of bytes
+            Chunks that together form a gzip file. Each chunk is a complete
+            gzip member, and the first holds the CSV header.
+        """
+        self.flush()
+        return [self._header, *(b for _, b in self._batches)]
+
+    def flush(self) -> None:
+        """Compress any buffered records into a batch."""
+        count = len(self._columns[0])
+        if not count:
+            return
+        batch = self._compress(zip(*self._columns, strict=True))
+        self._columns = [[] for _ in _COLUMNS]
+        self._batches.append((count, batch))
+        self._size += len(batch)
+        while self._size > self._max_size and len(self._batches) > 1:
+            dropped, oldest = self._batches.popleft()
+            self._size -= len(oldest)
+            self.dropped += dropped
+
+    def record(
+        self,
+        *,
+        monkey: str,
+        business: str,
+        phase: str | None,
+        duration: timedelta | None,
+        success: bool,
+        context: RecordContext,
+    ) -> None:
+        """Record an iteration or phase that just finished.
+
+        Parameters
+        ----------
+        monkey
+            Name of the monkey.
+        business
+            Name of the business.
+        phase
+            Name of the phase, or `None` for a whole iteration.
+        duration
+            How long it took, or `None` if unknown, such as for a failure
+            during startup. Its start time is derived from this.
+        success
+            Whether it succeeded.
+        context
+            What the business was running.
+        """
+        now = datetime.now(tz=UTC)
+        start = now - duration if duration else now
+        row = (
+            self._flock,
+            monkey,
+            business,
+            phase,
+            start.isoformat(),
+            duration.total_seconds() if duration is not None else None,
+            success,
+            context.notebook,
+            context.cell,
+            context.query,
+        )
+        for column, value in zip(self._columns, row, strict=True):
+            column.append(value)
+        self.count += 1
+        if len(self._columns[0]) >= self._batch_size:
+            self.flush()
+
+    def _compress(self, rows: Iterable[Iterable[Any]]) -> bytes:
+        """Write rows as CSV and compress them as one gzip member."""
+        output = io.StringIO()
+        csv.writer(output, lineterminator="\n").writerows(rows)
+        return gzip.compress(output.getvalue().encode())
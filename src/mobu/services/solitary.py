@@ -2,17 +2,18 @@
 
 from __future__ import annotations
 
-from pathlib import Path
-
 from httpx import AsyncClient
 from rubin.repertoire import DiscoveryClient
 from structlog.stdlib import BoundLogger
 
 from ..events import Events
+from ..exceptions import NotRetainingLogsError
 from ..models.solitary import SolitaryConfig, SolitaryResult
 from ..services.repo import RepoManager
 from ..storage.gafaelfawr import GafaelfawrStorage
+from .logwriter import LogWriter
 from .monkey import Monkey
+from .workers import WorkerPool
 
 __all__ = ["Solitary"]
 
@@ -36,6 +37,10 @@ class Solitary:
         For efficiently cloning git repos.
     logger
         Global logger.
+    worker_pool
+        Worker processes for CPU-bound work of the monkey, if any.
+    log_writer
+        Background writer for the log of the monkey, if any.
     """
 
     def __init__(
@@ -48,6 +53,8 @@ class Solitary:
         events: Events,
         repo_manager: RepoManager,
         logger: BoundLogger,
+        worker_pool: WorkerPool | None = None,
+        log_writer: LogWriter | None = None,
     ) -> None:
         self._config = solitary_config
         self._gafaelfawr = gafaelfawr_storage
@@ -55,7 +62,26 @@ class Solitary:
         self._http_client = http_client
         self._events = events
         self._repo_manager = repo_manager
+        self._worker_pool = worker_pool
+        self._log_writer = log_writer
         self._logger = logger
+        self._monkey: Monkey | None = None
+
+    def log(self) -> str:
+        """Return the log of the monkey so far.
+
+        Returns
+        -------
+        str
+            Log of the monkey, which is empty if it hasn't started yet.
+        """
+        if not self._monkey:
+            return ""
+        try:
+            log = self._monkey.log()
+        except NotRetainingLogsError:
+            return ""
+        return b"".join(log.read(*log.bounds())).decode()
 
     async def run(self) -> SolitaryResult:
         """Run the monkey and return its results.
@@ -68,7 +94,7 @@ class Solitary:
         user = await self._gafaelfawr.create_service_token(
             self._config.user, self._config.scopes
         )
-        monkey = Monkey(
+        self._monkey = Monkey(
             name=f"solitary-{user.username}",
             business_config=self._config.business,
             user=user,
@@ -76,11 +102,15 @@ class Solitary:
             http_client=self._http_client,
             events=self._events,
             repo_manager=self._repo_manager,
+            worker_pool=self._worker_pool,
+            log_writer=self._log_writer,
             logger=self._logger,
         )
-        error = await monkey.run_once()
-        return SolitaryResult(
-            success=error is None,
-            error=error,
-            log=Path(monkey.logfile()).read_text(),
-        )
+        try:
+            error = await self._monkey.run_once()
+            await self._monkey.flush_log()
+            return SolitaryResult(
+                success=error is None, error=error, log=self.log()
+            )
+        finally:
+            self._monkey.delete_log()
@@ -0,0 +1,324 @@
+"""Compact table of the status of the monkeys in a flock."""
+
+from __future__ import annotations
+
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+from itertools import count
+from secrets import token_hex
+from typing import Any
+
+from ..models.business.nublado import RunningImage
+from ..models.business.siaquerysetrunner import SIAQuery
+from ..models.monkey import MonkeyField, MonkeyState
+from ..models.user import AuthenticatedUser
+from .timings import IterationTimings, RecentPhases
+
+__all__ = [
+    "BusinessStatus",
+    "MonkeyPage",
+    "MonkeySelection",
+    "MonkeyStatus",
+    "MonkeyTable",
+    "StatusVersion",
+]
+
+
+class StatusVersion:
+    """Version of the status of the monkeys in a flock.
+
+    The version changes whenever the status of any monkey changes, or a
+    monkey is added or removed, and is used as the entity tag of responses
+    built from that status. Each version has a random key so that versions
+    of different flocks, or of a flock that has been restarted, never
+    compare equal.
+    """
+
+    __slots__ = ("key", "value")
+
+    def __init__(self) -> None:
+        self.key = token_hex(4)
+        self.value = 0
+
+    def __str__(self) -> str:
+        return f"{self.key}-{self.value}"
+
+    def bump(self) -> None:
+        """Record a change to the status."""
+        self.value += 1
+
+
+class BusinessStatus:
+    """Status of a running business.
+
+    Businesses update these fields as they run. They are serialized straight
+    into the JSON form of `~mobu.models.business.base.BusinessData` or the
+    appropriate subclass, without building any models, so that reporting the
+    status of a large flock is cheap. Fields that are `None` are omitted, and
+    fields that don't apply to a business are never set.
+
+    Every change to a field bumps the version of the status, which is shared
+    with the rest of the flock once the monkey is added to a `MonkeyTable`.
+    """
+
+    __slots__ = (
+        "_version",
+        "failure_count",
+        "image",
+        "name",
+        "notebook",
+        "refreshing",
+        "running_code",
+        "running_query",
+        "success_count",
+        "timings",
+    )
+
+    def __init__(self, name: str) -> None:
+        object.__setattr__(self, "_version", StatusVersion())
+        self.name = name
+        self.success_count = 0
+        self.failure_count = 0
+        self.refreshing = False
+        self.image: RunningImage | None = None
+        self.notebook: str | None = None
+        self.running_code: str | None = None
+        self.running_query: str | SIAQuery | None = None
+        self.timings = IterationTimings()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        self._version.bump()
+
+    def to_json(self) -> dict[str, Any]:
+        """Serialize the status as JSON-compatible data."""
+        data: dict[str, Any] = {
+            "name": self.name,
+            "failure_count": self.failure_count,
+            "success_count": self.success_count,
+            "refreshing": self.refreshing,
+            "recent_iterations": self.timings.to_json(),
+        }
+        if self.image is not None:
+            data["image"] = _dump_model(self.image)
+        if self.notebook is not None:
+            data["notebook"] = self.notebook
+        if self.running_code is not None:
+            data["running_code"] = self.running_code
+        if isinstance(self.running_query, SIAQuery):
+            data["running_query"] = _dump_model(self.running_query)
+        elif self.running_query is not None:
+            data["running_query"] = self.running_query
+        return data
+
+
+class MonkeyStatus:
+    """Status of a monkey, stored as a row in the table of its flock.
+
+    Parameters
+    ----------
+    name
+        Name of the monkey.
+    user
+        User the monkey runs as.
+    business
+        Status of the business of the monkey.
+    """
+
+    __slots__ = ("_version", "business", "name", "state", "user")
+
+    def __init__(
+        self, *, name: str, user: AuthenticatedUser, business: BusinessStatus
+    ) -> None:
+        object.__setattr__(self, "_version", StatusVersion())
+        self.name = name
+        self.state = MonkeyState.IDLE
+        self.business = business
+
+        # The user never changes, so only serialize it once.
+        self.user = _dump_model(user)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        self._version.bump()
+
+    def share_version(self, version: StatusVersion) -> None:
+        """Bump a shared version on changes to this status from now on.
+
+        Parameters
+        ----------
+        version
+            Version of the status of the flock.
+        """
+        object.__setattr__(self, "_version", version)
+        object.__setattr__(self.business, "_version", version)
+
+    def to_json(
+        self, fields: Collection[MonkeyField] | None = None
+    ) -> dict[str, Any]:
+        """Serialize the status as JSON-compatible data.
+
+        Parameters
+        ----------
+        fields
+            If given, only include these fields. The name of the monkey is
+            always included.
+
+        Returns
+        -------
+        dict
+            Data in the form of `~mobu.models.monkey.MonkeyData`, less any
+            fields that weren't selected.
+        """
+        if fields is None:
+            return {
+                "name": self.name,
+                "state": self.state.value,
+                "user": self.user,
+                "business": self.business.to_json(),
+            }
+        data: dict[str, Any] = {"name": self.name}
+        if MonkeyField.STATE in fields:
+            data["state"] = self.state.value
+        if MonkeyField.USER in fields:
+            data["user"] = self.user
+        if MonkeyField.BUSINESS in fields:
+            data["business"] = self.business.to_json()
+        return data
+
+
+@dataclass(frozen=True)
+class MonkeySelection:
+    """Criteria for selecting a page of monkeys from a status table."""
+
+    states: Collection[MonkeyState] | None = None
+    """If given, only select monkeys in one of these states."""
+
+    min_failures: int | None = None
+    """If given, only select monkeys with at least this many failures."""
+
+    cursor: int | None = None
+    """If given, only select monkeys after the end of a previous page."""
+
+    limit: int | None = None
+    """If given, select at most this many monkeys."""
+
+
+@dataclass
+class MonkeyPage:
+    """A page of monkeys selected from a status table."""
+
+    monkeys: list[MonkeyStatus]
+    """Status of the selected monkeys, in the order they were added."""
+
+    next_cursor: int | None
+    """Cursor for the next page, or `None` if this is the last page."""
+
+    def to_json(
+        self, fields: Collection[MonkeyField] | None = None
+    ) -> list[dict[str, Any]]:
+        """Serialize the selected monkeys as JSON-compatible data.
+
+        Parameters
+        ----------
+        fields
+            If given, only include these fields for each monkey.
+        """
+        return [m.to_json(fields) for m in self.monkeys]
+
+
+class MonkeyTable:
+    """Status of every monkey in a flock, in the order they were added.
+
+    Attributes
+    ----------
+    recent_phases
+        Phase timings of the recent iterations of the monkeys in the table.
+    version
+        Version of the status of the monkeys in the table.
+    """
+
+    def __init__(self) -> None:
+        self.recent_phases = RecentPhases()
+        self.version = StatusVersion()
+        self._rows: dict[str, MonkeyStatus] = {}
+        self._positions: dict[str, int] = {}
+        self._counter = count()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, status: MonkeyStatus) -> None:
+        """Add the status of a new monkey.
+
+        Parameters
+        ----------
+        status
+            Status of the monkey, which the monkey will continue to update.
+        """
+        old = self._rows.pop(status.name, None)
+        if old:
+            old.business.timings.unshare()
+        self._rows[status.name] = status
+        self._positions[status.name] = next(self._counter)
+        status.share_version(self.version)
+        status.business.timings.share(self.recent_phases)
+        self.version.bump()
+
+    def remove(self, name: str) -> None:
+        """Remove the status of a monkey that has been stopped.
+
+        Parameters
+        ----------
+        name
+            Name of the monkey.
+        """
+        status = self._rows.pop(name, None)
+        if status:
+            status.business.timings.unshare()
+        self._positions.pop(name, None)
+        self.version.bump()
+
+    def rows(self) -> Iterable[MonkeyStatus]:
+        """Iterate over the status of each monkey."""
+        return self._rows.values()
+
+    def select(self, selection: MonkeySelection) -> MonkeyPage:
+        """Select a page of monkeys.
+
+        Each monkey is given a position when it is added, and a cursor is
+        the position of the last monkey of a page. Pages therefore stay
+        consistent as monkeys are added and removed.
+
+        Parameters
+        ----------
+        selection
+            Criteria for the monkeys to select.
+
+        Returns
+        -------
+        MonkeyPage
+            Matching monkeys, in the order they were added.
+        """
+        states = set(selection.states) if selection.states else None
+        monkeys = []
+        next_cursor = None
+        for name, status in self._rows.items():
+            position = self._positions[name]
+            if selection.cursor is not None and position <= selection.cursor:
+                continue
+            if states and status.state not in states:
+                continue
+            failures = status.business.failure_count
+            if selection.min_failures and failures < selection.min_failures:
+                continue
+            if selection.limit is not None and len(monkeys) == selection.limit:
+                next_cursor = self._positions[monkeys[-1].name]
+                break
+            monkeys.append(status)
+        return MonkeyPage(monkeys=monkeys, next_cursor=next_cursor)
+
+
+def _dump_model(model: AuthenticatedUser | RunningImage | SIAQuery) -> Any:
+    """Serialize a model the same way as a response model of a route."""
+    return model.model_dump(mode="json", exclude_none=True, exclude_unset=True)
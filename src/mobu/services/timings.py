@@ -0,0 +1,201 @@
+"""Phase timings of the recent iterations of monkey business."""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter, deque
+from collections.abc import Iterator
+from datetime import timedelta
+from typing import Any
+
+from ..constants import ITERATION_HISTORY_SIZE
+from ..models.latency import RecentPhaseSummary
+
+__all__ = ["IterationTimings", "RecentPhases"]
+
+
+class IterationTimings:
+    """Phase timings of the most recent iterations of one business.
+
+    Phases are timed as they finish and added to the iteration in progress,
+    which is kept once it finishes in a ring of the most recent iterations.
+    The timings of each iteration are stored in the JSON form of
+    `~mobu.models.business.base.IterationTiming`, so that reporting them is
+    cheap.
+
+    Once shared with the `RecentPhases` of a flock, the timings of each
+    iteration are added to the flock totals as the iteration is kept and
+    removed again when it falls out of the ring.
+
+    Parameters
+    ----------
+    size
+        Number of iterations to keep.
+    """
+
+    __slots__ = ("_iterations", "_phases", "_recent")
+
+    def __init__(self, size: int = ITERATION_HISTORY_SIZE) -> None:
+        self._iterations: deque[dict[str, Any]] = deque(maxlen=size)
+        self._phases: dict[str, float] = {}
+        self._recent: RecentPhases | None = None
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self._iterations)
+
+    def finish(self, duration: timedelta | None, *, success: bool) -> None:
+        """Finish the iteration in progress.
+
+        Parameters
+        ----------
+        duration
+            Duration of the iteration, or `None` if the business failed
+            during startup.
+        success
+            Whether the iteration succeeded.
+        """
+        seconds = duration.total_seconds() if duration is not None else None
+        if self._recent:
+            if len(self._iterations) == self._iterations.maxlen:
+                self._recent.remove(self._iterations[0]["phases"])
+            self._recent.add(self._phases)
+        self._iterations.append(
+            {"success": success, "duration": seconds, "phases": self._phases}
+        )
+        self._phases = {}
+
+    def record_phase(self, phase: str, latency: timedelta) -> None:
+        """Add the time spent in a phase to the iteration in progress.
+
+        Parameters
+        ----------
+        phase
+            Name of the phase.
+        latency
+            Time spent in the phase.
+        """
+        seconds = latency.total_seconds()
+        self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    def share(self, recent: RecentPhases) -> None:
+        """Add these timings to the totals of a flock from now on.
+
+        Parameters
+        ----------
+        recent
+            Phase timings of the recent iterations of the flock.
+        """
+        self.unshare()
+        self._recent = recent
+        for iteration in self._iterations:
+            recent.add(iteration["phases"])
+
+    def unshare(self) -> None:
+        """Remove these timings from the totals of the flock, if any."""
+        if self._recent:
+            for iteration in self._iterations:
+                self._recent.remove(iteration["phases"])
+            self._recent = None
+
+    def to_json(self) -> list[dict[str, Any]]:
+        """Serialize the timings of the recent iterations, oldest first."""
+        return list(self._iterations)
+
+
+class _PhaseTotals:
+    """Running totals of the time spent in one phase.
+
+    The maximum is kept in a heap. Removed times are only dropped from the
+    heap once they reach its top, or once they make up most of it.
+    """
+
+    __slots__ = ("count", "heap", "removed", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.heap: list[float] = []
+        self.removed: Counter[float] = Counter()
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        heapq.heappush(self.heap, -seconds)
+
+    def max(self) -> float:
+        while self.removed[-self.heap[0]]:
+            self.removed[-self.heap[0]] -= 1
+            heapq.heappop(self.heap)
+        return -self.heap[0]
+
+    def remove(self, seconds: float) -> None:
+        self.count -= 1
+        self.total -= seconds
+        self.removed[seconds] += 1
+        if len(self.heap) > 2 * self.count:
+            heap = []
+            for value in self.heap:
+                if self.removed[-value]:
+                    self.removed[-value] -= 1
+                else:
+                    heap.append(value)
+            heapq.heapify(heap)
+            self.heap = heap
+            self.removed.clear()
+
+
+class RecentPhases:
+    """Phase timings of the recent iterations of every business in a flock.
+
+    The businesses of a flock add the phase timings of each iteration as
+    they keep it and remove them as they discard it, so summarizing the
+    recent phases of a flock doesn't depend on the number of monkeys.
+    """
+
+    def __init__(self) -> None:
+        self._phases: dict[str, _PhaseTotals] = {}
+
+    def add(self, phases: dict[str, float]) -> None:
+        """Add the phase timings of an iteration.
+
+        Parameters
+        ----------
+        phases
+            Time spent in each phase of the iteration, in seconds.
+        """
+        for phase, seconds in phases.items():
+            totals = self._phases.get(phase)
+            if not totals:
+                totals = self._phases[phase] = _PhaseTotals()
+            totals.add(seconds)
+
+    def remove(self, phases: dict[str, float]) -> None:
+        """Remove the phase timings of an iteration added earlier.
+
+        Parameters
+        ----------
+        phases
+            Time spent in each phase of the iteration, in seconds.
+        """
+        for phase, seconds in phases.items():
+            totals = self._phases[phase]
+            totals.remove(seconds)
+            if totals.count == 0:
+                del self._phases[phase]
+
+    def summary(self) -> dict[str, RecentPhaseSummary]:
+        """Summarize the phase timings of the recent iterations.
+
+        Returns
+        -------
+        dict of RecentPhaseSummary
+            Summary of each phase, keyed by the name of the phase.
+        """
+        return {
+            phase: RecentPhaseSummary(
+                count=totals.count,
+                mean=totals.total / totals.count,
+                max=totals.max(),
+            )
+            for phase, totals in sorted(self._phases.items())
+        }
@@ -0,0 +1,77 @@
+"""Pool of worker processes for CPU-bound monkey work."""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+__all__ = ["WorkerPool"]
+
+
+class WorkerPool:
+    """Runs CPU-bound monkey work in separate processes.
+
+    Every monkey in a replica shares one event loop, so CPU-bound work done
+    by one monkey, such as parsing a large notebook, delays every other
+    monkey and inflates the latencies they measure. Work submitted to this
+    pool runs in worker processes instead, so it can use the other cores of
+    the replica while the event loop keeps serving monkeys.
+
+    This only offloads individual pieces of work. The monkeys themselves,
+    and everything else they do, still run on the event loop of the main
+    process, so this doesn't raise the amount of CPU a replica can use for
+    monkeys. Monkeys are spread over more cores by running more replicas.
+
+    The function and its arguments and result must be picklable, so the
+    function should be defined at the top level of a module and should keep
+    its result small.
+
+    Parameters
+    ----------
+    processes
+        Number of worker processes. If zero, work is run directly in the
+        calling process.
+    """
+
+    def __init__(self, processes: int) -> None:
+        self._executor = None
+        if processes > 0:
+            # Forking a process with running threads isn't safe, so start
+            # workers from a clean server process instead.
+            context = multiprocessing.get_context("forkserver")
+            self._executor = ProcessPoolExecutor(processes, mp_context=context)
+
+    async def run[**P, R](
+        self, func: Callable[P, R], *args: P.args, **kwargs: P.kwargs
+    ) -> R:
+        """Run a function in a worker process and return its result.
+
+        Parameters
+        ----------
+        func
+            Function to run.
+        *args
+            Positional arguments to the function.
+        **kwargs
+            Keyword arguments to the function.
+
+        Returns
+        -------
+        Any
+            Return value of the function.
+        """
+        if not self._executor:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -2,14 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, Callable, Collection
 from datetime import UTC, datetime
 
 from rubin.gafaelfawr import GafaelfawrClient, GafaelfawrGroup
 from structlog.stdlib import BoundLogger
 
+from ..asyncio import AdaptiveLimiter, schedule_periodic
 from ..config import Config
-from ..constants import TOKEN_LIFETIME
+from ..constants import (
+    TOKEN_CONCURRENCY_INITIAL,
+    TOKEN_CONCURRENCY_MAX,
+    TOKEN_LIFETIME,
+    TOKEN_RENEWAL_INTERVAL,
+    TOKEN_RENEWAL_THRESHOLD,
+)
 from ..models.user import AuthenticatedUser, Group, User
+from .token_cache import TokenCache
 
 __all__ = ["GafaelfawrStorage"]
 
@@ -23,6 +34,14 @@ class GafaelfawrStorage:
     tokens to monkeys to use for executing their business.
 
     This class handles the call to Gafaelfawr to create the service token.
+    The number of tokens created at once is limited by an `AdaptiveLimiter`
+    shared by all callers, which backs off when Gafaelfawr slows down or
+    fails and ramps up again while it keeps up.
+
+    If a token cache is given, tokens with enough lifetime left are reused
+    from the cache rather than created, and once `start` is called, cached
+    tokens that are close to expiring are replaced in the background if their
+    users are still in use, or dropped from the cache if not.
 
     Parameters
     ----------
@@ -32,6 +51,8 @@ class GafaelfawrStorage:
         Shared Gafaelfawr client.
     logger
         Logger to use.
+    cache
+        Persistent cache of service tokens, if tokens should be cached.
     """
 
     def __init__(
@@ -39,10 +60,25 @@ class GafaelfawrStorage:
         config: Config,
         gafaelfawr_client: GafaelfawrClient,
         logger: BoundLogger,
+        cache: TokenCache | None = None,
     ) -> None:
         self._config = config
         self._gafaelfawr = gafaelfawr_client
         self._logger = logger
+        self._cache = cache
+        self._limiter = AdaptiveLimiter(
+            TOKEN_CONCURRENCY_INITIAL, maximum=TOKEN_CONCURRENCY_MAX
+        )
+        self._renewal: asyncio.Task | None = None
+        self._in_use: Callable[[], Collection[str]] = frozenset
+
+    async def aclose(self) -> None:
+        """Stop renewing cached tokens."""
+        if self._renewal:
+            self._renewal.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._renewal
+            self._renewal = None
 
     async def create_service_token(
         self, user: User, scopes: list[str]
@@ -68,12 +104,138 @@ class GafaelfawrStorage:
         rubin.gafaelfawr.GafaelfawrError
             Raised if the request to Gafaelfawr failed.
         """
+        auth_user = await self._get_service_token(user, scopes)
+        if self._cache:
+            await self._cache.save()
+        return auth_user
+
+    async def create_service_tokens(
+        self, users: list[User], scopes: list[str]
+    ) -> AsyncGenerator[AuthenticatedUser]:
+        """Create service tokens for many users concurrently.
+
+        Parameters
+        ----------
+        users
+            Metadata for the users.
+        scopes
+            Scopes the requested tokens should have.
+
+        Yields
+        ------
+        AuthenticatedUser
+            Authenticated user for each user, in the order of the users, as
+            soon as its token has been created.
+
+        Raises
+        ------
+        rubin.gafaelfawr.GafaelfawrError
+            Raised if a request to Gafaelfawr failed. Creation of the
+            remaining tokens is cancelled.
+        """
+        tasks = [
+            asyncio.create_task(self._get_service_token(u, scopes))
+            for u in users
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._cache:
+                await self._cache.save()
+
+    def start(self, in_use: Callable[[], Collection[str]]) -> None:
+        """Start renewing cached tokens that are close to expiring.
+
+        Parameters
+        ----------
+        in_use
+            Returns the usernames of the running monkeys. Cached tokens for
+            other users are dropped once they are close to expiring rather
+            than replaced.
+        """
+        self._in_use = in_use
+        if self._cache and not self._renewal:
+            self._renewal = schedule_periodic(
+                self._renew_tokens, TOKEN_RENEWAL_INTERVAL
+            )
+
+    async def _create_service_token(
+        self, user: User, scopes: list[str]
+    ) -> AuthenticatedUser:
+        """Create a service token for a user and add it to the cache.
+
+        The cache is not saved.
+        """
         now = datetime.now(tz=UTC).replace(microsecond=0)
+        expires = now + TOKEN_LIFETIME
+        async with self._limiter.slot():
+            auth_user = await self._request_service_token(
+                user, scopes, expires
+            )
+        if self._cache:
+            self._cache.put(user, auth_user, expires)
+        return auth_user
+
+    async def _get_service_token(
+        self, user: User, scopes: list[str]
+    ) -> AuthenticatedUser:
+        """Get a service token for a user from the cache or by creating one.
+
+        The cache is not saved.
+        """
+        if self._cache:
+            lifetime = TOKEN_RENEWAL_THRESHOLD
+            auth_user = self._cache.get(user, scopes, lifetime)
+            if auth_user:
+                return auth_user
+        return await self._create_service_token(user, scopes)
+
+    async def _renew_tokens(self) -> None:
+        """Replace cached tokens that are close to expiring.
+
+        The replaced tokens are left to expire rather than revoked. Running
+        monkeys keep using the token they were started with, so revoking it
+        would break any monkey that has been running since before it was
+        replaced.
+        """
+        if not self._cache:
+            return
+        in_use = set(self._in_use())
+        expiring = []
+        for cached in self._cache.expiring(TOKEN_RENEWAL_THRESHOLD):
+            if cached.user.username in in_use:
+                expiring.append(cached)
+            else:
+                self._cache.delete(cached)
+        if not expiring:
+            await self._cache.save()
+            return
+        self._logger.info("Renewing cached tokens", count=len(expiring))
+        awaits = [
+            self._create_service_token(t.user, t.authenticated.scopes)
+            for t in expiring
+        ]
+        results = await asyncio.gather(*awaits, return_exceptions=True)
+        for cached, result in zip(expiring, results, strict=True):
+            if isinstance(result, Exception):
+                msg = "Failed to renew cached token"
+                username = cached.user.username
+                self._logger.warning(msg, user=username, error=str(result))
+        await self._cache.save()
+
+    async def _request_service_token(
+        self, user: User, scopes: list[str], expires: datetime
+    ) -> AuthenticatedUser:
+        """Ask Gafaelfawr to create a service token for a user."""
         token = await self._gafaelfawr.create_service_token(
             self._config.gafaelfawr_token,
             user.username,
             scopes=scopes,
-            expires=now + TOKEN_LIFETIME,
+            expires=expires,
             name="Mobu Test User",
             uid=user.uidnumber,
             gid=user.gidnumber or user.uidnumber,
@@ -0,0 +1,181 @@
+"""Encrypted on-disk cache of service tokens."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from cryptography.fernet import Fernet, InvalidToken
+from pydantic import BaseModel, ValidationError
+from structlog.stdlib import BoundLogger
+
+from ..models.user import AuthenticatedUser, CachedToken, User
+
+__all__ = ["TokenCache"]
+
+
+class _TokenCacheData(BaseModel):
+    """Contents of the token cache file before encryption."""
+
+    tokens: list[CachedToken]
+
+
+class TokenCache:
+    """Cache of service tokens that persists across restarts of mobu.
+
+    Tokens are keyed by username and set of scopes, and are only reused for
+    a user with the same UID, GID, and groups as the user they were created
+    for. The cache is kept in memory and saved to a single file, encrypted
+    with a Fernet key, which is replaced atomically on each save. If the file
+    can't be read or decrypted, for example because the key changed, the
+    cache starts out empty.
+
+    Parameters
+    ----------
+    path
+        File in which to store the cache.
+    key
+        Fernet key with which to encrypt the cache.
+    logger
+        Logger to use.
+    """
+
+    def __init__(self, path: Path, key: str, logger: BoundLogger) -> None:
+        self._path = path
+        self._fernet = Fernet(key)
+        self._logger = logger
+        self._tokens: dict[tuple[str, frozenset[str]], CachedToken] = {}
+        self._changed = False
+        self._lock = asyncio.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def delete(self, cached: CachedToken) -> None:
+        """Remove a token from the cache.
+
+        The cache is not saved until `save` is called.
+
+        Parameters
+        ----------
+        cached
+            Cached token to remove.
+        """
+        key = (cached.user.username, frozenset(cached.authenticated.scopes))
+        if self._tokens.get(key) is cached:
+            del self._tokens[key]
+            self._changed = True
+
+    def expiring(self, lifetime: timedelta) -> list[CachedToken]:
+        """Return the cached tokens that will expire soon.
+
+        Parameters
+        ----------
+        lifetime
+            Return tokens with less than this much lifetime left.
+
+        Returns
+        -------
+        list of CachedToken
+            Cached tokens that will expire soon.
+        """
+        cutoff = datetime.now(tz=UTC) + lifetime
+        return [t for t in self._tokens.values() if t.expires < cutoff]
+
+    def get(
+        self, user: User, scopes: list[str], lifetime: timedelta
+    ) -> AuthenticatedUser | None:
+        """Get a cached token for a user.
+
+        Parameters
+        ----------
+        user
+            Metadata for the user.
+        scopes
+            Scopes the token must have.
+        lifetime
+            Minimum remaining lifetime the token must have.
+
+        Returns
+        -------
+        AuthenticatedUser or None
+            Authenticated user with the cached token, or `None` if there is
+            no cached token for that user and scopes with enough lifetime
+            left.
+        """
+        cached = self._tokens.get((user.username, frozenset(scopes)))
+        if not cached or cached.user != user:
+            return None
+        if cached.expires < datetime.now(tz=UTC) + lifetime:
+            return None
+        return cached.to_authenticated_user()
+
+    def put(
+        self, user: User, authenticated: AuthenticatedUser, expires: datetime
+    ) -> None:
+        """Add a token to the cache, replacing any token for the same key.
+
+        The cache is not saved until `save` is called.
+
+        Parameters
+        ----------
+        user
+            Metadata for the user the token was created for.
+        authenticated
+            Authenticated user with the token.
+        expires
+            When the token expires.
+        """
+        key = (user.username, frozenset(authenticated.scopes))
+        self._tokens[key] = CachedToken(
+            user=user,
+            authenticated=authenticated,
+            name=authenticated.name,
+            expires=expires,
+        )
+        self._changed = True
+
+    async def save(self) -> None:
+        """Save the cache to disk if it has changed."""
+        async with self._lock:
+            if not self._changed:
+                return
+            self._changed = False
+            data = _TokenCacheData(tokens=list(self._tokens.values()))
+            plaintext = data.model_dump_json().encode()
+            try:
+                await asyncio.to_thread(self._write, plaintext)
+            except Exception:
+                self._changed = True
+                raise
+
+    def _load(self) -> None:
+        """Load the cache from disk, if it exists."""
+        try:
+            encrypted = self._path.read_bytes()
+        except FileNotFoundError:
+            return
+        try:
+            plaintext = self._fernet.decrypt(encrypted)
+            data = _TokenCacheData.model_validate_json(plaintext)
+        except (InvalidToken, ValidationError) as e:
+            msg = "Ignoring unreadable token cache"
+            self._logger.warning(msg, path=str(self._path), error=str(e))
+            return
+        for cached in data.tokens:
+            scopes = frozenset(cached.authenticated.scopes)
+            self._tokens[(cached.user.username, scopes)] = cached
+        self._logger.info("Loaded token cache", count=len(self._tokens))
+
+    def _write(self, plaintext: bytes) -> None:
+        """Encrypt and atomically replace the cache file."""
+        encrypted = self._fernet.encrypt(plaintext)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(encrypted)
+        tmp_path.replace(self._path)
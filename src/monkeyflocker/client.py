@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import sys
+import tarfile
 from pathlib import Path
+from tempfile import SpooledTemporaryFile
 from types import TracebackType
-from typing import Literal, Self
+from typing import IO, Any, Literal, Self
 from urllib.parse import urljoin
 
 import structlog
@@ -18,6 +21,12 @@ from structlog import BoundLogger
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 """Date format to use for logging."""
 
+EXPORT_MEMORY_SIZE = 64 * 1024 * 1024
+"""Size in bytes of a flock export to hold in memory before using a file."""
+
+LOG_CONCURRENCY = 10
+"""How many monkey logs to request at once from servers without export."""
+
 SESSION_TIMEOUT = 30
 """How long in seconds to wait for each call."""
 
@@ -66,27 +75,70 @@ class MonkeyflockerClient:
         self._logger.info(f"Flock {spec['name']} started")
 
     async def report(self, name: str, output: Path) -> None:
-        """Generate status and output data for all monkeys."""
+        """Generate status and output data for all monkeys.
+
+        The status and logs of all the monkeys are retrieved with a single
+        export of the flock. If the server doesn't support exporting flocks,
+        fall back on retrieving the log of each monkey separately.
+        """
         if not self._client:
             raise RuntimeError("Must be used as a context manager")
         output.mkdir(parents=True, exist_ok=True)
 
-        self._logger.info(f"Getting status of monkeys in flock {name}")
+        self._logger.info(f"Exporting flock {name}")
         flock_url = urljoin(self._base_url, f"/mobu/flocks/{name}")
+        with SpooledTemporaryFile(max_size=EXPORT_MEMORY_SIZE) as archive:
+            async with self._client.stream("GET", f"{flock_url}/export") as r:
+                if r.status_code == 404:
+                    self._logger.info("Export not supported, getting logs")
+                    await self._report_by_monkey(flock_url, output)
+                    return
+                r.raise_for_status()
+                async for chunk in r.aiter_bytes():
+                    archive.write(chunk)
+            archive.seek(0)
+            self._write_report(archive, output)
+
+    async def _report_by_monkey(self, flock_url: str, output: Path) -> None:
+        """Generate the report with one request for the log of each monkey."""
+        self._logger.info("Getting status of monkeys")
         r = await self._client.get(flock_url)
         r.raise_for_status()
-        data = r.json()
-        monkeys = data["monkeys"]
+        monkeys = r.json()["monkeys"]
+
+        semaphore = asyncio.Semaphore(LOG_CONCURRENCY)
 
-        for monkey in monkeys:
+        async def report_monkey(monkey: dict[str, Any]) -> None:
             user = monkey["name"]
-            self._logger.info(f"Requesting log for {user}")
-            log_url = flock_url + f"/monkeys/{user}/log"
-            r = await self._client.get(log_url)
-            r.raise_for_status()
+            async with semaphore:
+                self._logger.info(f"Requesting log for {user}")
+                log_url = flock_url + f"/monkeys/{user}/log"
+                r = await self._client.get(log_url)
+                r.raise_for_status()
             (output / f"{user}_log.txt").write_text(r.text)
-            with (output / f"{user}_stats.json").open("w") as f:
-                json.dump(monkey, f, indent=4, sort_keys=True)
+            self._write_stats(monkey, output)
+
+        await asyncio.gather(*(report_monkey(m) for m in monkeys))
+
+    def _write_report(self, archive: IO[bytes], output: Path) -> None:
+        """Write the report from an export of a flock."""
+        with tarfile.open(fileobj=archive, mode="r:") as tar:
+            for member in tar:
+                fh = tar.extractfile(member)
+                if not fh:
+                    continue
+                path = Path(member.name)
+                if path.name == "monkeys.jsonl":
+                    for line in fh:
+                        self._write_stats(json.loads(line), output)
+                elif path.parent.name == "logs":
+                    log = output / f"{path.stem}_log.txt"
+                    log.write_bytes(fh.read())
+
+    def _write_stats(self, monkey: dict[str, Any], output: Path) -> None:
+        """Write the status of a monkey."""
+        with (output / f"{monkey['name']}_stats.json").open("w") as f:
+            json.dump(monkey, f, indent=4, sort_keys=True)
 
     async def stop(self, name: str) -> None:
         """Stop a flock of monkeys."""
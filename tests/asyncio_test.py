@@ -0,0 +1,73 @@
+"""Tests for asyncio utility functions."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mobu.asyncio import AdaptiveLimiter, PauseTimer
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter() -> None:
+    limiter = AdaptiveLimiter(2, maximum=4)
+    active = 0
+    peak = 0
+
+    async def request(seconds: float, *, fail: bool = False) -> None:
+        nonlocal active, peak
+        async with limiter.slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(seconds)
+            active -= 1
+            if fail:
+                raise RuntimeError("Request failed")
+
+    # Requests beyond the limit wait for a free slot.
+    await asyncio.gather(*(request(0.05) for _ in range(3)))
+    assert peak == 2
+    assert limiter.limit == 3
+
+    # Successful requests that don't slow down raise the limit additively,
+    # up to the maximum.
+    for _ in range(5):
+        await request(0.05)
+    assert limiter.limit == 4
+
+    # A slow request cuts the limit in half.
+    await request(0.2)
+    assert limiter.limit == 2
+
+    # Requests that fail together only cut the limit once.
+    for _ in range(6):
+        await request(0.05)
+    assert limiter.limit == 4
+    failures = [request(0.05, fail=True) for _ in range(4)]
+    results = await asyncio.gather(*failures, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_pause_timer() -> None:
+    timer = PauseTimer()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    long = timer.pause(0.3)
+    short = timer.pause(0.1)
+    stopped = timer.pause(0.2)
+
+    # Pauses should end in order of their wake time, regardless of the order
+    # in which they were started.
+    assert await short
+    assert 0.1 <= loop.time() - start < 0.2
+    assert not long.done()
+
+    # A pause ended early should be resolved with the value it was given and
+    # not disturb the other pauses.
+    stopped.set_result(False)
+    assert not await stopped
+    assert await long
+    assert 0.3 <= loop.time() - start < 0.4
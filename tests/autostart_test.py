@@ -36,6 +36,7 @@ async def test_autostart(client: AsyncClient) -> None:
             "business": {
                 "failure_count": 0,
                 "name": "EmptyLoop",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": ANY,
             },
@@ -108,6 +109,7 @@ async def test_autostart(client: AsyncClient) -> None:
                         "reference": ANY,
                     },
                     "name": "NubladoPythonLoop",
+                    "recent_iterations": ANY,
                     "refreshing": False,
                     "success_count": ANY,
                 },
@@ -130,6 +132,7 @@ async def test_autostart(client: AsyncClient) -> None:
                         "reference": ANY,
                     },
                     "name": "NubladoPythonLoop",
+                    "recent_iterations": ANY,
                     "refreshing": False,
                     "success_count": ANY,
                 },
@@ -162,6 +165,7 @@ async def test_batched_autostart(client: AsyncClient) -> None:
             "business": {
                 "failure_count": 0,
                 "name": "EmptyLoop",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": ANY,
             },
@@ -234,6 +238,7 @@ async def test_batched_autostart(client: AsyncClient) -> None:
                         "reference": ANY,
                     },
                     "name": "NubladoPythonLoop",
+                    "recent_iterations": ANY,
                     "refreshing": False,
                     "success_count": ANY,
                 },
@@ -256,6 +261,7 @@ async def test_batched_autostart(client: AsyncClient) -> None:
                         "reference": ANY,
                     },
                     "name": "NubladoPythonLoop",
+                    "recent_iterations": ANY,
                     "refreshing": False,
                     "success_count": ANY,
                 },
@@ -1,13 +1,22 @@
 """Tests for EmptyLoop."""
 
+import asyncio
+from collections.abc import AsyncGenerator
+from datetime import timedelta
 from typing import cast
 from unittest.mock import ANY
 
 import pytest
+import structlog
 from httpx import AsyncClient
+from rubin.repertoire import DiscoveryClient
 from safir.metrics import MockEventPublisher
 
 from mobu.events import Events
+from mobu.models.business.base import BusinessOptions
+from mobu.models.user import AuthenticatedUser
+from mobu.services.business.empty import EmptyLoop
+from mobu.services.latency import FlockLatency
 
 from ..support.util import wait_for_business
 
@@ -38,6 +47,9 @@ async def test_run(client: AsyncClient, events: Events) -> None:
         "business": {
             "failure_count": 0,
             "name": "EmptyLoop",
+            "recent_iterations": [
+                {"success": True, "duration": ANY, "phases": {}}
+            ],
             "refreshing": False,
             "success_count": 1,
         },
@@ -51,7 +63,10 @@ async def test_run(client: AsyncClient, events: Events) -> None:
     }
 
     # Check events
-    published = cast("MockEventPublisher", events.empty_loop).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.empty_loop.publisher
+    ).published
     published.assert_published_all(
         [
             {
@@ -62,3 +77,84 @@ async def test_run(client: AsyncClient, events: Events) -> None:
             }
         ]
     )
+
+
+async def slowing_messages() -> AsyncGenerator[int]:
+    for i in range(10):
+        await asyncio.sleep(0.1 * i)
+        yield i
+
+
+@pytest.mark.asyncio
+async def test_iter_with_timeout(events: Events) -> None:
+    business = EmptyLoop(
+        options=BusinessOptions(),
+        user=AuthenticatedUser(
+            username="bot-mobu-user", scopes=[], token="blah blah"
+        ),
+        discovery_client=DiscoveryClient(),
+        events=events,
+        logger=structlog.get_logger(__file__),
+        flock=None,
+    )
+
+    # The timeout applies to the whole stream, not to each message, so the
+    # stream should end partway through even though every message arrives
+    # well within the timeout.
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    timeout = timedelta(seconds=0.5)
+    stream = business.iter_with_timeout(slowing_messages(), timeout)
+    messages = [m async for m in stream]
+    assert messages == [0, 1, 2]
+    assert 0.5 <= loop.time() - start < 0.6
+
+    # Stopping the business should end the stream immediately.
+    async def consume() -> list[int]:
+        stream = business.iter_with_timeout(slowing_messages(), timeout * 10)
+        return [m async for m in stream]
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0.2)
+    stop = asyncio.create_task(business.stop())
+    assert await asyncio.wait_for(consumer, 0.1) == [0, 1]
+    assert business.stopping
+    stop.cancel()
+
+
+@pytest.mark.asyncio
+async def test_closed_loop_latency(events: Events) -> None:
+    user = AuthenticatedUser(
+        username="bot-mobu-user", scopes=[], token="blah blah"
+    )
+    latency = FlockLatency()
+    business = EmptyLoop(
+        options=BusinessOptions(idle_time=timedelta(0)),
+        user=user,
+        discovery_client=DiscoveryClient(),
+        events=events,
+        logger=structlog.get_logger(__file__),
+        flock=None,
+        latency=latency,
+    )
+
+    # Iterations that take longer than the idle time are the normal cycle of
+    # a closed-loop monkey, so they should not be corrected unless an
+    # expected interval is configured.
+    for seconds in (30, 30, 31, 29, 30):
+        business.record_iteration(timedelta(seconds=seconds))
+    summary = latency.summary().iteration
+    assert summary.count == 5
+    assert summary.p99 == pytest.approx(31, rel=0.01)
+    assert summary.p50 == pytest.approx(30, rel=0.01)
+
+    # With an expected interval, an iteration that runs long is corrected
+    # for the iterations it kept from starting on schedule.
+    latency = FlockLatency()
+    business.latency = latency
+    business.options = BusinessOptions(
+        idle_time=timedelta(0), expected_interval=timedelta(seconds=30)
+    )
+    business.record_iteration(timedelta(seconds=30))
+    business.record_iteration(timedelta(seconds=90))
+    assert latency.summary().iteration.count == 4
@@ -31,6 +31,7 @@ async def test_run(
         "business": {
             "failure_count": 0,
             "name": "GitLFSBusiness",
+            "recent_iterations": ANY,
             "refreshing": False,
             "success_count": 1,
         },
@@ -49,7 +50,10 @@ async def test_run(
     assert "Running Git-LFS check..." in r.text
     assert "Git-LFS check finished after " in r.text
 
-    published = cast("MockEventPublisher", events.git_lfs_check).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.git_lfs_check.publisher
+    ).published
     published.assert_published_all(
         [
             {
@@ -82,6 +86,7 @@ async def test_fail(
         "business": {
             "failure_count": 1,
             "name": "GitLFSBusiness",
+            "recent_iterations": ANY,
             "refreshing": False,
             "success_count": 0,
         },
@@ -100,7 +105,10 @@ async def test_fail(
     assert "Running Git-LFS check..." in r.text
     assert ("mobu.exceptions.SubprocessError") in r.text
 
-    published = cast("MockEventPublisher", events.git_lfs_check).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.git_lfs_check.publisher
+    ).published
     published.assert_published_all(
         [
             {
@@ -78,6 +78,7 @@ async def test_run(
                 "failure_count": 0,
                 "name": "NotebookRunnerCounting",
                 "notebook": "test-notebook.ipynb",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -119,14 +120,15 @@ async def test_run(
         "success": True,
         "username": "bot-mobu-testuser1",
     }
+    await events.flush()
     pub_notebook = cast(
-        "MockEventPublisher", events.notebook_execution
+        "MockEventPublisher", events.notebook_execution.publisher
     ).published
     pub_notebook.assert_published_all([common])
 
     pub_cell = cast(
         "MockEventPublisher",
-        events.notebook_cell_execution,
+        events.notebook_cell_execution.publisher,
     ).published
     pub_cell.assert_published_all(
         [
@@ -189,6 +191,7 @@ async def test_run_debug_log(client: AsyncClient, tmp_path: Path) -> None:
                 "failure_count": 0,
                 "name": "NotebookRunnerCounting",
                 "notebook": "test-notebook.ipynb",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -262,6 +265,7 @@ async def test_run_recursive(
                 "failure_count": 0,
                 "name": "NotebookRunnerCounting",
                 "notebook": ANY,
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -317,7 +321,10 @@ async def test_run_recursive(
         "success": True,
         "username": "bot-mobu-testuser1",
     }
-    published = cast("MockEventPublisher", events.notebook_execution).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.notebook_execution.publisher
+    ).published
     published.assert_published_all(
         [
             item | common
@@ -390,6 +397,7 @@ async def test_run_applications(client: AsyncClient, tmp_path: Path) -> None:
                 "failure_count": 0,
                 "name": "NotebookRunnerCounting",
                 "notebook": ANY,
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -551,6 +559,7 @@ async def test_exclude_dirs(client: AsyncClient, tmp_path: Path) -> None:
                 "failure_count": 0,
                 "name": "NotebookRunnerCounting",
                 "notebook": ANY,
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -646,11 +655,12 @@ async def test_invalid_repo_config(
             "business": {
                 "failure_count": 1,
                 "name": "NotebookRunnerCounting",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 0,
             },
             "name": "bot-mobu-testuser1",
-            "state": "STOPPING",
+            "state": "FINISHED",
             "user": {
                 "scopes": ["exec:notebook"],
                 "token": ANY,
@@ -746,6 +756,7 @@ async def test_alert(
             },
             "name": "NotebookRunnerCounting",
             "notebook": "exception.ipynb",
+            "recent_iterations": ANY,
             "refreshing": False,
             "running_code": bad_code,
             "success_count": 0,
@@ -820,14 +831,15 @@ async def test_alert(
         "repo_hash": repo_hash,
         "username": "bot-mobu-testuser1",
     }
+    await events.flush()
     pub_notebook = cast(
-        "MockEventPublisher", events.notebook_execution
+        "MockEventPublisher", events.notebook_execution.publisher
     ).published
     pub_notebook.assert_published_all([{"success": False} | common])
 
     pub_cell = cast(
         "MockEventPublisher",
-        events.notebook_cell_execution,
+        events.notebook_cell_execution.publisher,
     ).published
     pub_cell.assert_published_all(
         [common | {"cell_id": "ed399c0a", "success": False}]
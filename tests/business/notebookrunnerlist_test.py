@@ -86,6 +86,7 @@ async def test_run_all_notebooks(client: AsyncClient, tmp_path: Path) -> None:
                 "failure_count": 0,
                 "name": "NotebookRunnerList",
                 "notebook": "test-notebook-has-applications.ipynb",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
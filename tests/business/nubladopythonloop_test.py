@@ -76,6 +76,7 @@ async def test_run(
         "business": {
             "failure_count": 0,
             "name": "NubladoPythonLoop",
+            "recent_iterations": ANY,
             "refreshing": False,
             "success_count": 1,
         },
@@ -106,7 +107,10 @@ async def test_run(
     assert r.status_code == 204
 
     # Check events
-    publisher = cast("MockEventPublisher", events.nublado_python_execution)
+    await events.flush()
+    publisher = cast(
+        "MockEventPublisher", events.nublado_python_execution.publisher
+    )
     published = publisher.published
     published.assert_published_all(
         [
@@ -137,7 +141,7 @@ async def test_run(
         ]
     )
 
-    publisher = cast("MockEventPublisher", events.nublado_spawn_lab)
+    publisher = cast("MockEventPublisher", events.nublado_spawn_lab.publisher)
     published = publisher.published
     published.assert_published_all(
         [
@@ -295,8 +299,10 @@ async def test_hub_failed(
         "NubladoPythonLoop - pre execute code"
     )
 
-    # Check events
-    publisher = cast("MockEventPublisher", events.nublado_spawn_lab)
+    # Check events. The two monkeys spawn concurrently, so the order of
+    # their events depends on scheduling.
+    await events.flush()
+    publisher = cast("MockEventPublisher", events.nublado_spawn_lab.publisher)
     published = publisher.published
     published.assert_published_all(
         [
@@ -314,7 +320,8 @@ async def test_hub_failed(
                 "success": True,
                 "username": "bot-mobu-testuser1",
             },
-        ]
+        ],
+        any_order=True,
     )
 
 
@@ -568,7 +575,10 @@ async def test_code_exception(
     )
 
     # Check events
-    publisher = cast("MockEventPublisher", events.nublado_python_execution)
+    await events.flush()
+    publisher = cast(
+        "MockEventPublisher", events.nublado_python_execution.publisher
+    )
     published = publisher.published
     published.assert_published_all(
         [
@@ -876,6 +886,7 @@ async def test_user_spec_groups(
         "business": {
             "failure_count": 0,
             "name": "NubladoPythonLoop",
+            "recent_iterations": ANY,
             "refreshing": False,
             "success_count": 1,
         },
@@ -44,6 +44,7 @@ async def test_run(client: AsyncClient, events: Events) -> None:
             "business": {
                 "failure_count": 0,
                 "name": "SIAQuerySetRunner",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -65,7 +66,10 @@ async def test_run(client: AsyncClient, events: Events) -> None:
         assert "Query finished after " in r.text
 
     # Confirm metrics events
-    published = cast("MockEventPublisher", events.sia_query).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.sia_query.publisher
+    ).published
     published.assert_published_all(
         [
             {
@@ -176,7 +180,10 @@ async def test_failure(
     assert sentry_transaction["transaction"] == "SIAQuerySetRunner - execute"
 
     # Confirm metrics events
-    published = cast("MockEventPublisher", events.sia_query).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.sia_query.publisher
+    ).published
     published.assert_published_all(
         [
             {
@@ -45,6 +45,13 @@ async def test_run(client: AsyncClient, events: Events) -> None:
             "business": {
                 "failure_count": 0,
                 "name": "TAPQueryRunner",
+                "recent_iterations": [
+                    {
+                        "success": True,
+                        "duration": ANY,
+                        "phases": {"mobu.tap.execute_query": ANY},
+                    }
+                ],
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -70,7 +77,10 @@ async def test_run(client: AsyncClient, events: Events) -> None:
         assert found, "Ran one of the appropriate queries"
         assert "Query finished after " in r.text
 
-        published = cast("MockEventPublisher", events.tap_query).published
+        await events.flush()
+        published = cast(
+            "MockEventPublisher", events.tap_query.publisher
+        ).published
         published.assert_published_all(
             [
                 {
@@ -47,6 +47,7 @@ async def test_run(client: AsyncClient, events: Events) -> None:
             "business": {
                 "failure_count": 0,
                 "name": "TAPQuerySetRunner",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": 1,
             },
@@ -68,7 +69,10 @@ async def test_run(client: AsyncClient, events: Events) -> None:
         assert "Query finished after " in r.text
 
     # Confirm metrics events
-    published = cast("MockEventPublisher", events.tap_query).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.tap_query.publisher
+    ).published
     published.assert_published_all(
         [
             {
@@ -178,7 +182,10 @@ async def test_failure(
     assert sentry_transaction["transaction"] == "TAPQuerySetRunner - execute"
 
     # Confirm metrics events
-    published = cast("MockEventPublisher", events.tap_query).published
+    await events.flush()
+    published = cast(
+        "MockEventPublisher", events.tap_query.publisher
+    ).published
     published.assert_published_all(
         [
             {
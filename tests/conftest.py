@@ -108,6 +108,13 @@ def _disable_file_logging() -> None:
     config_dependency.set_path(config_path("base_no_file_logging"))
 
 
+@pytest.fixture
+def _enable_cpu_accounting(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Enable accounting for event loop time by flock."""
+    monkeypatch.setenv("MOBU_CPU_ACCOUNTING", "true")
+    config_dependency.set_path(config_path("base"))
+
+
 @pytest.fixture
 def _multi_replica_0(respx_mock: respx.Router) -> None:
     """Set config for multi-instance."""
@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
+import csv
+import gzip
+import json
+import tarfile
+from io import BytesIO, StringIO
+from time import perf_counter
 from typing import Any
 from unittest.mock import ANY
 
 import pytest
 from httpx import AsyncClient
 
+from mobu.services import outcomes
+from mobu.services.business.empty import EmptyLoop
+
 from ..support.constants import TEST_BASE_URL
 from ..support.util import wait_for_business
 
@@ -45,6 +55,7 @@ async def test_start_stop_refresh(client: AsyncClient) -> None:
                 "business": {
                     "failure_count": 0,
                     "name": "EmptyLoop",
+                    "recent_iterations": ANY,
                     "refreshing": False,
                     "success_count": ANY,
                 },
@@ -99,12 +110,43 @@ async def test_start_stop_refresh(client: AsyncClient) -> None:
         "monkey_count": 1,
         "success_count": 1,
         "failure_count": 0,
+        "recent": [
+            {
+                "window": window,
+                "success_count": 1,
+                "failure_count": 0,
+                "success_rate": 1.0,
+                "iteration_rate": ANY,
+            }
+            for window in (60, 300, 3600)
+        ],
+        "arrival": None,
+        "latency": {
+            "iteration": {
+                "count": 1,
+                "p50": ANY,
+                "p90": ANY,
+                "p99": ANY,
+                "max": ANY,
+            },
+            "phases": {},
+        },
+        "recent_phases": {},
+        "stages": None,
+        "probe": None,
+        "cpu": None,
     }
     assert r.json() == summary
 
     r = await client.get("/mobu/summary")
     assert r.status_code == 200
-    assert r.json() == {"flocks": [summary], "ci_manager": None}
+    assert r.json() == {
+        "flocks": [summary],
+        "ci_manager": None,
+        "event_loop": ANY,
+        "log_writer": ANY,
+        "events": ANY,
+    }
 
     r = await client.get("/mobu/flocks/other")
     assert r.status_code == 404
@@ -164,6 +206,7 @@ async def test_user_list(client: AsyncClient) -> None:
                 "business": {
                     "failure_count": 0,
                     "name": "EmptyLoop",
+                    "recent_iterations": ANY,
                     "refreshing": False,
                     "success_count": ANY,
                 },
@@ -182,6 +225,7 @@ async def test_user_list(client: AsyncClient) -> None:
                 "business": {
                     "failure_count": 0,
                     "name": "EmptyLoop",
+                    "recent_iterations": ANY,
                     "refreshing": False,
                     "success_count": ANY,
                 },
@@ -212,6 +256,430 @@ async def test_user_list(client: AsyncClient) -> None:
     # everything down properly when the server is shut down.
 
 
+@pytest.mark.asyncio
+async def test_update(client: AsyncClient) -> None:
+    config = {
+        "name": "test",
+        "count": 2,
+        "start_batch_size": 2,
+        "start_batch_wait": "1s",
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    monkey = r.json()["monkeys"][0]
+    assert monkey["name"] == "bot-mobu-testuser1"
+
+    # Grow the flock. The existing monkeys should be left alone, and new
+    # monkeys should be started in batches.
+    start = perf_counter()
+    r = await client.patch(
+        "/mobu/flocks/test", json={"count": 5, "idle_time": "10s"}
+    )
+    assert r.status_code == 200
+    assert perf_counter() - start > 1
+    data = r.json()
+    assert data["config"]["count"] == 5
+    assert data["config"]["business"]["options"] == {"idle_time": 10}
+    assert [m["name"] for m in data["monkeys"]] == [
+        f"bot-mobu-testuser{i}" for i in range(1, 6)
+    ]
+    assert data["monkeys"][0]["user"]["token"] == monkey["user"]["token"]
+
+    # Shrink the flock. Only the highest-numbered monkeys should be stopped.
+    r = await client.patch("/mobu/flocks/test", json={"count": 1})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["config"]["count"] == 1
+    assert [m["name"] for m in data["monkeys"]] == ["bot-mobu-testuser1"]
+    assert data["monkeys"][0]["user"]["token"] == monkey["user"]["token"]
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.status_code == 200
+    assert r.json()["monkey_count"] == 1
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+    # Flocks with an explicit list of users can't be resized.
+    config = {
+        "name": "test",
+        "count": 1,
+        "users": [{"username": "bot-mobu-testuser", "uidnumber": 1000}],
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    r = await client.patch("/mobu/flocks/test", json={"count": 2})
+    assert r.status_code == 422
+    assert r.json() == {
+        "detail": [
+            {
+                "loc": ["body", "count"],
+                "msg": "Flock test has an explicit list of users",
+                "type": "flock_not_resizable",
+            }
+        ]
+    }
+    r = await client.patch("/mobu/flocks/test", json={"idle_time": "5s"})
+    assert r.status_code == 200
+
+    r = await client.patch("/mobu/flocks/other", json={"count": 2})
+    assert r.status_code == 404
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_stop_during_update(client: AsyncClient) -> None:
+    config = {
+        "name": "test",
+        "count": 2,
+        "start_batch_size": 2,
+        "start_batch_wait": "10s",
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+
+    # Stopping the flock while it is being grown should interrupt the pause
+    # between batches, and no further monkeys should be started.
+    start = perf_counter()
+    update = asyncio.create_task(
+        client.patch("/mobu/flocks/test", json={"count": 8})
+    )
+    await asyncio.sleep(0.5)
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+    r = await update
+    assert perf_counter() - start < 5
+    assert r.status_code == 200
+    monkeys = r.json()["monkeys"]
+    assert len(monkeys) > 2
+    assert all(m["state"] == "FINISHED" for m in monkeys)
+
+
+@pytest.mark.asyncio
+async def test_select_monkeys(client: AsyncClient) -> None:
+    config = {
+        "name": "test",
+        "count": 3,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    for i in range(1, 4):
+        await wait_for_business(client, f"bot-mobu-testuser{i}")
+
+    r = await client.get(
+        "/mobu/flocks/test",
+        params={"state": "RUNNING", "limit": 2, "fields": "state"},
+    )
+    assert r.status_code == 200
+    assert r.json()["monkeys"] == [
+        {"name": "bot-mobu-testuser1", "state": "RUNNING"},
+        {"name": "bot-mobu-testuser2", "state": "RUNNING"},
+    ]
+    next_url = r.links["next"]["url"]
+    r = await client.get(next_url)
+    assert r.status_code == 200
+    assert r.json()["monkeys"] == [
+        {"name": "bot-mobu-testuser3", "state": "RUNNING"}
+    ]
+    assert "next" not in r.links
+
+    r = await client.get("/mobu/flocks/test/monkeys", params={"limit": 1})
+    assert r.status_code == 200
+    assert r.json() == ["bot-mobu-testuser1"]
+    r = await client.get(r.links["next"]["url"])
+    assert r.json() == ["bot-mobu-testuser2"]
+
+    r = await client.get(
+        "/mobu/flocks/test/monkeys", params={"min_failures": 1}
+    )
+    assert r.status_code == 200
+    assert r.json() == []
+    assert "next" not in r.links
+
+    r = await client.get("/mobu/flocks/test", params={"state": "UNKNOWN"})
+    assert r.status_code == 422
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(outcomes, "monotonic", lambda: 1000.0)
+    config = {
+        "name": "test",
+        "count": 1,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    await wait_for_business(client, "bot-mobu-testuser1")
+
+    # Responses are compact unless formatting for humans is requested.
+    r = await client.get("/mobu/flocks/test")
+    assert r.status_code == 200
+    assert "\n" not in r.text
+    etag = r.headers["ETag"]
+    data = r.json()
+    r = await client.get("/mobu/flocks/test", params={"pretty": True})
+    assert r.text == json.dumps(data, indent=4, sort_keys=True)
+    assert r.headers["ETag"] == etag
+    r = await client.get(
+        "/mobu/flocks/test", headers={"Accept": "application/json; indent=4"}
+    )
+    assert r.text == json.dumps(data, indent=4, sort_keys=True)
+
+    # A client with the current version should get an empty response.
+    r = await client.get("/mobu/flocks/test", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    assert r.content == b""
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.status_code == 200
+    summary_etag = r.headers["ETag"]
+    r = await client.get(
+        "/mobu/flocks/test/summary", headers={"If-None-Match": summary_etag}
+    )
+    assert r.status_code == 304
+
+    # Changing the flock should change its version.
+    r = await client.patch("/mobu/flocks/test", json={"idle_time": "10s"})
+    assert r.status_code == 200
+    r = await client.get("/mobu/flocks/test", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["config"]["business"]["options"] == {"idle_time": 10}
+    r = await client.get(
+        "/mobu/flocks/test/summary", headers={"If-None-Match": summary_etag}
+    )
+    assert r.status_code == 200
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_events(client: AsyncClient) -> None:
+    config = {
+        "name": "test",
+        "count": 1,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    await wait_for_business(client, "bot-mobu-testuser1")
+
+    # The stream ends when the flock is stopped, so it can be read in the
+    # background while deleting the flock.
+    events = asyncio.create_task(client.get("/mobu/flocks/test/events"))
+    await asyncio.sleep(0.1)
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+    r = await events
+    assert r.status_code == 200
+    assert r.headers["Content-Type"].startswith("text/event-stream")
+    assert r.text == (
+        "event: state\n"
+        'data: {"monkey":"bot-mobu-testuser1","state":"STOPPING"}\n\n'
+        "event: state\n"
+        'data: {"monkey":"bot-mobu-testuser1","state":"FINISHED"}\n\n'
+    )
+
+    r = await client.get("/mobu/flocks/test/events")
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_export(client: AsyncClient) -> None:
+    config = {
+        "name": "test",
+        "count": 2,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    await wait_for_business(client, "bot-mobu-testuser2")
+
+    r = await client.get("/mobu/flocks/test/export")
+    assert r.status_code == 200
+    assert r.headers["Content-Type"] == "application/x-tar"
+    assert "test-" in r.headers["Content-Disposition"]
+    with tarfile.open(fileobj=BytesIO(r.content), mode="r:") as tar:
+        names = tar.getnames()
+        assert names == [
+            "test/monkeys.jsonl",
+            "test/logs/bot-mobu-testuser1.log",
+            "test/logs/bot-mobu-testuser2.log",
+        ]
+        status = tar.extractfile("test/monkeys.jsonl")
+        assert status
+        monkeys = [json.loads(line) for line in status]
+        assert [m["name"] for m in monkeys] == [
+            "bot-mobu-testuser1",
+            "bot-mobu-testuser2",
+        ]
+        assert monkeys[0]["business"]["name"] == "EmptyLoop"
+        log = tar.extractfile("test/logs/bot-mobu-testuser1.log")
+        assert log
+        assert b"Idling..." in log.read()
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+    r = await client.get("/mobu/flocks/test/export")
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_records(client: AsyncClient) -> None:
+    config = {
+        "name": "test",
+        "count": 2,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    await wait_for_business(client, "bot-mobu-testuser1")
+    await wait_for_business(client, "bot-mobu-testuser2")
+
+    r = await client.get("/mobu/flocks/test/records")
+    assert r.status_code == 200
+    assert r.headers["Content-Type"] == "application/gzip"
+    assert "Content-Encoding" not in r.headers
+    assert "test-records-" in r.headers["Content-Disposition"]
+    data = gzip.decompress(r.content).decode()
+    records = list(csv.DictReader(StringIO(data)))
+    assert sorted(r["monkey"] for r in records) == [
+        "bot-mobu-testuser1",
+        "bot-mobu-testuser2",
+    ]
+    for record in records:
+        assert record == {
+            "flock": "test",
+            "monkey": ANY,
+            "business": "EmptyLoop",
+            "phase": "",
+            "start": ANY,
+            "duration": ANY,
+            "success": "True",
+            "notebook": "",
+            "cell": "",
+            "query": "",
+        }
+        assert float(record["duration"]) >= 0
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+    r = await client.get("/mobu/flocks/test/records")
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_monkey_log(client: AsyncClient) -> None:
+    config = {
+        "name": "test",
+        "count": 1,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    await wait_for_business(client, "bot-mobu-testuser1")
+    url = "/mobu/flocks/test/monkeys/bot-mobu-testuser1/log"
+
+    r = await client.get(url)
+    assert r.status_code == 200
+    assert r.headers["Accept-Ranges"] == "bytes"
+    log = r.content
+    assert len(log.splitlines()) > 1
+
+    # The log may have grown since it was retrieved, so only check ranges
+    # and tails of what was already there.
+    r = await client.get(url, headers={"Range": "bytes=0-9"})
+    assert r.status_code == 206
+    assert r.headers["Content-Range"].startswith("bytes 0-9/")
+    assert r.content == log[:10]
+    r = await client.get(url, headers={"Range": f"bytes={len(log) - 5}-"})
+    assert r.status_code == 206
+    assert log.endswith(r.content[:5])
+    r = await client.get(url, headers={"Range": "bytes=100000000-"})
+    assert r.status_code == 416
+    assert r.json()["detail"][0]["type"] == "range_not_satisfiable"
+
+    r = await client.get(url, params={"tail": 1})
+    assert r.status_code == 200
+    assert len(r.content.splitlines()) == 1
+    r = await client.get(url, params={"tail": 0})
+    assert r.content == b""
+
+    # Following the log streams it until the monkey is stopped.
+    follow = asyncio.create_task(
+        client.get(url, params={"follow": True, "tail": 1})
+    )
+    await asyncio.sleep(0.1)
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+    r = await follow
+    assert r.status_code == 200
+    assert "Content-Encoding" not in r.headers
+    assert r.content.endswith(b"\n")
+
+
+@pytest.mark.asyncio
+async def test_monkey_log_finished(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def fail(self: EmptyLoop) -> None:
+        await asyncio.sleep(0.5)
+        raise RuntimeError("Some error")
+
+    monkeypatch.setattr(EmptyLoop, "execute", fail)
+    config = {
+        "name": "test",
+        "count": 1,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+    url = "/mobu/flocks/test/monkeys/bot-mobu-testuser1/log"
+
+    # The monkey doesn't restart after the error, so following its log ends
+    # when it finishes by itself, without the flock being stopped.
+    async with asyncio.timeout(10):
+        r = await client.get(url, params={"follow": True})
+    assert r.status_code == 200
+    assert b"Some error" in r.content
+    r = await client.get("/mobu/flocks/test/monkeys/bot-mobu-testuser1")
+    assert r.json()["state"] == "FINISHED"
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
 @pytest.mark.asyncio
 async def test_errors(client: AsyncClient) -> None:
     # Both users and user_spec given.
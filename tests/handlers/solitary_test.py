@@ -2,13 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import ANY
 
 import pytest
+import structlog
+from fastapi import FastAPI
 from httpx import AsyncClient
 from rubin.nublado.client import MockJupyter
 from safir.testing.slack import MockSlackWebhook
 
+from mobu.dependencies.context import context_dependency
+from mobu.factory import Factory
+from mobu.models.business.empty import EmptyLoopConfig
+from mobu.models.solitary import SolitaryConfig
+from mobu.models.user import User
+
 
 @pytest.mark.asyncio
 async def test_run(client: AsyncClient) -> None:
@@ -55,3 +64,93 @@ async def test_error(
     )
     assert "Exception: some error\n" in result["error"]
     assert "Exception: some error" in result["log"]
+
+
+@pytest.mark.asyncio
+async def test_jobs(client: AsyncClient) -> None:
+    r = await client.post(
+        "/mobu/jobs",
+        json={
+            "user": {"username": "bot-mobu-solitary"},
+            "scopes": ["exec:notebook"],
+            "business": {"type": "EmptyLoop"},
+        },
+    )
+    assert r.status_code == 202
+    job = r.json()
+    assert job == {
+        "id": ANY,
+        "state": ANY,
+        "username": "bot-mobu-solitary",
+        "business": "EmptyLoop",
+        "submit_time": ANY,
+    }
+    job_url = r.headers["Location"]
+    assert job_url.endswith(f"/mobu/jobs/{job['id']}")
+
+    for _ in range(10):
+        r = await client.get(job_url)
+        assert r.status_code == 200
+        if r.json()["state"] == "FINISHED":
+            break
+        await asyncio.sleep(0.1)
+    assert r.json() == {
+        "id": job["id"],
+        "state": "FINISHED",
+        "username": "bot-mobu-solitary",
+        "business": "EmptyLoop",
+        "submit_time": job["submit_time"],
+        "start_time": ANY,
+        "end_time": ANY,
+        "success": True,
+    }
+    r = await client.get("/mobu/jobs")
+    assert r.status_code == 200
+    assert [j["id"] for j in r.json()] == [job["id"]]
+
+    r = await client.get(f"{job_url}/log")
+    assert r.status_code == 200
+    assert "Starting up..." in r.text
+    assert "Shutting down..." in r.text
+
+    r = await client.delete(job_url)
+    assert r.status_code == 204
+    r = await client.get(job_url)
+    assert r.status_code == 404
+    r = await client.get(f"{job_url}/log")
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs(client: AsyncClient) -> None:
+    config = {
+        "user": {"username": "bot-mobu-solitary"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+
+    # Monkeys for the same user must not write to each other's logs.
+    responses = await asyncio.gather(
+        *(client.post("/mobu/run", json=config) for _ in range(2))
+    )
+    for r in responses:
+        assert r.status_code == 200
+        log = r.json()["log"]
+        assert log.count("Starting up...") == 1
+        assert log.count("Shutting down...") == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_token_storage(app: FastAPI) -> None:
+    # Solitary monkeys use the token storage of the process, so that they
+    # share its limit on concurrent token creation and its token cache.
+    process_context = context_dependency.process_context
+    factory = Factory(process_context, structlog.get_logger("mobu"))
+    solitary = factory.create_solitary(
+        SolitaryConfig(
+            user=User(username="bot-mobu-solitary"),
+            scopes=["exec:notebook"],
+            business=EmptyLoopConfig(type="EmptyLoop"),
+        )
+    )
+    assert solitary._gafaelfawr is process_context.gafaelfawr_storage
@@ -0,0 +1,50 @@
+"""Tests for the mobu middleware."""
+
+from __future__ import annotations
+
+import pytest
+from starlette.requests import Request
+
+from mobu.middleware import should_compress
+
+
+def make_request(
+    path: str, query: str = "", headers: dict[str, str] | None = None
+) -> Request:
+    raw_headers = [
+        (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+    ]
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": raw_headers,
+    }
+    return Request(scope)
+
+
+@pytest.mark.parametrize(
+    ("path", "query", "headers", "expected"),
+    [
+        ("/mobu/flocks", "", None, True),
+        ("/mobu/flocks/test/summary", "", None, True),
+        ("/mobu/flocks/test/events", "", None, False),
+        ("/mobu/flocks/test/records", "", None, False),
+        ("/mobu/flocks/test/monkeys/user/log", "", None, True),
+        ("/mobu/flocks/test/monkeys/user/log", "follow=false", None, True),
+        ("/mobu/flocks/test/monkeys/user/log", "follow=true", None, False),
+        ("/mobu/flocks/test/monkeys/user/log", "follow=1", None, False),
+        (
+            "/mobu/flocks/test/monkeys/user/log",
+            "",
+            {"Range": "bytes=0-9"},
+            False,
+        ),
+    ],
+)
+def test_should_compress(
+    path: str, query: str, headers: dict[str, str] | None, *, expected: bool
+) -> None:
+    request = make_request(path, query, headers)
+    assert should_compress(request) == expected
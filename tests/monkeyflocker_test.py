@@ -86,6 +86,7 @@ def test_start_report_refresh_stop(
                 "business": {
                     "failure_count": 0,
                     "name": "EmptyLoop",
+                    "recent_iterations": ANY,
                     "refreshing": ANY,
                     "success_count": ANY,
                 },
@@ -17,6 +17,7 @@ async def assert_users(client: AsyncClient, users: list[int]) -> None:
             "business": {
                 "failure_count": 0,
                 "name": "EmptyLoop",
+                "recent_iterations": ANY,
                 "refreshing": False,
                 "success_count": ANY,
             },
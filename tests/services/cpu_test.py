@@ -0,0 +1,68 @@
+"""Tests for attributing event loop time to flocks."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from mobu.services.cpu import CpuAccount, charge_tasks_to, cpu_task_factory
+
+
+def block_loop() -> None:
+    time.sleep(0.1)
+
+
+async def work() -> None:
+    block_loop()
+    await asyncio.sleep(0.2)
+    block_loop()
+
+
+async def spawn_work() -> None:
+    await asyncio.create_task(work())
+
+
+@pytest.mark.asyncio
+async def test_cpu_task_factory() -> None:
+    loop = asyncio.get_running_loop()
+    loop.set_task_factory(cpu_task_factory)
+    try:
+        account = CpuAccount()
+        with charge_tasks_to(account):
+            task = asyncio.create_task(spawn_work())
+        await asyncio.gather(task, work())
+    finally:
+        loop.set_task_factory(None)
+
+    # Only the two blocking calls of the task created by the charged task
+    # should count, not the time it spent sleeping or the uncharged work.
+    assert 0.2 <= account.seconds < 0.3
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_enable_cpu_accounting")
+async def test_flock_cpu(client: AsyncClient) -> None:
+    r = await client.put(
+        "/mobu/flocks",
+        json={
+            "name": "test",
+            "count": 2,
+            "user_spec": {"username_prefix": "bot-mobu-testuser"},
+            "scopes": ["exec:notebook"],
+            "business": {"type": "EmptyLoop", "options": {"idle_time": 0.1}},
+        },
+    )
+    assert r.status_code == 201
+
+    await asyncio.sleep(0.5)
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.status_code == 200
+    cpu = r.json()["cpu"]
+    assert cpu["seconds"] > 0
+    assert 0 < cpu["per_iteration"] < cpu["seconds"]
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
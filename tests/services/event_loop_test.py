@@ -0,0 +1,114 @@
+"""Tests for monitoring the health of the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import timedelta
+from typing import cast
+from unittest.mock import ANY
+
+import pytest
+import structlog
+import uvloop
+from safir.metrics import MockEventPublisher
+
+from mobu.events import Events
+from mobu.services import event_loop
+from mobu.services.cpu import CpuAccount, charge_tasks_to, cpu_task_factory
+from mobu.services.event_loop import EventLoopMonitor, set_loop_owner
+
+
+async def block_loop() -> None:
+    set_loop_owner("test", "EmptyLoop")
+    time.sleep(0.2)  # noqa: ASYNC251
+
+
+@pytest.mark.asyncio
+async def test_slow_callbacks(
+    events: Events, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        event_loop, "EVENT_LOOP_HEALTH_INTERVAL", timedelta(seconds=0.5)
+    )
+    logger = structlog.get_logger("mobu")
+    monitor = EventLoopMonitor(events, logger, time_steps=True)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+        blocker = asyncio.create_task(block_loop())
+        await asyncio.sleep(0.6)
+        await blocker
+    finally:
+        await monitor.aclose()
+
+    summary = monitor.summary()
+    assert summary.lag.count > 0
+    assert summary.lag.max is not None
+    assert summary.lag.max >= 0.1
+    assert [
+        (s.flock, s.business, s.count) for s in summary.slow_callbacks
+    ] == [("test", "EmptyLoop", 1)]
+    assert summary.slow_callbacks[0].max >= 0.2
+
+    await events.flush()
+    publisher = cast("MockEventPublisher", events.slow_callbacks.publisher)
+    publisher.published.assert_published_all(
+        [
+            {
+                "business": "EmptyLoop",
+                "count": 1,
+                "duration": ANY,
+                "flock": "test",
+                "max_duration": ANY,
+            }
+        ]
+    )
+
+
+def test_other_event_loop() -> None:
+    logger = structlog.get_logger("mobu")
+    monitor = EventLoopMonitor(Events(), logger, time_steps=True)
+    account = CpuAccount()
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        loop.set_task_factory(cpu_task_factory)
+        monitor.start()
+        try:
+            with charge_tasks_to(account):
+                await asyncio.create_task(block_loop())
+        finally:
+            await monitor.aclose()
+
+        # The task factory that was installed before should be restored.
+        assert loop.get_task_factory() is cpu_task_factory
+
+    # Slow steps should be found on event loops other than asyncio's own,
+    # and any task factory already installed should still be used.
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(run())
+    assert [
+        (s.flock, s.business, s.count)
+        for s in monitor.summary().slow_callbacks
+    ] == [("test", "EmptyLoop", 1)]
+    assert account.seconds >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_no_step_timing(events: Events) -> None:
+    monitor = EventLoopMonitor(events, structlog.get_logger("mobu"))
+    loop = asyncio.get_running_loop()
+    factory = loop.get_task_factory()
+    monitor.start()
+    try:
+        # Without step timing, tasks are created as they would be otherwise,
+        # and slow steps aren't counted.
+        assert loop.get_task_factory() is factory
+        await asyncio.create_task(block_loop())
+    finally:
+        await monitor.aclose()
+
+    summary = monitor.summary()
+    assert summary.slow_callback_threshold is None
+    assert summary.slow_callbacks == []
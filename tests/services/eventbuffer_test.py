@@ -0,0 +1,99 @@
+"""Tests for the background publishing of metrics events."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import cast
+from unittest.mock import Mock
+
+import pytest
+from safir.metrics import EventPayload, EventPublisher
+
+from mobu.events import EmptyLoopExecution
+from mobu.services.eventbuffer import BufferedPublisher, EventBuffer
+
+
+class SlowPublisher:
+    """Publisher that records events after a delay, failing on request."""
+
+    def __init__(self) -> None:
+        self.published: list[EventPayload] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def publish(self, payload: EmptyLoopExecution) -> None:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if not payload.success:
+            raise RuntimeError("Publishing failed")
+        self.published.append(payload)
+
+
+def _event(*, success: bool = True) -> EmptyLoopExecution:
+    return EmptyLoopExecution(
+        flock="test",
+        business="EmptyLoop",
+        username="bot-mobu-user1",
+        success=success,
+    )
+
+
+@pytest.mark.asyncio
+async def test_publish() -> None:
+    underlying = SlowPublisher()
+    buffer = EventBuffer(batch_size=3)
+    publisher = BufferedPublisher(cast("EventPublisher", underlying), buffer)
+    buffer.start()
+
+    # Publishing only queues the event.
+    for _ in range(7):
+        assert publisher.publish(_event())
+    publisher.publish(_event(success=False))
+    assert underlying.published == []
+    assert buffer.summary().queued == 8
+
+    await buffer.flush()
+    assert len(underlying.published) == 7
+    assert underlying.max_active == 3
+    summary = buffer.summary()
+    assert summary.queued == 0
+    assert summary.published == 7
+    assert summary.failed == 1
+    assert summary.dropped == 0
+    assert summary.batches == 3
+
+    # Closing publishes anything still queued and drops later events.
+    publisher.publish(_event())
+    await buffer.aclose()
+    assert len(underlying.published) == 8
+    assert not publisher.publish(_event())
+    assert buffer.summary().dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_overflow() -> None:
+    underlying = SlowPublisher()
+    logger = Mock()
+    buffer = EventBuffer(size=5, logger=logger)
+    publisher = BufferedPublisher(cast("EventPublisher", underlying), buffer)
+    buffer.start()
+
+    # Events beyond the size of the buffer are dropped until the background
+    # task catches up, with one warning when dropping starts and another
+    # with the number dropped once it stops.
+    results = [publisher.publish(_event()) for _ in range(8)]
+    assert results == [True] * 5 + [False] * 3
+    assert logger.warning.call_count == 1
+    await buffer.flush()
+    assert publisher.publish(_event())
+    assert logger.warning.call_count == 1
+    logger.info.assert_called_once_with(
+        "Queueing metrics events again", dropped=3
+    )
+    await buffer.aclose()
+    assert len(underlying.published) == 6
+    summary = buffer.summary()
+    assert summary.published == 6
+    assert summary.dropped == 3
@@ -0,0 +1,105 @@
+"""Tests for the feed of events about a flock."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+
+from mobu.models.monkey import MonkeyState
+from mobu.services.feed import FlockFeed
+
+
+def _parse(message: bytes) -> tuple[str, dict]:
+    event, data = message.decode().removesuffix("\n\n").split("\n")
+    return event.removeprefix("event: "), json.loads(data[len("data: ") :])
+
+
+@pytest.mark.asyncio
+async def test_feed() -> None:
+    feed = FlockFeed()
+    feed.publish_state("monkey", MonkeyState.RUNNING)
+    subscription = feed.subscribe()
+    stream = subscription.stream()
+    first = asyncio.create_task(anext(stream))
+    await asyncio.sleep(0)
+    feed.publish_state("monkey", MonkeyState.ERROR)
+    feed.publish_iteration(
+        "monkey", success=True, duration=timedelta(seconds=1.5)
+    )
+    feed.publish_error("monkey", ValueError("oops"))
+
+    # Events published before the stream started should not be seen.
+    assert _parse(await first) == (
+        "state",
+        {"monkey": "monkey", "state": "ERROR"},
+    )
+    assert _parse(await anext(stream)) == (
+        "iteration",
+        {"monkey": "monkey", "success": True, "duration": 1.5},
+    )
+    assert _parse(await anext(stream)) == (
+        "error",
+        {"monkey": "monkey", "error": "ValueError", "message": "oops"},
+    )
+
+    # Waiting for an event should be ended by the next published event.
+    task = asyncio.create_task(anext(stream))
+    await asyncio.sleep(0.1)
+    assert not task.done()
+    feed.publish_iteration("monkey", success=False, duration=None)
+    assert _parse(await task) == (
+        "iteration",
+        {"monkey": "monkey", "success": False, "duration": None},
+    )
+    feed.publish_iteration("monkey", success=True, duration=timedelta(0))
+    assert _parse(await anext(stream)) == (
+        "iteration",
+        {"monkey": "monkey", "success": True, "duration": 0.0},
+    )
+
+    # Closing the feed should end the stream and remove the subscription.
+    feed.close()
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    feed.publish_state("monkey", MonkeyState.FINISHED)
+    assert not subscription.dropped
+
+    # Streams started after the feed was closed should end immediately.
+    stream = feed.subscribe().stream()
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+
+
+@pytest.mark.asyncio
+async def test_unstarted_stream() -> None:
+    feed = FlockFeed(buffer_size=1)
+
+    # A subscription whose stream is never started, such as when the client
+    # disconnects before the response starts, should not buffer events.
+    subscription = feed.subscribe()
+    subscription.stream()
+    for _ in range(3):
+        feed.publish_state("monkey", MonkeyState.RUNNING)
+    assert not subscription.dropped
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber() -> None:
+    feed = FlockFeed(buffer_size=2)
+    subscription = feed.subscribe()
+    stream = subscription.stream(keepalive=timedelta(seconds=0.1))
+    first = asyncio.create_task(anext(stream))
+    await asyncio.sleep(0)
+    for _ in range(5):
+        feed.publish_state("monkey", MonkeyState.RUNNING)
+    assert subscription.dropped == 3
+
+    # Buffered events should be sent before reporting the dropped events.
+    assert _parse(await first)[0] == "state"
+    assert _parse(await anext(stream))[0] == "state"
+    assert _parse(await anext(stream)) == ("dropped", {"count": 3})
+    assert await anext(stream) == b": keepalive\n\n"
+    await stream.aclose()
@@ -1,9 +1,21 @@
 """Tests for flock functionality."""
 
+import asyncio
 from time import perf_counter
+from typing import cast
 
 import pytest
+import structlog
 from httpx import AsyncClient
+from safir.metrics import MockEventPublisher
+
+from mobu.events import Events
+from mobu.models.flock import ArrivalDistribution, ArrivalRateConfig
+from mobu.models.user import AuthenticatedUser, User
+from mobu.services.dispatcher import ArrivalDispatcher
+from mobu.storage.gafaelfawr import GafaelfawrStorage
+
+from ..support.util import wait_for_business
 
 
 @pytest.mark.asyncio
@@ -32,3 +44,235 @@ async def test_batched_start(client: AsyncClient) -> None:
     # Make sure it took at least as much time as the total of the waits
     elapsed = end - start
     assert elapsed > 3
+
+
+@pytest.mark.asyncio
+async def test_unbatched_start(client: AsyncClient) -> None:
+    r = await client.put(
+        "/mobu/flocks",
+        json={
+            "name": "test",
+            "count": 5,
+            "user_spec": {"username_prefix": "bot-mobu-testuser"},
+            "scopes": ["exec:notebook"],
+            "business": {"type": "EmptyLoop"},
+        },
+    )
+    assert r.status_code == 201
+
+    # Every monkey is started as soon as its token exists.
+    r = await client.get("/mobu/flocks/test/monkeys")
+    assert r.json() == [f"bot-mobu-testuser{i}" for i in range(1, 6)]
+    for i in range(1, 6):
+        await wait_for_business(client, f"bot-mobu-testuser{i}")
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_start_token_error(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    create_service_token = GafaelfawrStorage._create_service_token
+
+    async def fail(
+        self: GafaelfawrStorage, user: User, scopes: list[str]
+    ) -> AuthenticatedUser:
+        if user.username == "bot-mobu-testuser3":
+            raise RuntimeError("Cannot create token")
+        return await create_service_token(self, user, scopes)
+
+    config = {
+        "name": "test",
+        "count": 2,
+        "user_spec": {"username_prefix": "bot-mobu-testuser"},
+        "scopes": ["exec:notebook"],
+        "business": {"type": "EmptyLoop"},
+    }
+    r = await client.put("/mobu/flocks", json=config)
+    assert r.status_code == 201
+
+    # Growing the flock fails on the third token, and only the monkeys that
+    # were already running before the resize are left.
+    monkeypatch.setattr(GafaelfawrStorage, "_create_service_token", fail)
+    with pytest.raises(RuntimeError):
+        await client.patch("/mobu/flocks/test", json={"count": 5})
+    r = await client.get("/mobu/flocks/test/monkeys")
+    assert r.json() == ["bot-mobu-testuser1", "bot-mobu-testuser2"]
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.json()["monkey_count"] == 2
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_arrival_rate(client: AsyncClient) -> None:
+    r = await client.put(
+        "/mobu/flocks",
+        json={
+            "name": "test",
+            "count": 2,
+            "arrival_rate": {"rate": 20, "distribution": "poisson"},
+            "user_spec": {"username_prefix": "bot-mobu-testuser"},
+            "scopes": ["exec:notebook"],
+            "business": {
+                # The idle time would throttle a closed-loop flock to two
+                # iterations, so anything more shows the dispatcher is in
+                # charge.
+                "type": "EmptyLoop",
+                "options": {"idle_time": "1h"},
+            },
+        },
+    )
+    assert r.status_code == 201
+
+    await asyncio.sleep(1)
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.status_code == 200
+    summary = r.json()
+    assert summary["arrival"]["rate"] == 20
+    assert summary["arrival"]["dispatched_count"] > 2
+    assert summary["success_count"] > 2
+    assert summary["failure_count"] == 0
+    latency = summary["latency"]["iteration"]
+    assert latency["count"] == summary["success_count"]
+    assert 0 <= latency["p50"] <= latency["p99"] <= latency["max"]
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_missed() -> None:
+    config = ArrivalRateConfig(
+        rate=40, distribution=ArrivalDistribution.CONSTANT
+    )
+    logger = structlog.get_logger("mobu")
+    dispatcher = ArrivalDispatcher(config, replica_count=2, logger=logger)
+    assert dispatcher.rate == 20
+
+    # With nobody waiting, every arrival is missed rather than queued.
+    task = asyncio.create_task(dispatcher.run())
+    await asyncio.sleep(0.5)
+    assert dispatcher.dispatched_count == 0
+    assert dispatcher.missed_count >= 5
+
+    # A waiting monkey is released on the next arrival with the scheduled
+    # start time of that arrival.
+    intended = await asyncio.wait_for(dispatcher.wait(), 1)
+    assert dispatcher.dispatched_count == 1
+    assert intended.tzinfo is not None
+
+    task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_load_profile_resize(client: AsyncClient) -> None:
+    r = await client.put(
+        "/mobu/flocks",
+        json={
+            "name": "test",
+            "count": 1,
+            "load_profile": [
+                {"type": "hold", "duration": "1s"},
+                {"type": "step", "duration": "1s", "count": 1},
+            ],
+            "user_spec": {"username_prefix": "bot-mobu-testuser"},
+            "scopes": ["exec:notebook"],
+            "business": {"type": "EmptyLoop"},
+        },
+    )
+    assert r.status_code == 201
+
+    # Resize the flock during the hold. The next stage should start from
+    # the new size, so stepping back to the original size resizes it.
+    r = await client.patch("/mobu/flocks/test", json={"count": 3})
+    assert r.status_code == 200
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.json()["monkey_count"] == 3
+    await asyncio.sleep(1.5)
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.json()["monkey_count"] == 1
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_load_profile(client: AsyncClient, events: Events) -> None:
+    r = await client.put(
+        "/mobu/flocks",
+        json={
+            "name": "test",
+            "count": 1,
+            "load_profile": [
+                {"type": "ramp", "duration": "2s", "count": 3},
+                {"type": "hold", "duration": "1s"},
+                {"type": "step", "duration": "1s", "count": 1},
+            ],
+            "user_spec": {"username_prefix": "bot-mobu-testuser"},
+            "scopes": ["exec:notebook"],
+            "business": {"type": "EmptyLoop"},
+        },
+    )
+    assert r.status_code == 201
+
+    # Partway through the hold stage, the ramp should have finished.
+    await asyncio.sleep(2.5)
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.status_code == 200
+    summary = r.json()
+    assert summary["monkey_count"] == 3
+    assert [s["stage"]["type"] for s in summary["stages"]] == ["ramp", "hold"]
+    r = await client.get("/mobu/flocks/test/monkeys")
+    assert r.json() == [f"bot-mobu-testuser{i}" for i in range(1, 4)]
+
+    # After the step down, the flock should be back to the original monkey.
+    await asyncio.sleep(1)
+    r = await client.get("/mobu/flocks/test/summary")
+    summary = r.json()
+    assert summary["monkey_count"] == 1
+    assert len(summary["stages"]) == 3
+
+    # Iterations before the profile started don't belong to any stage.
+    stage_count = sum(s["iteration"]["count"] for s in summary["stages"])
+    assert 0 < stage_count < summary["latency"]["iteration"]["count"]
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+    await events.flush()
+    publisher = cast("MockEventPublisher", events.load_stage.publisher)
+    publisher.published.assert_published_all(
+        [
+            {
+                "business": "EmptyLoop",
+                "count": 3,
+                "duration": "PT2S",
+                "flock": "test",
+                "rate": None,
+                "stage": 0,
+                "type": "ramp",
+            },
+            {
+                "business": "EmptyLoop",
+                "count": None,
+                "duration": "PT1S",
+                "flock": "test",
+                "rate": None,
+                "stage": 1,
+                "type": "hold",
+            },
+            {
+                "business": "EmptyLoop",
+                "count": 1,
+                "duration": "PT1S",
+                "flock": "test",
+                "rate": None,
+                "stage": 2,
+                "type": "step",
+            },
+        ]
+    )
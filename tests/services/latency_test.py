@@ -0,0 +1,79 @@
+"""Tests for latency histograms."""
+
+from __future__ import annotations
+
+from contextvars import copy_context
+from datetime import timedelta
+
+import pytest
+
+from mobu.services.latency import (
+    FlockLatency,
+    LatencyHistogram,
+    record_phase,
+    set_phase_recorder,
+)
+
+
+def test_percentiles() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    assert histogram.summary().p99 is None
+
+    for ms in range(1, 1001):
+        histogram.record(timedelta(milliseconds=ms))
+    assert histogram.count == 1000
+
+    summary = histogram.summary()
+    assert summary.count == 1000
+    assert summary.p50 == pytest.approx(0.5, rel=0.01)
+    assert summary.p90 == pytest.approx(0.9, rel=0.01)
+    assert summary.p99 == pytest.approx(0.99, rel=0.01)
+    assert summary.max == 1.0
+
+    # Values beyond the trackable range are clamped but the maximum is exact.
+    histogram.record(timedelta(days=3))
+    assert histogram.percentile(100) == timedelta(days=3)
+
+
+def test_coordinated_omission() -> None:
+    histogram = LatencyHistogram()
+    histogram.record_corrected(timedelta(seconds=1), timedelta(seconds=10))
+    assert histogram.count == 1
+
+    # A 45s iteration with an expected interval of 10s hides the iterations
+    # that should have started at 10s, 20s, and 30s.
+    histogram.record_corrected(timedelta(seconds=45), timedelta(seconds=10))
+    assert histogram.count == 5
+    assert histogram.percentile(40) == pytest.approx(
+        timedelta(seconds=15), rel=0.01
+    )
+
+    histogram.record_corrected(timedelta(seconds=45), timedelta(0))
+    assert histogram.count == 6
+
+
+def test_flock_latency() -> None:
+    latency = FlockLatency()
+    latency.record_iteration(timedelta(seconds=2))
+    latency.record_phase("spawn_lab", timedelta(seconds=40))
+    assert latency.version == 2
+
+    # Failed phases aren't recorded, so don't change the version.
+    latency.record_phase("spawn_lab", timedelta(seconds=1), success=False)
+    assert latency.version == 2
+
+    # Phase latencies go to whatever recorder is set for the context.
+    def run_business() -> None:
+        set_phase_recorder(latency.record_phase)
+        record_phase("spawn_lab", timedelta(seconds=240))
+
+    record_phase("spawn_lab", timedelta(seconds=60))
+    copy_context().run(run_business)
+
+    assert latency.version == 3
+    summary = latency.summary()
+    assert summary.iteration.count == 1
+    assert list(summary.phases.keys()) == ["spawn_lab"]
+    assert summary.phases["spawn_lab"].count == 2
+    assert summary.phases["spawn_lab"].max == 240
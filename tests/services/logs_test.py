@@ -0,0 +1,56 @@
+"""Tests for reading parts of monkey logs."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mobu.exceptions import RangeNotSatisfiableError
+from mobu.services.logs import follow_log, parse_range
+from mobu.services.logstore import LogStore
+
+
+def test_parse_range() -> None:
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=90-200", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-200", 100) == (0, 99)
+
+    # Unsupported or invalid ranges are ignored.
+    assert parse_range("bytes=0-9,20-29", 100) is None
+    assert parse_range("bytes=9-0", 100) is None
+    assert parse_range("bytes=-", 100) is None
+    assert parse_range("lines=0-9", 100) is None
+
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range("bytes=100-", 100)
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range("bytes=-0", 100)
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range("bytes=-10", 0)
+
+
+@pytest.mark.asyncio
+async def test_follow_log() -> None:
+    store = LogStore(segment_size=10, max_size=1000, budget=1000)
+    log = store.create_log("test")
+    log.write("one\ntwo\n")
+    done = False
+    stream = follow_log(log, 4, lambda: done)
+
+    assert await anext(stream) == b"two\n"
+    next_chunk = asyncio.create_task(anext(stream))
+    await asyncio.sleep(0.2)
+    assert not next_chunk.done()
+    log.write("three\n")
+    assert await next_chunk == b"three\n"
+
+    # Segments rotated while the log is followed are read, and data written
+    # before the log is finished is still returned.
+    log.write("four\n")
+    log.write("five\n")
+    done = True
+    assert b"".join([c async for c in stream]) == b"four\nfive\n"
+    store.close()
@@ -0,0 +1,145 @@
+"""Tests for the local disk storage of monkey logs."""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from mobu.services import logstore
+from mobu.services.logstore import LogStore, MonkeyLog
+
+
+def _read_all(log: MonkeyLog) -> bytes:
+    return b"".join(log.read(*log.bounds()))
+
+
+def test_rotation(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Use a small chunk size so that lines span chunks.
+    monkeypatch.setattr(logstore, "_CHUNK_SIZE", 7)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    store = LogStore(segment_size=30, max_size=1000, budget=1000)
+    log = store.create_log("monkey")
+    assert log.bounds() == (0, 0)
+    assert log.find_tail(3, 0) == 0
+
+    lines = [f"line {i}\n" for i in range(10)]
+    for line in lines:
+        log.write(line)
+    data = "".join(lines).encode()
+    assert log.bounds() == (0, len(data))
+    assert _read_all(log) == data
+    assert b"".join(log.read(5, 50)) == data[5:50]
+
+    # The log was rotated into compressed segments.
+    (directory,) = tmp_path.glob("mobu-logs-*/monkey-*")
+    names = sorted(p.name for p in directory.iterdir())
+    assert [n for n in names if n.endswith(".log.gz")]
+    assert len([n for n in names if n.endswith(".log")]) <= 1
+
+    # Tails can span segments and chunks.
+    for count in (1, 3, 9):
+        start = log.find_tail(count, len(data))
+        tail = b"".join(log.read(start, len(data)))
+        assert tail == "".join(lines[-count:]).encode()
+    assert log.find_tail(10, len(data)) == 0
+    assert log.find_tail(100, len(data)) == 0
+    assert log.find_tail(0, len(data)) == len(data)
+
+    # Without a final newline, the partial last line counts as a line.
+    log.write("partial")
+    _, end = log.bounds()
+    start = log.find_tail(2, end)
+    assert b"".join(log.read(start, end)) == b"line 9\npartial"
+
+    log.delete()
+    assert not directory.exists()
+    assert store.usage == 0
+    assert b"".join(log.read(0, end)) == b""
+    store.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_eviction() -> None:
+    store = LogStore(segment_size=100, max_size=300, budget=350)
+    first = store.create_log("first")
+    second = store.create_log("second")
+
+    # Write one line per segment. Vary the data so that the compressed
+    # segments aren't trivially small.
+    def fill(log: MonkeyLog, count: int) -> None:
+        for i in range(count):
+            data = "".join(chr(48 + (i * j) % 75) for j in range(95))
+            log.write(f"{i:04d}{data}\n")
+
+    # The log of one monkey is limited to its maximum size, with the oldest
+    # data deleted first.
+    fill(first, 10)
+    start, end = first.bounds()
+    assert end == 1000
+    assert start > 0
+    assert _read_all(first).startswith(f"{start // 100:04d}".encode())
+    assert 0 < store.usage <= 300
+
+    # All logs are limited to the budget, again deleting the oldest data of
+    # any log first.
+    fill(second, 10)
+    assert 0 < store.usage <= 350
+    assert first.bounds()[0] > start
+    assert b"".join(first.read(0, 10)) == b""
+
+    store.close()
+
+
+def test_delete_forgets_segments() -> None:
+    store = LogStore(segment_size=10, max_size=1000, budget=1000)
+    first = store.create_log("first")
+    second = store.create_log("second")
+    for i in range(5):
+        first.write(f"first {i:04d}\n")
+        second.write(f"second {i:04d}\n")
+    assert len(store._segments) == 10
+
+    # Deleting a log removes its segments from the store, so that the store
+    # doesn't keep the deleted log alive.
+    first.delete()
+    assert len(store._segments) == 5
+    assert all(log is second for log, _ in store._segments)
+    second.delete()
+    assert len(store._segments) == 0
+    assert store.usage == 0
+
+    # Segments deleted to keep a log within its maximum size are also
+    # removed.
+    store.max_size = 100
+    third = store.create_log("third")
+    for i in range(10):
+        third.write(f"third {i:04d}\n")
+    assert 0 < len(store._segments) < 10
+    third.delete()
+    assert len(store._segments) == 0
+
+    store.close()
+
+
+def test_budget_with_many_logs() -> None:
+    store = LogStore(segment_size=10000, max_size=10000, budget=1000)
+    logs = [store.create_log(f"monkey{i}") for i in range(5)]
+
+    # The segments being written can't be deleted, so with enough logs they
+    # are compressed well before the segment size to stay within budget.
+    assert store.rotation_size == 100
+    for i in range(50):
+        for log in logs:
+            log.write(f"line {i:04d} of the log\n")
+        assert store.usage <= 1000
+    for log in logs:
+        assert log.bounds()[1] == 50 * len("line 0000 of the log\n")
+        assert log.bounds()[0] > 0
+
+    # Deleting logs lets the remaining ones use larger segments.
+    for log in logs[1:]:
+        log.delete()
+    assert store.rotation_size == 500
+    store.close()
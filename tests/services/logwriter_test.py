@@ -0,0 +1,109 @@
+"""Tests for the background writer of monkey logs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from mobu.services.logstore import LogStore, MonkeyLog
+from mobu.services.logwriter import LogWriter
+
+
+def _read_all(log: MonkeyLog) -> bytes:
+    return b"".join(log.read(*log.bounds()))
+
+
+def _block(writer: LogWriter) -> threading.Event:
+    """Hold the writer thread until the returned event is set."""
+    running = threading.Event()
+    release = threading.Event()
+
+    def wait() -> None:
+        running.set()
+        release.wait()
+
+    writer.defer(wait)
+    running.wait()
+    return release
+
+
+@pytest.mark.asyncio
+async def test_writer() -> None:
+    store = LogStore(segment_size=1000, max_size=10000, budget=10000)
+    writer = LogWriter(store)
+    log = writer.create_log("test")
+    handler = writer.create_handler(log)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("test-writer")
+    logger.addHandler(handler)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    for i in range(100):
+        logger.info("message %d", i)
+    await writer.flush()
+    expected = "".join(f"message {i}\n" for i in range(100)).encode()
+    assert _read_all(log) == expected
+    summary = writer.summary()
+    assert summary.written == 100
+    assert summary.dropped == 0
+    assert summary.queued == 0
+    assert summary.disk_usage == store.usage > 0
+
+    # Messages logged after the writer is closed are written directly.
+    await writer.aclose()
+    logger.info("after close")
+    assert _read_all(log) == expected + b"after close\n"
+    logger.removeHandler(handler)
+    handler.close()
+
+    # Deleting a log releases its disk space.
+    writer.defer(log.delete)
+    assert writer.summary().disk_usage == 0
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_dropped() -> None:
+    store = LogStore(segment_size=1000, max_size=10000, budget=10000)
+    writer = LogWriter(store, buffer_size=20)
+    log = writer.create_log("test")
+
+    # Hold the writer thread so that messages queue up.
+    release = await asyncio.to_thread(_block, writer)
+    assert writer.write(log, "0123456789\n")
+    assert not writer.write(log, "0123456789\n")
+    summary = writer.summary()
+    assert summary.queued == 1
+    assert summary.buffered == 11
+    assert summary.dropped == 1
+
+    release.set()
+    await writer.flush()
+    assert _read_all(log) == b"0123456789\n"
+    assert writer.summary().written == 1
+
+    # A handler that drops messages reports how many were dropped in the
+    # next message it writes.
+    other = writer.create_log("other")
+    handler = writer.create_handler(other)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    release = await asyncio.to_thread(_block, writer)
+    assert writer.write(log, "0123456789\n")
+    record = logging.makeLogRecord({"msg": "lost", "levelname": "INFO"})
+    handler.handle(record)
+    assert handler.dropped == 1
+    release.set()
+    await writer.flush()
+    record = logging.makeLogRecord({"msg": "kept", "levelname": "INFO"})
+    handler.handle(record)
+    assert handler.dropped == 0
+    await writer.flush()
+    assert _read_all(other) == b"WARNING Dropped 1 log messages\nINFO kept\n"
+
+    handler.close()
+    await writer.aclose()
+    store.close()
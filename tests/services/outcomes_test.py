@@ -0,0 +1,53 @@
+"""Tests for flock success and failure counts."""
+
+from __future__ import annotations
+
+import pytest
+
+from mobu.services import outcomes
+from mobu.services.outcomes import FlockOutcomes
+
+
+def test_windows(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(outcomes, "monotonic", lambda: now)
+    counts = FlockOutcomes()
+
+    # Record failures early on and successes half an hour later.
+    for _ in range(10):
+        counts.record_failure()
+    now += 1800
+    for _ in range(30):
+        counts.record_success()
+    now += 30
+
+    assert counts.success_count == 30
+    assert counts.failure_count == 10
+    minute, five_minutes, hour = counts.window_summaries()
+    assert minute.window == 60
+    assert minute.success_count == 30
+    assert minute.failure_count == 0
+    assert minute.success_rate == 1.0
+    assert five_minutes.success_count == 30
+
+    # Windows start at the start of a bucket, so the minute window is the
+    # 55 seconds since the start of its oldest bucket.
+    assert minute.iteration_rate == pytest.approx(30 / 55)
+    assert five_minutes.iteration_rate == pytest.approx(30 / 295)
+
+    # The hour window covers the whole life of the flock so far.
+    assert hour.success_count == 30
+    assert hour.failure_count == 10
+    assert hour.success_rate == 0.75
+    assert hour.iteration_rate == pytest.approx(40 / 1830)
+
+    # Once the ring wraps around, the old buckets should be forgotten.
+    now += 3600
+    counts.record_failure()
+    minute, _, hour = counts.window_summaries()
+    assert minute.success_count == 0
+    assert minute.failure_count == 1
+    assert minute.success_rate == 0.0
+    assert hour.success_count == 0
+    assert hour.failure_count == 1
+    assert counts.success_count == 30
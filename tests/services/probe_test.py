@@ -0,0 +1,112 @@
+"""Tests for searching for capacity."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from typing import cast
+
+import pytest
+import structlog
+from httpx import AsyncClient
+from safir.metrics import MockEventPublisher
+
+from mobu.events import Events
+from mobu.models.probe import CapacityProbeConfig
+from mobu.services.latency import FlockLatency
+from mobu.services.probe import CapacityProber
+
+
+@pytest.mark.asyncio
+async def test_probe_maximum(client: AsyncClient) -> None:
+    r = await client.put(
+        "/mobu/flocks",
+        json={
+            "name": "test",
+            "count": 1,
+            "capacity_probe": {
+                "step_count": 1,
+                "step_duration": "1s",
+                "max_count": 3,
+                "max_latency": "10s",
+            },
+            "user_spec": {"username_prefix": "bot-mobu-testuser"},
+            "scopes": ["exec:notebook"],
+            "business": {"type": "EmptyLoop", "options": {"idle_time": 0.1}},
+        },
+    )
+    assert r.status_code == 201
+
+    await asyncio.sleep(3.5)
+    r = await client.get("/mobu/flocks/test/summary")
+    assert r.status_code == 200
+    summary = r.json()
+    assert summary["monkey_count"] == 3
+    probe = summary["probe"]
+    assert probe["finished"]
+    assert probe["sustainable_count"] == 3
+    assert [s["count"] for s in probe["steps"]] == [1, 2, 3]
+    assert all(s["passed"] for s in probe["steps"])
+
+    r = await client.delete("/mobu/flocks/test")
+    assert r.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_probe_backoff(events: Events) -> None:
+    config = CapacityProbeConfig(
+        step_count=2,
+        step_duration=timedelta(milliseconds=100),
+        min_success_rate=0.9,
+    )
+    counts = [1]
+    outcomes = [0, 0]
+
+    # Pretend that each check of the outcomes sees more iterations finish,
+    # all of which fail once there are at least five monkeys.
+    def get_outcomes() -> tuple[int, int]:
+        if counts[-1] >= 5:
+            outcomes[1] += 10
+        else:
+            outcomes[0] += 10
+        return outcomes[0], outcomes[1]
+
+    async def resize(count: int) -> None:
+        counts.append(count)
+
+    prober = CapacityProber(
+        config,
+        flock="test",
+        business="EmptyLoop",
+        count=1,
+        rate=None,
+        resize=resize,
+        outcomes=get_outcomes,
+        dispatcher=None,
+        latency=FlockLatency(),
+        events=events,
+        logger=structlog.get_logger("mobu"),
+    )
+    await prober.run()
+
+    # The flock should have been backed off to the last passing step.
+    assert counts == [1, 3, 5, 3]
+    summary = prober.summary()
+    assert summary.finished
+    assert summary.sustainable_count == 3
+    assert [s.passed for s in summary.steps] == [True, True, False]
+    assert summary.steps[-1].success_rate == 0
+
+    await events.flush()
+    publisher = cast("MockEventPublisher", events.capacity_probe.publisher)
+    publisher.published.assert_published_all(
+        [
+            {
+                "business": "EmptyLoop",
+                "count": 3,
+                "flock": "test",
+                "rate": None,
+                "steps": 3,
+            }
+        ]
+    )
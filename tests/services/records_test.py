@@ -0,0 +1,97 @@
+"""Tests for the run records of a flock."""
+
+from __future__ import annotations
+
+import csv
+import gzip
+from datetime import UTC, datetime, timedelta
+from io import StringIO
+
+from mobu.services.records import FlockRecords, RecordContext
+
+
+def _read(records: FlockRecords) -> list[dict[str, str]]:
+    data = gzip.decompress(b"".join(records.export())).decode()
+    return list(csv.DictReader(StringIO(data)))
+
+
+def test_records() -> None:
+    records = FlockRecords("test", batch_size=3)
+    assert _read(records) == []
+
+    context = RecordContext(notebook="test.ipynb")
+    for i in range(4):
+        context.cell = f"cell{i}"
+        records.record(
+            monkey="bot-mobu-user1",
+            business="NotebookRunnerList",
+            phase="execute_cell",
+            duration=timedelta(seconds=i),
+            success=i != 3,
+            context=context,
+        )
+    records.record(
+        monkey="bot-mobu-user1",
+        business="NotebookRunnerList",
+        phase=None,
+        duration=None,
+        success=False,
+        context=context,
+    )
+    assert records.count == 5
+
+    # The first three records were compressed as a batch, and the rest are
+    # compressed when exported.
+    chunks = records.export()
+    assert len(chunks) == 3
+    rows = _read(records)
+    assert [r["cell"] for r in rows] == [
+        "cell0",
+        "cell1",
+        "cell2",
+        "cell3",
+        "cell3",
+    ]
+    assert [r["success"] for r in rows] == [
+        "True",
+        "True",
+        "True",
+        "False",
+        "False",
+    ]
+    assert rows[2] == {
+        "flock": "test",
+        "monkey": "bot-mobu-user1",
+        "business": "NotebookRunnerList",
+        "phase": "execute_cell",
+        "start": rows[2]["start"],
+        "duration": "2.0",
+        "success": "True",
+        "notebook": "test.ipynb",
+        "cell": "cell2",
+        "query": "",
+    }
+    start = datetime.fromisoformat(rows[2]["start"])
+    assert start <= datetime.now(tz=UTC) - timedelta(seconds=2)
+    assert rows[4]["phase"] == ""
+    assert rows[4]["duration"] == ""
+
+
+def test_dropped() -> None:
+    records = FlockRecords("test", batch_size=10, max_size=1)
+    context = RecordContext(query="query.sql")
+    for _ in range(25):
+        records.record(
+            monkey="bot-mobu-user1",
+            business="TAPQuerySetRunner",
+            phase="mobu.tap.execute_query",
+            duration=timedelta(seconds=1),
+            success=True,
+            context=context,
+        )
+
+    # The newest batch is always kept, even if it is too large.
+    rows = _read(records)
+    assert len(rows) == 5
+    assert records.dropped == 20
+    assert rows[0]["query"] == "query.sql"
@@ -0,0 +1,188 @@
+"""Tests for the monkey status table."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from mobu.models.business.base import BusinessData
+from mobu.models.business.notebookrunner import NotebookRunnerData
+from mobu.models.business.nublado import RunningImage
+from mobu.models.business.siaquerysetrunner import SIABusinessData, SIAQuery
+from mobu.models.monkey import MonkeyData, MonkeyField, MonkeyState
+from mobu.models.user import AuthenticatedUser
+from mobu.services.table import (
+    BusinessStatus,
+    MonkeySelection,
+    MonkeyStatus,
+    MonkeyTable,
+)
+
+
+def test_matches_models() -> None:
+    user = AuthenticatedUser(
+        username="bot-mobu-user", scopes=["exec:notebook"], token="blah"
+    )
+    empty = MonkeyStatus(
+        name="empty", user=user, business=BusinessStatus("EmptyLoop")
+    )
+    empty.business.success_count = 3
+    notebook = MonkeyStatus(
+        name="notebook", user=user, business=BusinessStatus("NotebookRunner")
+    )
+    notebook.state = MonkeyState.RUNNING
+    notebook.business.image = RunningImage(reference="lab:w_2026_40")
+    notebook.business.notebook = "test.ipynb"
+    notebook.business.running_code = "print(1)"
+    sia = MonkeyStatus(
+        name="sia", user=user, business=BusinessStatus("SIAQuerySetRunner")
+    )
+    sia.business.failure_count = 1
+    query = SIAQuery(ra=55.0, dec=-30.0, radius=0.1, time=[60000.0, 60001.0])
+    sia.business.running_query = query
+    table = MonkeyTable()
+    for status in (empty, notebook, sia):
+        table.add(status)
+
+    # The table should serialize the same way as the models would have been
+    # serialized as the response of a route.
+    expected = [
+        MonkeyData(
+            name="empty",
+            state=MonkeyState.IDLE,
+            user=user,
+            business=BusinessData(
+                name="EmptyLoop",
+                failure_count=0,
+                success_count=3,
+                refreshing=False,
+            ),
+        ),
+        MonkeyData(
+            name="notebook",
+            state=MonkeyState.RUNNING,
+            user=user,
+            business=NotebookRunnerData(
+                name="NotebookRunner",
+                failure_count=0,
+                success_count=0,
+                refreshing=False,
+                image=RunningImage(reference="lab:w_2026_40"),
+                notebook="test.ipynb",
+                running_code="print(1)",
+            ),
+        ),
+        MonkeyData(
+            name="sia",
+            state=MonkeyState.IDLE,
+            user=user,
+            business=SIABusinessData(
+                name="SIAQuerySetRunner",
+                failure_count=1,
+                success_count=0,
+                refreshing=False,
+                running_query=query,
+            ),
+        ),
+    ]
+    assert table.select(MonkeySelection()).to_json() == [
+        m.model_dump(mode="json", exclude_none=True, exclude_unset=True)
+        for m in expected
+    ]
+
+    table.remove("notebook")
+    assert [s.name for s in table.rows()] == ["empty", "sia"]
+
+
+def test_select() -> None:
+    table = MonkeyTable()
+    for i in range(10):
+        user = AuthenticatedUser(
+            username=f"bot-mobu-user{i}", scopes=[], token="blah"
+        )
+        business = BusinessStatus("EmptyLoop")
+        status = MonkeyStatus(name=user.username, user=user, business=business)
+        if i % 3 == 0:
+            status.state = MonkeyState.ERROR
+            status.business.failure_count = i
+        table.add(status)
+
+    selection = MonkeySelection(states={MonkeyState.ERROR}, limit=2)
+    page = table.select(selection)
+    assert [m.name for m in page.monkeys] == [
+        "bot-mobu-user0",
+        "bot-mobu-user3",
+    ]
+    assert page.next_cursor is not None
+    assert page.to_json([MonkeyField.STATE]) == [
+        {"name": "bot-mobu-user0", "state": "ERROR"},
+        {"name": "bot-mobu-user3", "state": "ERROR"},
+    ]
+
+    # Removing a monkey from an earlier page shouldn't change the next page.
+    table.remove("bot-mobu-user0")
+    selection = MonkeySelection(
+        states={MonkeyState.ERROR}, cursor=page.next_cursor, limit=2
+    )
+    page = table.select(selection)
+    assert [m.name for m in page.monkeys] == [
+        "bot-mobu-user6",
+        "bot-mobu-user9",
+    ]
+    assert page.next_cursor is None
+
+    page = table.select(MonkeySelection(min_failures=4))
+    assert [m.name for m in page.monkeys] == [
+        "bot-mobu-user6",
+        "bot-mobu-user9",
+    ]
+
+
+def test_version() -> None:
+    user = AuthenticatedUser(username="bot-mobu-user", scopes=[], token="a")
+    status = MonkeyStatus(
+        name=user.username, user=user, business=BusinessStatus("EmptyLoop")
+    )
+    table = MonkeyTable()
+    version = str(table.version)
+    table.add(status)
+    assert str(table.version) != version
+
+    # Any change to the status of the monkey or its business should change
+    # the version of the table.
+    version = str(table.version)
+    status.state = MonkeyState.RUNNING
+    assert str(table.version) != version
+    version = str(table.version)
+    status.business.success_count += 1
+    assert str(table.version) != version
+    version = str(table.version)
+    table.remove(status.name)
+    assert str(table.version) != version
+
+    # Versions of different tables should never match.
+    assert str(MonkeyTable().version) != str(MonkeyTable().version)
+
+
+def test_recent_phases() -> None:
+    user = AuthenticatedUser(username="bot-mobu-user", scopes=[], token="a")
+    status = MonkeyStatus(
+        name=user.username, user=user, business=BusinessStatus("EmptyLoop")
+    )
+    status.business.timings.record_phase("spawn_lab", timedelta(seconds=40))
+    status.business.timings.finish(timedelta(seconds=41), success=True)
+    table = MonkeyTable()
+    table.add(status)
+    assert table.recent_phases.summary()["spawn_lab"].count == 1
+    status.business.timings.record_phase("spawn_lab", timedelta(seconds=60))
+    status.business.timings.finish(timedelta(seconds=61), success=True)
+    assert table.recent_phases.summary()["spawn_lab"].count == 2
+
+    # Replacing or removing a monkey removes its timings.
+    replacement = MonkeyStatus(
+        name=user.username, user=user, business=BusinessStatus("EmptyLoop")
+    )
+    table.add(replacement)
+    assert table.recent_phases.summary() == {}
+    replacement.business.timings.finish(timedelta(seconds=1), success=True)
+    table.remove(user.username)
+    assert table.recent_phases.summary() == {}
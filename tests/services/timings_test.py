@@ -0,0 +1,98 @@
+"""Tests for the phase timings of recent iterations."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from mobu.services.timings import IterationTimings, RecentPhases
+
+
+def test_timings() -> None:
+    timings = IterationTimings(size=2)
+    assert timings.to_json() == []
+
+    # Phases that run during startup count towards the first iteration, and
+    # phases that run more than once in an iteration are added together.
+    timings.record_phase("hub_login", timedelta(seconds=1))
+    timings.record_phase("spawn_lab", timedelta(seconds=40))
+    timings.record_phase("execute_cell", timedelta(seconds=2))
+    timings.record_phase("execute_cell", timedelta(seconds=3))
+    timings.finish(timedelta(seconds=50), success=True)
+    assert timings.to_json() == [
+        {
+            "success": True,
+            "duration": 50.0,
+            "phases": {
+                "hub_login": 1.0,
+                "spawn_lab": 40.0,
+                "execute_cell": 5.0,
+            },
+        }
+    ]
+
+    # Only the most recent iterations are kept.
+    timings.record_phase("spawn_lab", timedelta(seconds=240))
+    timings.finish(timedelta(seconds=245), success=False)
+    timings.finish(None, success=False)
+    assert timings.to_json() == [
+        {
+            "success": False,
+            "duration": 245.0,
+            "phases": {"spawn_lab": 240.0},
+        },
+        {"success": False, "duration": None, "phases": {}},
+    ]
+
+
+def test_recent_phases() -> None:
+    recent = RecentPhases()
+    assert recent.summary() == {}
+
+    # Iterations kept before the timings are shared are counted too.
+    first = IterationTimings(size=2)
+    first.record_phase("spawn_lab", timedelta(seconds=40))
+    first.finish(timedelta(seconds=41), success=True)
+    first.share(recent)
+    first.record_phase("spawn_lab", timedelta(seconds=60))
+    first.finish(timedelta(seconds=61), success=True)
+    second = IterationTimings(size=2)
+    second.share(recent)
+    second.record_phase("spawn_lab", timedelta(seconds=240))
+    second.record_phase("lab_login", timedelta(seconds=2))
+    second.finish(timedelta(seconds=250), success=True)
+
+    summary = recent.summary()
+    assert list(summary.keys()) == ["lab_login", "spawn_lab"]
+    assert summary["lab_login"].model_dump() == {
+        "count": 1,
+        "mean": 2.0,
+        "max": 2.0,
+    }
+    assert summary["spawn_lab"].model_dump() == {
+        "count": 3,
+        "mean": 340 / 3,
+        "max": 240.0,
+    }
+
+    # Iterations that fall out of the ring are removed, including the
+    # slowest one.
+    for _ in range(2):
+        second.record_phase("spawn_lab", timedelta(seconds=30))
+        second.finish(timedelta(seconds=31), success=True)
+    summary = recent.summary()
+    assert list(summary.keys()) == ["spawn_lab"]
+    assert summary["spawn_lab"].model_dump() == {
+        "count": 4,
+        "mean": 40.0,
+        "max": 60.0,
+    }
+
+    # Unsharing removes all the iterations of a business.
+    first.unshare()
+    assert recent.summary()["spawn_lab"].model_dump() == {
+        "count": 2,
+        "mean": 30.0,
+        "max": 30.0,
+    }
+    second.unshare()
+    assert recent.summary() == {}
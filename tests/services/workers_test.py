@@ -0,0 +1,41 @@
+"""Tests for the pool of worker processes."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from mobu.services.business.notebookrunner import read_code_cells
+from mobu.services.workers import WorkerPool
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("processes", [0, 2])
+async def test_read_code_cells(processes: int) -> None:
+    notebook = (
+        Path(__file__).parent.parent
+        / "data"
+        / "notebooks"
+        / "test-notebook.ipynb"
+    )
+    pool = WorkerPool(processes)
+    try:
+        cells = await pool.run(read_code_cells, notebook)
+    finally:
+        pool.close()
+
+    assert cells == [
+        {
+            "source": ['print("This is a test")'],
+            "_index": "1",
+            "id": "f84f0959",
+        },
+        {
+            "source": ['print("This is another test")'],
+            "_index": "2",
+            "id": "44ada997",
+        },
+        {"source": ['print("Final test")'], "_index": "3", "id": "53a941a4"},
+        {"source": [], "_index": "4", "id": "823560c6"},
+    ]
@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
 import pytest
 import structlog
+from cryptography.fernet import Fernet
 from rubin.gafaelfawr import (
     GafaelfawrClient,
     GafaelfawrGroup,
@@ -13,6 +17,7 @@ from rubin.gafaelfawr import (
 from mobu.dependencies.config import config_dependency
 from mobu.models.user import Group, User
 from mobu.storage.gafaelfawr import GafaelfawrStorage
+from mobu.storage.token_cache import TokenCache
 
 
 @pytest.mark.asyncio
@@ -70,3 +75,81 @@ async def test_groups() -> None:
         gid=1234,
         groups=[GafaelfawrGroup(name="g_users", id=10000)],
     )
+
+
+@pytest.mark.asyncio
+async def test_generate_tokens() -> None:
+    config = config_dependency.config
+    users = [User(username=f"bot-mobu-user{i}") for i in range(1, 26)]
+    scopes = ["exec:notebook"]
+
+    client = GafaelfawrClient()
+    logger = structlog.get_logger(__file__)
+    gafaelfawr = GafaelfawrStorage(config, client, logger)
+
+    # Tokens are created concurrently but returned in the order of the users.
+    tokens = gafaelfawr.create_service_tokens(users, scopes)
+    auth_users = [u async for u in tokens]
+    assert [u.username for u in auth_users] == [u.username for u in users]
+    assert len({u.token for u in auth_users}) == len(users)
+    assert all(u.scopes == scopes for u in auth_users)
+
+
+@pytest.mark.asyncio
+async def test_token_cache(tmp_path: Path) -> None:
+    config = config_dependency.config
+    user = User(username="bot-mobu-someuser", uidnumber=1234)
+    scopes = ["exec:notebook"]
+    path = tmp_path / "tokens"
+    key = Fernet.generate_key().decode()
+
+    client = GafaelfawrClient()
+    logger = structlog.get_logger(__file__)
+    cache = TokenCache(path, key, logger)
+    gafaelfawr = GafaelfawrStorage(config, client, logger, cache)
+    auth_user = await gafaelfawr.create_service_token(user, scopes)
+    assert await gafaelfawr.create_service_token(user, scopes) == auth_user
+
+    # The token is reused after a restart, but not for other scopes.
+    cache = TokenCache(path, key, logger)
+    gafaelfawr = GafaelfawrStorage(config, client, logger, cache)
+    assert await gafaelfawr.create_service_token(user, scopes) == auth_user
+    other = await gafaelfawr.create_service_token(user, ["read:tap"])
+    assert other.token != auth_user.token
+
+    # A token more than 30 days old is replaced.
+    expires = datetime.now(tz=UTC) + timedelta(days=300)
+    cache.put(user, auth_user, expires)
+    renewed = await gafaelfawr.create_service_token(user, scopes)
+    assert renewed.token != auth_user.token
+    assert cache.expiring(timedelta(days=330)) == []
+
+
+@pytest.mark.asyncio
+async def test_renew_tokens(tmp_path: Path) -> None:
+    config = config_dependency.config
+    users = [User(username=f"bot-mobu-user{i}") for i in range(1, 3)]
+    scopes = ["exec:notebook"]
+    key = Fernet.generate_key().decode()
+
+    client = GafaelfawrClient()
+    logger = structlog.get_logger(__file__)
+    cache = TokenCache(tmp_path / "tokens", key, logger)
+    gafaelfawr = GafaelfawrStorage(config, client, logger, cache)
+    gafaelfawr.start(lambda: {"bot-mobu-user1"})
+    expires = datetime.now(tz=UTC) + timedelta(days=300)
+    old = []
+    for user in users:
+        auth_user = await gafaelfawr.create_service_token(user, scopes)
+        cache.put(user, auth_user, expires)
+        old.append(auth_user)
+
+    # Old tokens of users with running monkeys are replaced, and those of
+    # other users are dropped.
+    await gafaelfawr._renew_tokens()
+    assert len(cache) == 1
+    renewed = cache.get(users[0], scopes, timedelta(days=360))
+    assert renewed
+    assert renewed.token != old[0].token
+    assert not cache.get(users[1], scopes, timedelta(days=0))
+    await gafaelfawr.aclose()
@@ -0,0 +1,68 @@
+"""Tests for the token cache."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+import structlog
+from cryptography.fernet import Fernet
+
+from mobu.models.user import AuthenticatedUser, Group, User
+from mobu.storage.token_cache import TokenCache
+
+
+def _authenticate(user: User, scopes: list[str]) -> AuthenticatedUser:
+    return AuthenticatedUser(
+        token="gt-some-token",
+        scopes=scopes,
+        username=user.username,
+        name="Mobu Test User",
+        uidnumber=user.uidnumber,
+        gidnumber=user.gidnumber,
+        groups=user.groups,
+    )
+
+
+@pytest.mark.asyncio
+async def test_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "cache" / "tokens"
+    key = Fernet.generate_key().decode()
+    logger = structlog.get_logger(__file__)
+    user = User(
+        username="bot-mobu-user1",
+        uidnumber=1000,
+        gidnumber=1000,
+        groups=[Group(name="g_users", id=10000)],
+    )
+    scopes = ["exec:notebook", "read:tap"]
+    auth_user = _authenticate(user, scopes)
+    expires = datetime.now(tz=UTC) + timedelta(days=365)
+
+    cache = TokenCache(path, key, logger)
+    cache.put(user, auth_user, expires)
+    await cache.save()
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert b"gt-some-token" not in path.read_bytes()
+
+    # Tokens are found regardless of the order of the scopes, but not for
+    # other scopes, a user with different metadata, or if they would expire
+    # too soon.
+    cache = TokenCache(path, key, logger)
+    assert len(cache) == 1
+    lifetime = timedelta(days=30)
+    assert cache.get(user, list(reversed(scopes)), lifetime) == auth_user
+    cached = cache.get(user, scopes, lifetime)
+    assert cached
+    assert cached.name == "Mobu Test User"
+    assert not cache.get(user, ["exec:notebook"], lifetime)
+    other = user.model_copy(update={"uidnumber": 1001})
+    assert not cache.get(other, scopes, lifetime)
+    assert not cache.get(user, scopes, timedelta(days=400))
+    assert cache.expiring(lifetime) == []
+    assert len(cache.expiring(timedelta(days=400))) == 1
+
+    # A cache encrypted with a different key is ignored.
+    cache = TokenCache(path, Fernet.generate_key().decode(), logger)
+    assert len(cache) == 0